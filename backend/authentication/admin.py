@@ -1,6 +1,6 @@
 from django.contrib import admin
-from .models import User
+from .models import DataExport, User
 
 # Register your models here.
 admin.site.register(User)
-
+admin.site.register(DataExport)
@@ -2,6 +2,9 @@ from django.utils import timezone
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from django.urls import reverse
+from authentication.export import download_token
+from authentication.models import DataExport
 
 User = get_user_model()
 
@@ -140,3 +143,24 @@ class EmailVerificationSerializer(serializers.Serializer):
                 "Verification code has expired. Please request a new one.")
 
         return data
+
+
+class DataExportSerializer(serializers.ModelSerializer):
+    """Serializer for reporting an account data export and its download link."""
+
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = DataExport
+        fields = [
+            'id', 'status', 'progress', 'include_media', 'error_message', 'size',
+            'download_url', 'created_at', 'updated_at', 'finished_at'
+        ]
+        read_only_fields = fields
+
+    def get_download_url(self, obj):
+        if obj.status != 'succeeded' or not obj.archive:
+            return None
+        url = f"{reverse('export-user-data-download', args=[obj.id])}?token={download_token(obj)}"
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
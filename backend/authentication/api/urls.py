@@ -11,7 +11,9 @@ from .views import (
     GoogleCallbackView,
     GoogleAuthProcessView,
     DeleteAccountView,
-    ExportUserDataView
+    ExportUserDataView,
+    DataExportDetailView,
+    DataExportDownloadView
 )
 
 urlpatterns = [
@@ -41,4 +43,8 @@ urlpatterns = [
 
     # Export user data
     path('export-data/', ExportUserDataView.as_view(), name='export-user-data'),
+    path('export-data/<uuid:pk>/', DataExportDetailView.as_view(),
+         name='export-user-data-detail'),
+    path('export-data/<uuid:pk>/download/', DataExportDownloadView.as_view(),
+         name='export-user-data-download'),
 ]
@@ -1,13 +1,13 @@
 import os
 import random
-import json
 import string
 from datetime import timedelta
 from django.utils import timezone
-from django.http import HttpResponse
+from django.http import FileResponse
 from django.contrib.auth import get_user_model, authenticate
 from django.core.mail import send_mail
 from django.conf import settings
+from django.db import transaction
 from rest_framework import status, generics, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -17,12 +17,19 @@ from django.urls import reverse
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
 from django.contrib.auth.tokens import default_token_generator
+from authentication.deletion import delete_account
+from authentication.export import archive_name, check_download_token
+from authentication.models import DataExport
+from authentication.tasks import export_user_data_task
+from videos.cleanup import deferred_cleanup
+from videos.tasks import queue_storage_cleanup
 from .serializers import (
     UserSerializer,
     UserCreateSerializer,
     PasswordResetRequestSerializer,
     PasswordResetVerifySerializer,
     ProfileUpdateSerializer,
+    DataExportSerializer,
 )
 import requests
 from google.oauth2 import id_token
@@ -542,20 +549,8 @@ class DeleteAccountView(APIView):
         user = request.user
 
         try:
-            # Get related objects to delete
-            videos = user.videos.all()
-            for video in videos:
-                video.delete()
-
-            # Delete subtitles
-            subtitles = user.subtitles.all()
-            subtitles.delete()
-
-            # Revoke auth token
-            Token.objects.filter(user=user).delete()
-
-            # Delete the user
-            user.delete()
+            # Rows go in one transaction, stored files in the background
+            delete_account(user)
 
             return Response(
                 {"detail": "Account successfully deleted"},
@@ -571,70 +566,93 @@ class DeleteAccountView(APIView):
 
 
 class ExportUserDataView(APIView):
-    """View for exporting all user data."""
+    """
+    View for exporting all user data. POST queues an archive of the account
+    (202); GET reports the latest export, with its download link once done.
+    """
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        if not request.user.is_authenticated:
+        export = request.user.data_exports.order_by('-created_at').first()
+        if not export:
             return Response(
-                {"detail": "Authentication required."},
-                status=status.HTTP_401_UNAUTHORIZED
+                {"detail": "No data export has been requested."},
+                status=status.HTTP_404_NOT_FOUND
             )
+        return Response(DataExportSerializer(export, context={'request': request}).data)
+
+    def post(self, request):
         user = request.user
+        include_media = str(request.data.get('include_media', '')).lower() in ('1', 'true')
 
-        try:
-            # Collect user data
-            user_data = UserSerializer(user).data
-
-            # Collect video data
-            videos = user.videos.all()
-            video_data = [
-                {
-                    'id': video.id,
-                    'title': video.title,
-                    'description': video.description,
-                    'created_at': video.created_at.isoformat(),
-                    'file_path': video.file.name if video.file else None,
-                }
-                for video in videos
-            ]
-
-            # Collect subtitle data
-            subtitles = user.subtitles.all()
-            subtitle_data = [
-                {
-                    'id': subtitle.id,
-                    'video_id': subtitle.video_id,
-                    'language': subtitle.language,
-                    'transcript': subtitle.transcript,
-                    'subtitles_json': subtitle.subtitles_json,
-                    'font': subtitle.font,
-                    'style': subtitle.style,
-                    'created_at': subtitle.created_at.isoformat() if subtitle.created_at else None,
-                }
-                for subtitle in subtitles
-            ]
-
-            # Create data package
-            data_package = {
-                'user': user_data,
-                'videos': video_data,
-                'subtitles': subtitle_data,
-            }
-
-            # Create JSON response
-            response = HttpResponse(
-                json.dumps(data_package, indent=4),
-                content_type='application/json'
-            )
-            response['Content-Disposition'] = f'attachment; filename="{user.username}_data_export.json"'
+        with transaction.atomic():
+            # Serializes concurrent requests of the user, e.g. a double click
+            get_user_model().objects.select_for_update().filter(pk=user.pk).first()
+
+            # A pending export is reused rather than written twice
+            export = user.data_exports.filter(status__in=['queued', 'running']).first()
+            if export:
+                return Response(DataExportSerializer(export, context={'request': request}).data,
+                                status=status.HTTP_202_ACCEPTED)
 
-            return response
+            # Only the newest archive is kept; older ones are removed in the background
+            with deferred_cleanup() as cleanup:
+                user.data_exports.all().delete()
+            transaction.on_commit(lambda: queue_storage_cleanup(cleanup))
+            export = DataExport.objects.create(user=user, include_media=include_media)
 
+        try:
+            result = export_user_data_task.delay(str(export.id))
         except Exception as e:
-            import traceback
-            traceback.print_exc()
+            print(f"Failed to queue export_user_data_task: {str(e)}")
+            export.status = 'failed'
+            export.error_message = f"Failed to start export: {str(e)}"
+            export.save()
             return Response(
                 {"detail": f"Failed to export user data: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+        DataExport.objects.filter(pk=export.pk).update(task_id=result.id)
+        return Response(DataExportSerializer(export, context={'request': request}).data,
+                        status=status.HTTP_202_ACCEPTED)
+
+
+class DataExportDetailView(generics.RetrieveAPIView):
+    """View for checking the progress of a data export."""
+
+    serializer_class = DataExportSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return DataExport.objects.filter(user=self.request.user)
+
+
+class DataExportDownloadView(APIView):
+    """
+    Download a finished data export archive. The signed token of the link
+    authorizes the download, so browsers can fetch it directly.
+    """
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, pk):
+        if not check_download_token(request.query_params.get('token'), pk):
+            return Response(
+                {"detail": "Invalid or expired download link."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        export = DataExport.objects.select_related('user').filter(
+            pk=pk, status='succeeded').first()
+        if not export or not export.archive or not os.path.exists(export.archive.path):
+            return Response(
+                {"detail": "Data export not found."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        response = FileResponse(
+            open(export.archive.path, 'rb'), as_attachment=True,
+            filename=archive_name(export.user), content_type='application/zip')
+        response['Cache-Control'] = 'private, no-store'
+        return response
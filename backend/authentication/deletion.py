@@ -0,0 +1,22 @@
+from django.db import transaction
+from videos.cleanup import deferred_cleanup, remove_file
+from videos.models import VideoBlob
+from videos.tasks import queue_storage_cleanup
+
+
+def delete_account(user):
+    """
+    Delete ``user`` with their videos, subtitles, jobs and tokens in one
+    transaction. Rows are deleted in bulk and no file is touched meanwhile;
+    once committed, the stored files (videos and blobs nobody else uses,
+    thumbnails, artifacts, exports, renders, cached transcripts and the
+    profile picture) are removed by batches of background cleanup tasks.
+    """
+    with transaction.atomic():
+        with deferred_cleanup() as cleanup:
+            if user.profile_picture:
+                remove_file(user.profile_picture.path)
+            user.delete()
+            VideoBlob.release_unreferenced(cleanup.blob_ids)
+        transaction.on_commit(lambda: queue_storage_cleanup(cleanup))
+    return cleanup
@@ -0,0 +1,132 @@
+import io
+import json
+import os
+import zipfile
+from django.conf import settings
+from django.core import signing
+from django.core.serializers.json import DjangoJSONEncoder
+from subtitles.export import get_writer
+from subtitles.models import Subtitle
+from videos.models import Video
+
+# Subtitle files added to the archive next to the JSON Lines records
+ARCHIVE_SUBTITLE_FORMATS = ('srt', 'vtt')
+
+VIDEO_FIELDS = ('id', 'title', 'description', 'status', 'duration', 'file', 'created_at')
+
+
+def download_token(export):
+    """A signed token granting the download of ``export`` for USER_EXPORT_LINK_MAX_AGE."""
+    return signing.TimestampSigner(salt='authentication.data-export').sign(str(export.id))
+
+
+def check_download_token(token, export_id):
+    """Whether ``token`` is a current download token of the export ``export_id``."""
+    try:
+        value = signing.TimestampSigner(salt='authentication.data-export').unsign(
+            token or '', max_age=settings.USER_EXPORT_LINK_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return value == str(export_id)
+
+
+def archive_name(user):
+    return f"{user.username}_data_export.zip"
+
+
+def open_text(archive, name):
+    """A text stream writing the archive member ``name``, compressed as it goes."""
+    # The size is not known in advance, so allow members over 2 GiB
+    return io.TextIOWrapper(archive.open(name, 'w', force_zip64=True), encoding='utf-8')
+
+
+def write_json_lines(archive, name, records):
+    with open_text(archive, name) as output:
+        for record in records:
+            output.write(json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False))
+            output.write('\n')
+
+
+def video_records(videos):
+    for video in videos:
+        yield {
+            'id': video.id,
+            'title': video.title,
+            'description': video.description,
+            'status': video.status,
+            'duration': video.duration,
+            'created_at': video.created_at,
+            'file_path': video.file.name if video.file else None,
+        }
+
+
+def subtitle_records(subtitles):
+    for subtitle in subtitles:
+        yield {
+            'id': subtitle.id,
+            'video_id': subtitle.video_id,
+            'language': subtitle.language,
+            'transcript': subtitle.transcript,
+            'subtitles_json': subtitle.subtitles_json,
+            'font': subtitle.font,
+            'style': subtitle.style,
+            'created_at': subtitle.created_at,
+            'updated_at': subtitle.updated_at,
+        }
+
+
+def write_user_archive(user, path, profile, include_media=False, report=None):
+    """
+    Write everything ``user`` holds to a zip archive at ``path``:
+
+    - ``account.json``: the ``profile`` dict
+    - ``videos.jsonl`` and ``subtitles.jsonl``: one JSON record per line
+    - ``subtitles/<id>_<language>.srt`` and ``.vtt``
+    - ``media/<video id>/<file name>`` with ``include_media``
+
+    Rows are read through chunked iterators and every member is streamed
+    into the archive, so memory use does not grow with the account.
+    ``report(done, total)`` is called as rows and files are written.
+    """
+    chunk_size = settings.USER_EXPORT_CHUNK_SIZE
+    videos = Video.objects.filter(user=user).order_by('pk')
+    subtitles = Subtitle.objects.filter(user=user).order_by('pk')
+    video_count = videos.count()
+    subtitle_count = subtitles.count()
+    total = video_count + 2 * subtitle_count + (video_count if include_media else 0)
+    done = 0
+
+    def counted(items):
+        nonlocal done
+        for item in items:
+            yield item
+            done += 1
+            if report:
+                report(done, total)
+
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('account.json', json.dumps(
+            profile, cls=DjangoJSONEncoder, ensure_ascii=False, indent=4))
+        write_json_lines(archive, 'videos.jsonl', video_records(counted(
+            videos.only(*VIDEO_FIELDS).iterator(chunk_size=chunk_size))))
+        write_json_lines(archive, 'subtitles.jsonl', subtitle_records(counted(
+            subtitles.iterator(chunk_size=chunk_size))))
+
+        # A second pass, as only one archive member can be written at a time
+        writers = [get_writer(name) for name in ARCHIVE_SUBTITLE_FORMATS]
+        for subtitle in counted(subtitles.defer('transcript').iterator(chunk_size=chunk_size)):
+            track = subtitle.cue_track
+            for writer in writers:
+                name = f"subtitles/{subtitle.id}_{subtitle.language}.{writer.extension}"
+                with open_text(archive, name) as output:
+                    for chunk in writer.stream(subtitle, track):
+                        output.write(chunk)
+
+        if include_media:
+            for video in counted(videos.only('id', 'file').iterator(chunk_size=chunk_size)):
+                if video.file and os.path.exists(video.file.path):
+                    # Already compressed, so stored as is
+                    archive.write(
+                        video.file.path,
+                        f"media/{video.id}/{os.path.basename(video.file.name)}",
+                        compress_type=zipfile.ZIP_STORED)
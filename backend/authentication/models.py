@@ -1,6 +1,13 @@
+import uuid
+from django.conf import settings
 from django.db import models
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
 from django.contrib.auth.models import AbstractUser
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
+from subtitle_generator.events import publish_event
+from videos.cleanup import remove_file
 
 
 class User(AbstractUser):
@@ -35,3 +42,69 @@ class User(AbstractUser):
 
     def __str__(self):
         return self.email
+
+
+class DataExport(models.Model):
+    """Background export of an account's data as a downloadable zip archive."""
+
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL,
+                             on_delete=models.CASCADE, related_name='data_exports')
+    # Whether the original video files are copied into the archive
+    include_media = models.BooleanField(default=False)
+
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default='queued')
+    progress = models.PositiveSmallIntegerField(default=0)
+    error_message = models.TextField(null=True, blank=True)
+    task_id = models.CharField(max_length=255, null=True, blank=True)
+    archive = models.FileField(upload_to='data_exports/', null=True, blank=True)
+    size = models.BigIntegerField(null=True, blank=True)
+
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='dataexport_user_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"Data export {self.id} for {self.user_id} - {self.status}"
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.publish()
+
+    def set_progress(self, progress):
+        """Record the percent complete without touching other fields."""
+        self.progress = int(progress)
+        DataExport.objects.filter(pk=self.pk).update(
+            progress=self.progress, updated_at=timezone.now())
+        self.publish()
+
+    def publish(self):
+        """Push the export state to the owner's live event stream."""
+        publish_event(
+            self.user_id,
+            'data_export',
+            export_id=str(self.id),
+            status=self.status,
+            progress=self.progress,
+            error_message=self.error_message
+        )
+
+
+@receiver(pre_delete, sender=DataExport)
+def delete_export_archive(sender, instance, **kwargs):
+    if instance.archive:
+        remove_file(instance.archive.path)
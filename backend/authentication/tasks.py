@@ -0,0 +1,70 @@
+import os
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+from authentication.api.serializers import UserSerializer
+from authentication.export import write_user_archive
+from authentication.models import DataExport
+import logging
+
+file_name = "tasks.log"
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+formatter = logging.Formatter(
+    '%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+file_handler = logging.FileHandler(file_name)
+file_handler.setFormatter(formatter)
+logger.addHandler(file_handler)
+
+
+@shared_task
+def export_user_data_task(export_id):
+    """Write an account's data export archive for download."""
+    logger.info(f"Starting export_user_data_task for export_id={export_id}")
+    export = DataExport.objects.select_related('user').filter(id=export_id).first()
+
+    if not export:
+        logger.error(f"No data export found with ID {export_id}")
+        return
+
+    export.status = 'running'
+    export.progress = 0
+    export.save()
+
+    output_name = os.path.join('data_exports', f'{export.id}.zip')
+    output_path = os.path.join(settings.MEDIA_ROOT, output_name)
+    # Written aside and moved into place, so a download never sees half an archive
+    partial_path = f'{output_path}.part'
+    reported = [0]
+
+    def report(done, total):
+        # Publish whole-percent changes only
+        percent = 100 * done // total
+        if percent > reported[0]:
+            reported[0] = percent
+            export.set_progress(min(percent, 99))
+
+    try:
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        write_user_archive(export.user, partial_path, UserSerializer(export.user).data,
+                           include_media=export.include_media, report=report)
+        os.replace(partial_path, output_path)
+
+        export.archive = output_name
+        export.size = os.path.getsize(output_path)
+        export.status = 'succeeded'
+        export.progress = 100
+        export.finished_at = timezone.now()
+        export.save()
+        logger.info(f"Data export {export_id} finished: {output_path}")
+        return output_name
+    except Exception as e:
+        logger.error(f"Error in data export {export_id}: {str(e)}")
+        export.status = 'failed'
+        export.error_message = str(e)
+        export.finished_at = timezone.now()
+        export.save()
+        raise
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
@@ -1,3 +1,216 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+import zipfile
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from authentication.models import DataExport
+from authentication.tasks import export_user_data_task
+from subtitles.cache import file_identity_key, get_transcript_store
+from subtitles.export import export_dir
+from subtitles.models import RenderJob, Subtitle
+from videos.artifacts import artifact_dir
+from videos.models import Video, VideoBlob
+from videos.tasks import cleanup_storage_task
 
-# Create your tests here.
+
+def write_file(root, name):
+    path = os.path.join(root, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as output:
+        output.write(b'data')
+    return path
+
+
+@override_settings(EVENTS_REDIS_URL='', STORAGE_CLEANUP_BATCH_SIZE=3,
+                   SUBTITLE_TRANSCRIPT_CACHE='filesystem')
+class DeleteAccountTests(TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+        media = os.path.join(self.tempdir.name, 'media')
+        storage_settings = override_settings(
+            MEDIA_ROOT=media,
+            SUBTITLE_TRANSCRIPT_CACHE_DIR=os.path.join(self.tempdir.name, 'cache'))
+        storage_settings.enable()
+        self.addCleanup(storage_settings.disable)
+        self.store = get_transcript_store()
+
+        User = get_user_model()
+        self.user = User.objects.create_user(
+            username='alice', email='alice@example.com', password='secret',
+            profile_picture='profile_pictures/alice.png')
+        other = User.objects.create_user(
+            username='bob', email='bob@example.com', password='secret')
+
+        # A blob shared with another account, one of alice's own, and a file
+        # uploaded before blobs existed
+        shared = VideoBlob.objects.create(sha256='a' * 64, file='blobs/aa/shared.mp4', size=4)
+        own = VideoBlob.objects.create(sha256='b' * 64, file='blobs/bb/own.mp4', size=4)
+        Video.objects.create(user=other, title='Shared', blob=shared, file=shared.file.name)
+        Video.objects.create(user=self.user, title='Shared', blob=shared, file=shared.file.name)
+        video = Video.objects.create(user=self.user, title='Own', blob=own, file=own.file.name,
+                                     thumbnail='thumbnails/own.jpg')
+        legacy = Video.objects.create(user=self.user, title='Legacy', file='videos/legacy.mp4')
+        subtitle = Subtitle.objects.create(
+            video=video, user=self.user, transcript='Hello',
+            subtitles_json=[{'start': 0.0, 'end': 1.0, 'text': 'Hello'}])
+        RenderJob.objects.create(subtitle=subtitle, user=self.user, revision='r',
+                                 output='renders/own.mp4')
+
+        self.shared_path = write_file(media, 'blobs/aa/shared.mp4')
+        self.removed = [
+            write_file(media, 'blobs/bb/own.mp4'),
+            write_file(media, 'videos/legacy.mp4'),
+            write_file(media, 'thumbnails/own.jpg'),
+            write_file(media, 'renders/own.mp4'),
+            write_file(media, 'profile_pictures/alice.png'),
+            os.path.dirname(write_file(artifact_dir(video.id), 'segments_en.json')),
+            os.path.dirname(write_file(export_dir(subtitle.id), 'v3-1.srt')),
+        ]
+
+        # Fingerprints memoized for alice's files, by blob and by file identity
+        self.cache_keys = ['blob:' + 'b' * 64, file_identity_key(legacy.file.path)]
+        self.store.set(self.cache_keys[0], 'own')
+        self.store.set(self.cache_keys[1], 'legacy')
+        # Transcripts are keyed by audio, which other users' files may share
+        self.store.set('transcript:own', {'transcript': 'Hello'})
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_rows_are_deleted_at_once_and_files_in_background(self):
+        with mock.patch.object(cleanup_storage_task, 'delay') as delay, \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete('/api/auth/delete-account/')
+
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(get_user_model().objects.filter(username='alice').exists())
+        self.assertEqual(Video.objects.count(), 1)
+        self.assertFalse(Subtitle.objects.exists())
+        self.assertEqual(list(VideoBlob.objects.values_list('sha256', flat=True)), ['a' * 64])
+        # Nothing was removed during the request
+        self.assertTrue(all(os.path.exists(path) for path in self.removed))
+        self.assertGreater(delay.call_count, 1)
+
+        for _, batch in delay.call_args_list:
+            cleanup_storage_task.apply(kwargs=batch).get()
+        self.assertEqual([path for path in self.removed if os.path.exists(path)], [])
+        self.assertTrue(os.path.exists(self.shared_path))
+        self.assertEqual([key for key in self.cache_keys if self.store.get(key) is not None], [])
+        self.assertEqual(self.store.get('transcript:own'), {'transcript': 'Hello'})
+
+        # Batches may run again, e.g. after a worker crash
+        for _, batch in delay.call_args_list:
+            cleanup_storage_task.apply(kwargs=batch).get()
+
+
+@override_settings(EVENTS_REDIS_URL='', USER_EXPORT_CHUNK_SIZE=2)
+class DataExportTests(TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+        storage_settings = override_settings(MEDIA_ROOT=self.tempdir.name)
+        storage_settings.enable()
+        self.addCleanup(storage_settings.disable)
+
+        self.user = get_user_model().objects.create_user(
+            username='alice', email='alice@example.com', password='secret')
+        for index in range(3):
+            video = Video.objects.create(user=self.user, title=f'Video {index}',
+                                         file=f'videos/{index}.mp4')
+            write_file(self.tempdir.name, f'videos/{index}.mp4')
+            Subtitle.objects.create(
+                video=video, user=self.user, transcript=f'Transcript {index}',
+                subtitles_json=[{'start': 0.0, 'end': 1.5, 'text': f'Hello {index}'}])
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def request_export(self, **data):
+        with mock.patch.object(export_user_data_task, 'delay') as delay:
+            delay.return_value.id = 'task-id'
+            response = self.client.post('/api/auth/export-data/', data, format='json')
+        self.assertEqual(response.status_code, 202)
+        if delay.called:
+            export_user_data_task.apply(args=delay.call_args.args).get()
+        return response.data['id']
+
+    def test_export_is_written_in_background_and_downloaded_by_link(self):
+        export_id = self.request_export()
+
+        response = self.client.get(f'/api/auth/export-data/{export_id}/')
+        self.assertEqual(response.data['status'], 'succeeded')
+        self.assertEqual(response.data['progress'], 100)
+
+        # The link works without the API token
+        download = APIClient().get(response.data['download_url'])
+        self.assertEqual(download.status_code, 200)
+        self.assertIn('alice_data_export.zip', download['Content-Disposition'])
+        path = os.path.join(self.tempdir.name, 'download.zip')
+        with open(path, 'wb') as output:
+            for chunk in download.streaming_content:
+                output.write(chunk)
+
+        with zipfile.ZipFile(path) as archive:
+            names = archive.namelist()
+            self.assertEqual(json.loads(archive.read('account.json'))['username'], 'alice')
+            videos = [json.loads(line) for line in archive.read('videos.jsonl').splitlines()]
+            subtitles = [json.loads(line) for line in archive.read('subtitles.jsonl').splitlines()]
+            srt = archive.read(f"subtitles/{subtitles[0]['id']}_en.srt").decode()
+        self.assertEqual([video['title'] for video in videos], ['Video 0', 'Video 1', 'Video 2'])
+        self.assertEqual(subtitles[2]['transcript'], 'Transcript 2')
+        self.assertEqual(subtitles[0]['subtitles_json'][0]['text'], 'Hello 0')
+        self.assertIn('00:00:00,000 --> 00:00:01,500\nHello 0', srt)
+        self.assertEqual(len([name for name in names if name.endswith('.vtt')]), 3)
+        self.assertFalse(any(name.startswith('media/') for name in names))
+
+    def test_media_is_included_on_request(self):
+        export_id = self.request_export(include_media=True)
+        export = DataExport.objects.get(id=export_id)
+        with zipfile.ZipFile(export.archive.path) as archive:
+            media = [name for name in archive.namelist() if name.startswith('media/')]
+            self.assertEqual(len(media), 3)
+            self.assertEqual(archive.read(media[0]), b'data')
+
+    def test_download_requires_a_valid_link(self):
+        export_id = self.request_export()
+        url = f'/api/auth/export-data/{export_id}/download/'
+        self.assertEqual(APIClient().get(url).status_code, 403)
+        self.assertEqual(APIClient().get(url, {'token': f'{export_id}:forged'}).status_code, 403)
+
+        other = get_user_model().objects.create_user(
+            username='bob', email='bob@example.com', password='secret')
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(f'/api/auth/export-data/{export_id}/').status_code, 404)
+
+    def test_pending_export_is_reused(self):
+        with mock.patch.object(export_user_data_task, 'delay') as delay:
+            delay.return_value.id = 'task-id'
+            first = self.client.post('/api/auth/export-data/', {}, format='json')
+            second = self.client.post('/api/auth/export-data/', {}, format='json')
+
+        self.assertEqual((first.status_code, second.status_code), (202, 202))
+        self.assertEqual(first.data['id'], second.data['id'])
+        self.assertEqual(delay.call_count, 1)
+        self.assertEqual(DataExport.objects.count(), 1)
+
+    def test_new_export_replaces_the_previous_archive(self):
+        first = DataExport.objects.get(id=self.request_export())
+        first_path = first.archive.path
+        with mock.patch.object(cleanup_storage_task, 'delay') as cleanup, \
+                self.captureOnCommitCallbacks(execute=True):
+            second = self.request_export()
+
+        # The old archive is removed in the background, not during the request
+        self.assertTrue(os.path.exists(first_path))
+        for _, batch in cleanup.call_args_list:
+            cleanup_storage_task.apply(kwargs=batch).get()
+        self.assertFalse(os.path.exists(first_path))
+        self.assertEqual([str(pk) for pk in DataExport.objects.values_list('id', flat=True)],
+                         [second])
+        self.assertEqual(self.client.get('/api/auth/export-data/').data['id'], second)
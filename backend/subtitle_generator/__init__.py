@@ -0,0 +1,5 @@
+# Load the Celery app whenever Django starts so that tasks sent from web
+# processes use the project's broker, routing and time-limit configuration
+from .celery import app as celery_app
+
+__all__ = ('celery_app',)
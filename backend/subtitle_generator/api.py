@@ -0,0 +1,90 @@
+from django.conf import settings
+from rest_framework import serializers
+from rest_framework.pagination import CursorPagination
+
+
+class NewestFirstCursorPagination(CursorPagination):
+    """
+    Cursor pages over a list endpoint, newest first.
+
+    The cursor seeks by ``created_at``, so every page costs the same as the
+    first and rows created while paging are neither skipped nor repeated.
+    ``page_size`` may be given up to API_MAX_PAGE_SIZE.
+    """
+
+    ordering = ('-created_at', '-pk')
+    page_size_query_param = 'page_size'
+
+    def __init__(self):
+        self.page_size = settings.API_PAGE_SIZE
+        self.max_page_size = settings.API_MAX_PAGE_SIZE
+
+
+def requested_fields(request):
+    """The field names of a GET request's ``?fields=`` parameter, or None for all."""
+    if request is None or request.method != 'GET':
+        return None
+    value = request.query_params.get('fields')
+    if not value:
+        return None
+    return list(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin that limits the output to the fields of
+    ``?fields=id,title,status``. Only the top-level serializer (or the
+    items of a list) is narrowed; nested serializers keep their fields.
+
+    ``query_plan`` builds the matching query: the relations the fields read
+    are joined and only the columns they need are loaded. ``field_columns``
+    names the columns of fields that are not model fields of their own.
+    """
+
+    field_columns = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        list_item = isinstance(self.parent, serializers.ListSerializer) and self.parent is self.root
+        if self.root is not self and not list_item:
+            return fields
+        names = requested_fields(self.context.get('request'))
+        if names is None:
+            return fields
+        readable = [name for name, field in fields.items() if not field.write_only]
+        unknown = [name for name in names if name not in readable]
+        if unknown:
+            raise serializers.ValidationError({
+                'fields': f"Unknown fields: {', '.join(unknown)}. "
+                          f"Available: {', '.join(readable)}."
+            })
+        return {name: fields[name] for name in names}
+
+    @classmethod
+    def query_columns(cls, names=None):
+        """Column paths read to serialize ``names`` (all fields when None)."""
+        model_fields = {}
+        for field in cls.Meta.model._meta.concrete_fields:
+            model_fields[field.name] = model_fields[field.attname] = field.name
+        # The cursor of NewestFirstCursorPagination reads created_at
+        columns = [cls.Meta.model._meta.pk.name, *({'created_at'} & set(model_fields))]
+        for name in names or cls.Meta.fields:
+            declared = cls._declared_fields.get(name)
+            if declared is not None and declared.write_only:
+                continue
+            if name in cls.field_columns:
+                columns.extend(cls.field_columns[name])
+            elif isinstance(declared, SparseFieldsetMixin):
+                columns.extend(f'{name}__{column}' for column in declared.query_columns())
+            elif name in model_fields:
+                columns.append(model_fields[name])
+        return columns
+
+    @classmethod
+    def query_plan(cls, queryset, request):
+        """``queryset`` joined and narrowed for the fields requested by ``request``."""
+        columns = cls.query_columns(requested_fields(request))
+        related = {column.rsplit('__', 1)[0] for column in columns if '__' in column}
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*columns)
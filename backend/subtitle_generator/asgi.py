@@ -2,6 +2,9 @@
 ASGI config for subtitle_generator project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with an ASGI server (e.g. ``uvicorn subtitle_generator.asgi:application``)
+so the ``/api/events/`` Server-Sent Events stream runs without holding a
+worker thread per connected client.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
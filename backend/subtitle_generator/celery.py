@@ -6,3 +6,32 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'subtitle_generator.settings')
 app = Celery('subtitle_generator', broker='redis://127.0.0.1:6379/0')
 app.config_from_object('django.conf:settings', namespace='CELERY')
 app.autodiscover_tasks()
+
+
+def stage_options(stage, duration=None, short=None, runs=1):
+    """
+    Return ``apply_async`` options (queue and time limits) for a pipeline stage.
+
+    Limits grow with the video ``duration`` in seconds according to
+    ``CELERY_STAGE_TIME_LIMITS``, times ``runs`` when the task processes the
+    video several times in a row, and capped at ``CELERY_MAX_TIME_LIMIT``
+    so no task outlives the broker's ack timeout. Short clips, either known from their
+    duration or flagged with ``short`` before the duration is known, go to
+    the priority queue so they are not stuck behind long videos.
+    """
+    from django.conf import settings
+
+    base, per_second = settings.CELERY_STAGE_TIME_LIMITS[stage]
+    grace = settings.CELERY_HARD_TIME_LIMIT_GRACE
+    soft_time_limit = min(int(base + per_second * (duration or 0) * runs),
+                          settings.CELERY_MAX_TIME_LIMIT - grace)
+
+    if short is None:
+        short = duration is not None and duration <= settings.CELERY_SHORT_CLIP_SECONDS
+    queue = settings.CELERY_PRIORITY_QUEUE if short else settings.CELERY_STAGE_QUEUES[stage]
+
+    return {
+        'queue': queue,
+        'soft_time_limit': soft_time_limit,
+        'time_limit': soft_time_limit + grace,
+    }
@@ -0,0 +1,109 @@
+import json
+import logging
+import time
+import redis
+import redis.asyncio
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+# Seconds to stop publishing after Redis is found unreachable
+RETRY_AFTER = 30
+
+_client = None
+_unavailable_until = 0
+
+
+def user_channel(user_id):
+    """Redis pub/sub channel carrying a user's job and video updates."""
+    return f"events:user:{user_id}"
+
+
+def stream_token(user):
+    """
+    A signed token opening ``user``'s event stream for EVENTS_STREAM_TOKEN_MAX_AGE.
+    EventSource cannot send headers, so it goes in the stream URL instead of
+    the long-lived API token, which would end up in access logs.
+    """
+    return signing.TimestampSigner(salt='events.stream').sign(str(user.id))
+
+
+def check_stream_token(token):
+    """The id of the user a current stream token was issued to, or None."""
+    try:
+        value = signing.TimestampSigner(salt='events.stream').unsign(
+            token or '', max_age=settings.EVENTS_STREAM_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return None
+    return int(value)
+
+
+def get_redis():
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(
+            settings.EVENTS_REDIS_URL, socket_connect_timeout=1)
+    return _client
+
+
+def publish_event(user_id, event_type, **data):
+    """
+    Publish an event to a user's channel once the current transaction, if
+    any, commits, so clients never see a state that is rolled back and Redis
+    is never waited on while rows are locked.
+    Delivery is best effort: a missing or unreachable Redis is logged and
+    never interrupts the pipeline that reports the progress.
+    """
+    if not settings.EVENTS_REDIS_URL:
+        return
+    payload = json.dumps({'type': event_type, **data}, default=str)
+    transaction.on_commit(lambda: send_event(user_id, event_type, payload))
+
+
+def send_event(user_id, event_type, payload):
+    global _unavailable_until
+    if time.monotonic() < _unavailable_until:
+        return
+    try:
+        get_redis().publish(user_channel(user_id), payload)
+    except redis.RedisError as e:
+        # Skip publishing for a while rather than reconnecting on every update
+        _unavailable_until = time.monotonic() + RETRY_AFTER
+        logger.warning(f"Failed to publish {event_type} event: {str(e)}")
+
+
+def format_sse(event_type, data):
+    """Encode one Server-Sent Events message."""
+    return f"event: {event_type}\ndata: {data}\n\n"
+
+
+async def subscribe_user_events(user_id, heartbeat=15):
+    """
+    Yield Server-Sent Events messages for a user's channel.
+    The first message (a reconnection delay) is yielded once the
+    subscription is live. A comment line is sent every ``heartbeat`` seconds
+    without events so proxies keep the connection open and dead clients are
+    noticed.
+    """
+    client = redis.asyncio.from_url(settings.EVENTS_REDIS_URL)
+    pubsub = client.pubsub()
+    await pubsub.subscribe(user_channel(user_id))
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            message = await pubsub.get_message(
+                ignore_subscribe_messages=True, timeout=heartbeat)
+            if message is None:
+                yield ": keepalive\n\n"
+                continue
+            data = message['data']
+            if isinstance(data, bytes):
+                data = data.decode()
+            event_type = json.loads(data).get('type', 'message')
+            yield format_sse(event_type, data)
+    finally:
+        await pubsub.unsubscribe()
+        await pubsub.aclose()
+        await client.aclose()
@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Subtitle
+from .models import RenderJob, Subtitle, SubtitleJob
 
 # Register your models here.
 admin.site.register(Subtitle)
+admin.site.register(SubtitleJob)
+admin.site.register(RenderJob)
@@ -1,10 +1,13 @@
+from django.conf import settings
 from rest_framework import serializers
-from subtitles.models import Subtitle
+from subtitle_generator.api import SparseFieldsetMixin
+from subtitles.cues import CUE_FIELDS
+from subtitles.models import RenderJob, Subtitle, SubtitleJob
 from videos.models import Video
 from videos.api.serializers import VideoSerializer
 
 
-class SubtitleSerializer(serializers.ModelSerializer):
+class SubtitleSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for the Subtitle model."""
 
     video = VideoSerializer(read_only=True)
@@ -14,16 +17,35 @@ class SubtitleSerializer(serializers.ModelSerializer):
         source='video'
     )
 
+    field_columns = {'subtitles_json': CUE_FIELDS}
+
     class Meta:
         model = Subtitle
         fields = [
-            'id', 'video', 'video_id', 'transcript', 'subtitles_json',
+            'id', 'video', 'video_id', 'transcript', 'subtitles_json', 'cue_version',
             'font', 'style', 'language', 'font_size', 'font_color',
             'background_color', 'background_opacity', 'text_alignment',
             'output_file', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'user', 'transcript',
-                            'subtitles_json', 'output_file', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'user', 'transcript', 'subtitles_json', 'cue_version',
+                            'output_file', 'created_at', 'updated_at']
+
+
+class SubtitleSummarySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    Subtitle list rows, read from small columns only. The transcript and
+    cues come from the detail and ``cues`` endpoints.
+    """
+
+    video_id = serializers.ReadOnlyField()
+
+    class Meta:
+        model = Subtitle
+        fields = [
+            'id', 'video_id', 'language', 'style', 'cue_count', 'duration',
+            'cue_version', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
 
 
 class SubtitleStyleSerializer(serializers.ModelSerializer):
@@ -36,6 +58,21 @@ class SubtitleStyleSerializer(serializers.ModelSerializer):
             'background_color', 'background_opacity', 'text_alignment'
         ]
 
+    def validate_language(self, value):
+        """A video holds one subtitle per language."""
+        instance = self.instance
+        if instance is not None and Subtitle.objects.filter(
+                video_id=instance.video_id, language=value).exclude(pk=instance.pk).exists():
+            raise serializers.ValidationError(
+                "This video already has subtitles in this language.")
+        return value
+
+
+class CueEditSerializer(serializers.Serializer):
+    """The cue version a cue edit was made against."""
+
+    version = serializers.IntegerField(min_value=0)
+
 
 class SubtitleGenerateSerializer(serializers.Serializer):
     """Serializer for generating subtitles for a video."""
@@ -62,3 +99,73 @@ class SubtitleGenerateSerializer(serializers.Serializer):
             )
 
         return data
+
+
+class SubtitleBatchItemSerializer(serializers.Serializer):
+    """One (video, language) pair of a batch generation request."""
+
+    video_id = serializers.IntegerField()
+    language = serializers.ChoiceField(
+        choices=Subtitle.LANGUAGE_CHOICES,
+        default='en'
+    )
+
+
+class SubtitleBatchGenerateSerializer(serializers.Serializer):
+    """Serializer for generating subtitles for many (video, language) pairs."""
+
+    items = SubtitleBatchItemSerializer(many=True, allow_empty=False)
+
+    def validate_items(self, items):
+        if len(items) > settings.SUBTITLE_BATCH_MAX_ITEMS:
+            raise serializers.ValidationError(
+                f"At most {settings.SUBTITLE_BATCH_MAX_ITEMS} items can be generated at once.")
+        return items
+
+    def validate(self, data):
+        """Resolve the videos in one query; all must belong to the current user."""
+        request = self.context.get('request')
+        if not request or not hasattr(request, 'user'):
+            raise serializers.ValidationError("Authentication required.")
+
+        video_ids = {item['video_id'] for item in data['items']}
+        videos = Video.objects.filter(user=request.user, id__in=video_ids).in_bulk()
+        missing = sorted(video_ids - set(videos))
+        if missing:
+            raise serializers.ValidationError(
+                f"Videos not found for the current user: {', '.join(map(str, missing))}.")
+
+        # Duplicate pairs are generated once
+        pairs = dict.fromkeys((item['video_id'], item['language']) for item in data['items'])
+        data['pairs'] = [(videos[video_id], language) for video_id, language in pairs]
+        return data
+
+
+class SubtitleJobSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Serializer for reporting a background subtitle generation job."""
+
+    video_id = serializers.ReadOnlyField()
+    subtitle_id = serializers.ReadOnlyField()
+
+    class Meta:
+        model = SubtitleJob
+        fields = [
+            'id', 'video_id', 'language', 'status', 'stage', 'progress',
+            'error_message', 'subtitle_id', 'created_at', 'updated_at',
+            'finished_at'
+        ]
+        read_only_fields = fields
+
+
+class RenderJobSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Serializer for reporting a burned-in video render."""
+
+    subtitle_id = serializers.ReadOnlyField()
+
+    class Meta:
+        model = RenderJob
+        fields = [
+            'id', 'subtitle_id', 'status', 'progress', 'error_message',
+            'output', 'created_at', 'updated_at', 'finished_at'
+        ]
+        read_only_fields = fields
@@ -1,10 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import SubtitleViewSet
+from .views import RenderJobViewSet, SubtitleViewSet, SubtitleJobViewSet
 from subtitles.views import export_subtitle
 
 router = DefaultRouter()
 router.register(r'subtitles', SubtitleViewSet, basename='subtitle')
+router.register(r'subtitle-jobs', SubtitleJobViewSet, basename='subtitle-job')
+router.register(r'render-jobs', RenderJobViewSet, basename='render-job')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -1,10 +1,38 @@
 import os
-from subtitles.models import Subtitle
+from django.conf import settings
+from django.db import transaction
+from subtitles.cues import CUE_FIELDS, get_cached_track
+from subtitles.editing import CueEditError, apply_cue_operations
+from subtitles.export import export_revision
+from subtitles.models import RenderJob, Subtitle, SubtitleJob
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from subtitles.utils import generate_subtitles_for_video
+from subtitles.tasks import (
+    generate_subtitles_batch_task,
+    generate_subtitles_task,
+    render_subtitled_video_task,
+)
+from subtitle_generator.celery import stage_options
 from rest_framework import viewsets, status, permissions
-from .serializers import SubtitleSerializer, SubtitleStyleSerializer, SubtitleGenerateSerializer
+from rest_framework.pagination import LimitOffsetPagination
+from .serializers import (
+    CueEditSerializer,
+    SubtitleSerializer,
+    SubtitleSummarySerializer,
+    SubtitleStyleSerializer,
+    SubtitleGenerateSerializer,
+    SubtitleBatchGenerateSerializer,
+    SubtitleJobSerializer,
+    RenderJobSerializer,
+)
+
+
+class CuePagination(LimitOffsetPagination):
+    """Limit/offset pages over the cues matched by a time-range query."""
+
+    def __init__(self):
+        self.default_limit = settings.SUBTITLE_CUES_PAGE_SIZE
+        self.max_limit = settings.SUBTITLE_CUES_MAX_PAGE_SIZE
 
 
 class SubtitleViewSet(viewsets.ModelViewSet):
@@ -23,14 +51,24 @@ class SubtitleViewSet(viewsets.ModelViewSet):
         if video_id:
             queryset = queryset.filter(video_id=video_id)
 
+        # Cue queries read the columns through the cached index instead
+        if self.action == 'cues':
+            queryset = queryset.defer('transcript', *CUE_FIELDS)
+        elif self.action in ('list', 'retrieve'):
+            queryset = self.get_serializer_class().query_plan(queryset, self.request)
+
         return queryset
 
     def get_serializer_class(self):
         """Return appropriate serializer class based on the action."""
-        if self.action == 'update_style':
+        if self.action == 'list':
+            return SubtitleSummarySerializer
+        elif self.action == 'update_style':
             return SubtitleStyleSerializer
         elif self.action == 'generate':
             return SubtitleGenerateSerializer
+        elif self.action == 'generate_batch':
+            return SubtitleBatchGenerateSerializer
         return SubtitleSerializer
 
     def perform_create(self, serializer):
@@ -47,9 +85,122 @@ class SubtitleViewSet(viewsets.ModelViewSet):
         serializer.save()
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get', 'patch'])
+    def cues(self, request, pk=None):
+        """
+        GET: the cues overlapping the ``from``/``to`` range (in seconds),
+        paginated with ``limit`` and ``offset``. Either bound may be omitted.
+
+        PATCH: apply ``operations`` (see ``apply_cue_operations``) to the
+        cues. ``version`` must be an integer (400) matching the subtitle's
+        ``cue_version`` (409).
+        """
+        if request.method == 'PATCH':
+            return self.edit_cues(request)
+
+        subtitle = self.get_object()
+        try:
+            start = float(request.query_params.get('from', 0))
+            end = float(request.query_params.get('to', 'inf'))
+        except ValueError:
+            return Response(
+                {'detail': '"from" and "to" must be times in seconds.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not start <= end:
+            return Response(
+                {'detail': '"from" must not be after "to".'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        track = get_cached_track(
+            (subtitle.pk, export_revision(subtitle)), subtitle.load_cue_track)
+        paginator = CuePagination()
+        page = paginator.paginate_queryset(
+            track.overlapping(start, end), request, view=self)
+        return paginator.get_paginated_response(
+            [dict(track.cue(index), id=track.ids[index], index=index) for index in page])
+
+    def edit_cues(self, request):
+        subtitle = self.get_object()
+        serializer = CueEditSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        version = serializer.validated_data['version']
+        with transaction.atomic():
+            subtitle = Subtitle.objects.select_for_update().get(pk=subtitle.pk)
+            if version != subtitle.cue_version:
+                return Response(
+                    {'detail': 'The cues were changed by another edit.',
+                     'version': subtitle.cue_version},
+                    status=status.HTTP_409_CONFLICT
+                )
+
+            track = subtitle.cue_track
+            try:
+                changed, deleted = apply_cue_operations(
+                    track, request.data.get('operations'))
+            except CueEditError as e:
+                return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+            # Only the cue columns the edit changed are written (a retiming
+            # leaves the text alone); styling and transcript are untouched
+            previous = {field: getattr(subtitle, field) for field in CUE_FIELDS}
+            subtitle.cue_track = track
+            subtitle.cue_version += 1
+            subtitle.save(update_fields=[
+                *(field for field in CUE_FIELDS if getattr(subtitle, field) != previous[field]),
+                'cue_count', 'duration', 'cue_version', 'updated_at'])
+
+        cues = []
+        for cue_id in sorted(changed):
+            index = track.index_of(cue_id)
+            cues.append(dict(track.cue(index), id=cue_id, index=index))
+        return Response({
+            'version': subtitle.cue_version,
+            'cue_count': subtitle.cue_count,
+            'cues': cues,
+            'deleted': sorted(deleted),
+        })
+
+    @action(detail=True, methods=['post'])
+    def render_video(self, request, pk=None):
+        """
+        Queue a render of the video with these subtitles burned in (202).
+        A finished or pending render of the same subtitle revision is reused.
+        """
+        subtitle = self.get_object()
+        revision = export_revision(subtitle)
+        job = subtitle.render_jobs.filter(
+            revision=revision, status__in=['queued', 'running', 'succeeded']
+        ).order_by('-created_at').first()
+        if job:
+            return Response(RenderJobSerializer(job, context={'request': request}).data,
+                            status=status.HTTP_200_OK if job.status == 'succeeded'
+                            else status.HTTP_202_ACCEPTED)
+
+        job = RenderJob.objects.create(
+            subtitle=subtitle, user=request.user, revision=revision)
+        try:
+            result = render_subtitled_video_task.apply_async(
+                (str(job.id),), **stage_options('render', subtitle.video.duration))
+        except Exception as e:
+            print(f"Failed to queue render_subtitled_video_task: {str(e)}")
+            job.status = 'failed'
+            job.error_message = f"Failed to start rendering: {str(e)}"
+            job.save()
+            return Response(
+                {'detail': job.error_message},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        job.task_id = result.id
+        RenderJob.objects.filter(pk=job.pk).update(task_id=result.id)
+        return Response(RenderJobSerializer(job, context={'request': request}).data,
+                        status=status.HTTP_202_ACCEPTED)
+
     @action(detail=False, methods=['post'])
     def generate(self, request):
-        """Generate subtitles for a video."""
+        """Queue subtitle generation for a video and return the job (202)."""
         try:
             serializer = self.get_serializer(data=request.data)
             if not serializer.is_valid():
@@ -75,13 +226,6 @@ class SubtitleViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # Check if subtitles already exist for this language
-            existing_subtitle = Subtitle.objects.filter(
-                video=video, language=language).first()
-            if existing_subtitle:
-                # Delete existing subtitle to allow regeneration
-                existing_subtitle.delete()
-
             # Get the video file path
             video_path = os.path.join(os.getcwd(), video.file.path)
             if not os.path.exists(video_path):
@@ -90,22 +234,32 @@ class SubtitleViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_404_NOT_FOUND
                 )
 
-            # Generate subtitles using AI
-            transcript, subtitles_json, _ = generate_subtitles_for_video(
-                video_path, language)
-
-            # Create a new subtitle instance
-            subtitle = Subtitle.objects.create(
+            # Queue generation; existing subtitles for this language are
+            # replaced by the worker once the new ones are ready
+            job = SubtitleJob.objects.create(
                 video=video,
                 user=request.user,
-                transcript=transcript,
-                subtitles_json=subtitles_json,
                 language=language
             )
+            try:
+                result = generate_subtitles_task.apply_async(
+                    (str(job.id),), **stage_options('transcribe', video.duration))
+            except Exception as e:
+                print(f"Failed to queue generate_subtitles_task: {str(e)}")
+                job.status = 'failed'
+                job.error_message = f"Failed to start subtitle generation: {str(e)}"
+                job.save()
+                return Response(
+                    {'detail': job.error_message},
+                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                )
+
+            job.task_id = result.id
+            SubtitleJob.objects.filter(pk=job.pk).update(task_id=result.id)
 
             return Response(
-                SubtitleSerializer(subtitle).data,
-                status=status.HTTP_201_CREATED
+                SubtitleJobSerializer(job).data,
+                status=status.HTTP_202_ACCEPTED
             )
         except Exception as e:
             print(f"Error generating subtitles: {str(e)}")
@@ -115,3 +269,98 @@ class SubtitleViewSet(viewsets.ModelViewSet):
                 {'detail': f'Failed to generate subtitles: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+    @action(detail=False, methods=['post'])
+    def generate_batch(self, request):
+        """
+        Queue subtitle generation for many ``items`` of ``video_id`` and
+        ``language`` (202). Each video is one task that decodes its audio
+        once for all of its languages. Videos that cannot be processed are
+        returned under ``skipped``.
+        """
+        serializer = self.get_serializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {'detail': serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        languages_by_video = {}
+        skipped = []
+        for video, language in serializer.validated_data['pairs']:
+            if video.status not in ['ready', 'error']:
+                detail = f'Video is not in a state where subtitles can be generated. Current status: {video.status}'
+            elif not video.file or not os.path.exists(video.file.path):
+                detail = 'Video file not found on server'
+            else:
+                languages_by_video.setdefault(video, []).append(language)
+                continue
+            skipped.append({'video_id': video.id, 'language': language, 'detail': detail})
+
+        jobs = SubtitleJob.objects.bulk_create([
+            SubtitleJob(video=video, user=request.user, language=language)
+            for video, languages in languages_by_video.items()
+            for language in languages
+        ])
+        jobs_by_video = {}
+        for job in jobs:
+            jobs_by_video.setdefault(job.video, []).append(job)
+            job.publish()
+
+        for video, video_jobs in jobs_by_video.items():
+            job_ids = [str(job.id) for job in video_jobs]
+            # Languages share SUBTITLE_CHUNK_WORKERS requests, which the
+            # chunks of a single language of a long video already fill
+            at_once = min(settings.SUBTITLE_BATCH_LANGUAGE_WORKERS, settings.SUBTITLE_CHUNK_WORKERS)
+            if video.duration and video.duration > settings.SUBTITLE_CHUNK_SECONDS:
+                at_once = 1
+            rounds = -(-len(video_jobs) // max(1, at_once))
+            try:
+                result = generate_subtitles_batch_task.apply_async(
+                    (job_ids,), **stage_options('transcribe', video.duration, runs=rounds))
+            except Exception as e:
+                print(f"Failed to queue generate_subtitles_batch_task: {str(e)}")
+                for job in video_jobs:
+                    job.status = 'failed'
+                    job.error_message = f"Failed to start subtitle generation: {str(e)}"
+                    job.save()
+                continue
+            SubtitleJob.objects.filter(id__in=job_ids).update(task_id=result.id)
+            for job in video_jobs:
+                job.task_id = result.id
+
+        return Response({
+            'jobs': SubtitleJobSerializer(jobs, many=True).data,
+            'skipped': skipped,
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+class SubtitleJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """ViewSet for checking the progress and result of subtitle generation jobs."""
+
+    serializer_class = SubtitleJobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        """Return jobs for the current user, filtered by video ID if provided."""
+        queryset = SubtitleJob.objects.filter(
+            user=self.request.user).order_by('-created_at')
+
+        video_id = self.request.query_params.get('video', None)
+        if video_id:
+            queryset = queryset.filter(video_id=video_id)
+
+        return SubtitleJobSerializer.query_plan(queryset, self.request)
+
+
+class RenderJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """ViewSet for checking the progress and output of burned-in renders."""
+
+    serializer_class = RenderJobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        """Return render jobs for the current user."""
+        queryset = RenderJob.objects.filter(
+            user=self.request.user).order_by('-created_at')
+        return RenderJobSerializer.query_plan(queryset, self.request)
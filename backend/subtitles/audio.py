@@ -0,0 +1,116 @@
+import io
+import queue
+import subprocess
+import threading
+from moviepy.config import FFMPEG_BINARY
+
+# ffmpeg encoder arguments and file extension for each streaming format
+AUDIO_FORMATS = {
+    'flac': (['-c:a', 'flac', '-f', 'flac'], 'flac'),
+    'opus': (['-c:a', 'libopus', '-b:a', '32k', '-f', 'ogg'], 'ogg'),
+    'pcm': (['-c:a', 'pcm_s16le', '-f', 'wav'], 'wav'),
+}
+
+
+class AudioStream(io.RawIOBase):
+    """
+    File-like, read-only view of the audio track of a video, encoded on the fly.
+
+    ffmpeg decodes the video and writes mono audio to a pipe; a background
+    thread moves the encoded bytes into a bounded queue that the consumer
+    (e.g. an HTTP upload) drains. Encoding and uploading overlap and at most
+    ``max_chunks * chunk_size`` bytes are buffered in memory, so no temporary
+    file the size of the whole track is ever written to disk.
+    """
+
+    def __init__(self, video_path, audio_format='flac', sample_rate=16000,
+                 chunk_size=64 * 1024, max_chunks=16, start=None, duration=None):
+        if audio_format not in AUDIO_FORMATS:
+            raise ValueError(f"Unsupported audio format: {audio_format}")
+        super().__init__()
+
+        codec_args, extension = AUDIO_FORMATS[audio_format]
+        self.video_path = video_path
+        self.audio_format = audio_format
+        self.chunk_size = chunk_size
+        # Used as the upload filename so the backend can detect the format
+        self.name = f"audio.{extension}"
+
+        command = [FFMPEG_BINARY, '-nostdin', '-loglevel', 'error']
+        if start is not None:
+            command += ['-ss', f'{start:.3f}']
+        command += ['-i', video_path]
+        if duration is not None:
+            command += ['-t', f'{duration:.3f}']
+        command += ['-vn', '-ac', '1', '-ar', str(sample_rate),
+                    *codec_args, 'pipe:1']
+
+        self._process = subprocess.Popen(
+            command, stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        self._queue = queue.Queue(maxsize=max_chunks)
+        self._stopped = threading.Event()
+        self._pending = b''
+        self._eof = False
+        self._reader = threading.Thread(target=self._pump, daemon=True)
+        self._reader.start()
+
+    def _pump(self):
+        """Copy ffmpeg's stdout into the bounded queue until EOF or close()."""
+        try:
+            while not self._stopped.is_set():
+                chunk = self._process.stdout.read(self.chunk_size)
+                if not chunk:
+                    break
+                self._put(chunk)
+        finally:
+            self._put(None)
+
+    def _put(self, item):
+        while not self._stopped.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _check_exit(self):
+        returncode = self._process.wait()
+        if returncode != 0:
+            error = self._process.stderr.read().decode(errors='replace')
+            raise IOError(
+                f"ffmpeg failed to extract audio from {self.video_path}: {error.strip()}")
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._pending and not self._eof:
+            chunk = self._queue.get()
+            if chunk is None:
+                self._eof = True
+                self._check_exit()
+            else:
+                self._pending = chunk
+
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+    def close(self):
+        if not self.closed:
+            self._stopped.set()
+            if self._process.poll() is None:
+                self._process.kill()
+            self._process.wait()
+            self._process.stdout.close()
+            self._process.stderr.close()
+            self._reader.join(timeout=1)
+        super().close()
+
+
+def stream_audio_from_video(video_path, audio_format='flac', sample_rate=16000, **kwargs):
+    """Return an ``AudioStream`` of the video's audio as mono ``sample_rate`` Hz."""
+    return AudioStream(video_path, audio_format=audio_format,
+                       sample_rate=sample_rate, **kwargs)
@@ -0,0 +1,212 @@
+import hashlib
+import json
+import os
+import subprocess
+import tempfile
+import threading
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from moviepy.config import FFMPEG_BINARY
+
+# Bump when the stored payload format changes so old entries are ignored
+CACHE_VERSION = 2
+
+
+def audio_fingerprint(video_path, sample_rate=16000, audio_path=None):
+    """
+    Hash the decoded audio track of a video.
+
+    The audio is decoded and resampled to mono ``sample_rate`` Hz PCM before
+    hashing, so the fingerprint depends on what is heard, not on the container,
+    video stream or metadata. With ``audio_path``, the same decode also writes
+    the audio track there as MP3.
+    """
+    command = [
+        FFMPEG_BINARY, '-nostdin', '-loglevel', 'error', '-i', video_path,
+        '-vn', '-ac', '1', '-ar', str(sample_rate), '-f', 's16le', 'pipe:1',
+    ]
+    if audio_path:
+        command += ['-vn', '-c:a', 'libmp3lame', '-f', 'mp3', '-y', audio_path]
+    digest = hashlib.sha256()
+    process = subprocess.Popen(
+        command, stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        for chunk in iter(lambda: process.stdout.read(256 * 1024), b''):
+            digest.update(chunk)
+        _, error = process.communicate()
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+    if process.returncode != 0:
+        raise IOError(
+            f"ffmpeg failed to fingerprint audio of {video_path}: {error.decode(errors='replace').strip()}")
+    return digest.hexdigest()
+
+
+def file_identity_key(path):
+    """Cheap key for a file on disk, used to memoize its audio fingerprint."""
+    stat = os.stat(path)
+    identity = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    return "file:" + hashlib.sha256(identity.encode()).hexdigest()
+
+
+def transcript_cache_key(fingerprint, backend, model, language):
+    """Key for a transcription of the given audio by a backend/model/language."""
+    identity = f"v{CACHE_VERSION}|{fingerprint}|{backend}|{model}|{language}"
+    return "transcript:" + hashlib.sha256(identity.encode()).hexdigest()
+
+
+class FileSystemStore:
+    """
+    JSON files in a directory, bounded to ``max_bytes`` with LRU eviction.
+    An entry's modification time is bumped on every hit, and the least
+    recently used entries are removed once the directory grows too large.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key.replace(':', '_') + '.json')
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as entry:
+                value = json.load(entry)
+            os.utime(path)
+            return value
+        except (OSError, ValueError):
+            return None
+
+    def set(self, key, value):
+        path = self._path(key)
+        # Write atomically so concurrent readers never see a partial entry
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as entry:
+            json.dump(value, entry)
+        os.replace(temp_path, path)
+        self.evict()
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def evict(self):
+        """Remove least recently used entries until the store fits ``max_bytes``."""
+        with self._lock:
+            entries = []
+            for dir_entry in os.scandir(self.directory):
+                if dir_entry.name.endswith('.json'):
+                    try:
+                        stat = dir_entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, dir_entry.path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+
+class DjangoCacheStore:
+    """
+    Store backed by one of the ``CACHES`` aliases.
+    Use Django's RedisCache or DatabaseCache backends for a shared store;
+    size bounds and LRU eviction are handled by the cache backend itself
+    (``maxmemory-policy allkeys-lru`` on Redis, ``MAX_ENTRIES`` on the DB cache).
+    """
+
+    def __init__(self, alias):
+        self.cache = caches[alias]
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, value):
+        self.cache.set(key, value, timeout=None)
+
+    def delete(self, key):
+        self.cache.delete(key)
+
+
+_store = None
+_store_config = None
+_store_lock = threading.Lock()
+
+
+def get_transcript_store():
+    """Return the configured transcript store, or None when caching is disabled."""
+    global _store, _store_config
+    store_type = settings.SUBTITLE_TRANSCRIPT_CACHE
+    if not store_type:
+        return None
+
+    config = (
+        store_type,
+        settings.SUBTITLE_TRANSCRIPT_CACHE_DIR,
+        settings.SUBTITLE_TRANSCRIPT_CACHE_MAX_BYTES,
+        settings.SUBTITLE_TRANSCRIPT_CACHE_ALIAS,
+    )
+    with _store_lock:
+        if _store is None or _store_config != config:
+            if store_type == 'filesystem':
+                _store = FileSystemStore(
+                    settings.SUBTITLE_TRANSCRIPT_CACHE_DIR,
+                    settings.SUBTITLE_TRANSCRIPT_CACHE_MAX_BYTES)
+            elif store_type == 'django':
+                _store = DjangoCacheStore(settings.SUBTITLE_TRANSCRIPT_CACHE_ALIAS)
+            else:
+                raise ImproperlyConfigured(
+                    f"Unknown transcript cache '{store_type}'. "
+                    "Use 'filesystem', 'django' or leave it empty to disable.")
+            _store_config = config
+        return _store
+
+
+def get_audio_fingerprint(video_path, store=None, content_hash=None, audio_path=None):
+    """
+    Return the audio fingerprint of a file, memoized by its ``content_hash``
+    when known, otherwise by path, size and mtime.
+
+    With ``audio_path``, a fingerprint that has to be computed also writes
+    the audio track there as MP3 in the same decode; on a memoized
+    fingerprint ``audio_path`` is left as it was.
+    """
+    store = store if store is not None else get_transcript_store()
+    identity_key = f"blob:{content_hash}" if content_hash else file_identity_key(video_path)
+    if store is not None:
+        fingerprint = store.get(identity_key)
+        if fingerprint:
+            return fingerprint
+
+    fingerprint = audio_fingerprint(video_path, audio_path=audio_path)
+    if store is not None:
+        store.set(identity_key, fingerprint)
+    return fingerprint
+
+
+def forget_audio(identity_key, store=None):
+    """
+    Drop the fingerprint memoized under ``identity_key`` (see
+    ``get_audio_fingerprint``). Transcripts are keyed by the decoded audio
+    and may be shared with other users' files of the same audio, so they are
+    left to the store's LRU eviction.
+    """
+    store = store if store is not None else get_transcript_store()
+    if store is not None:
+        store.delete(identity_key)
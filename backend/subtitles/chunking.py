@@ -0,0 +1,174 @@
+import re
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from moviepy.config import FFMPEG_BINARY
+
+SILENCE_START_RE = re.compile(r'silence_start:\s*(-?[\d.]+)')
+SILENCE_END_RE = re.compile(r'silence_end:\s*(-?[\d.]+)')
+
+
+@dataclass
+class AudioChunk:
+    """
+    A window of audio to transcribe.
+
+    ``start``/``end`` is the audio actually sent to the backend, including
+    the overlap with its neighbours. ``keep_start``/``keep_end`` is the part
+    of the timeline this chunk owns when the results are stitched together.
+    """
+    index: int
+    start: float
+    end: float
+    keep_start: float
+    keep_end: float
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+
+def parse_silences(ffmpeg_output):
+    """Parse ``silencedetect`` log output into a list of (start, end) tuples."""
+    silences = []
+    start = None
+    for line in ffmpeg_output.splitlines():
+        match = SILENCE_START_RE.search(line)
+        if match:
+            start = max(float(match.group(1)), 0.0)
+            continue
+        match = SILENCE_END_RE.search(line)
+        if match and start is not None:
+            silences.append((start, float(match.group(1))))
+            start = None
+    return silences
+
+
+def detect_silences(video_path, noise_db=-35, min_silence=0.4):
+    """Find silent stretches in the audio track using ffmpeg's silencedetect filter."""
+    command = [
+        FFMPEG_BINARY, '-nostdin', '-hide_banner', '-i', video_path, '-vn',
+        '-af', f'silencedetect=noise={noise_db}dB:d={min_silence}',
+        '-f', 'null', '-',
+    ]
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise IOError(
+            f"ffmpeg silence detection failed for {video_path}: {result.stderr.strip()}")
+    return parse_silences(result.stderr)
+
+
+def plan_chunks(duration, silences, chunk_length=600.0, overlap=2.0, search_window=30.0):
+    """
+    Split ``duration`` seconds into chunks of about ``chunk_length`` seconds.
+
+    Each cut is placed at the midpoint of the silence closest to the ideal
+    boundary (within ``search_window`` seconds), falling back to the ideal
+    boundary when no silence is near. Every chunk is padded by ``overlap``
+    seconds on both sides so words at a cut are heard in full at least once.
+    """
+    if duration <= chunk_length:
+        return [AudioChunk(0, 0.0, duration, 0.0, duration)]
+
+    midpoints = [(start + end) / 2 for start, end in silences]
+    cuts = [0.0]
+    while duration - cuts[-1] > chunk_length:
+        target = cuts[-1] + chunk_length
+        candidates = [
+            point for point in midpoints
+            if abs(point - target) <= search_window and point > cuts[-1] + overlap
+        ]
+        cut = min(candidates, key=lambda point: abs(point - target)) if candidates else target
+        cuts.append(cut)
+    cuts.append(duration)
+
+    chunks = []
+    for index in range(len(cuts) - 1):
+        keep_start, keep_end = cuts[index], cuts[index + 1]
+        chunks.append(AudioChunk(
+            index=index,
+            start=max(keep_start - overlap, 0.0),
+            end=min(keep_end + overlap, duration),
+            keep_start=keep_start,
+            keep_end=keep_end,
+        ))
+    return chunks
+
+
+def _normalize(text):
+    return re.sub(r'[^\w\s]', '', text).lower().split()
+
+
+def merge_chunk_segments(chunks, results):
+    """
+    Stitch per-chunk segment lists back onto the global timeline.
+
+    ``results[i]`` holds the segments of ``chunks[i]`` with times relative to
+    the chunk start. A segment is kept by the chunk that owns its midpoint, and
+    text repeated across a seam (when both neighbours heard the same words in
+    the overlap) is dropped from the later chunk.
+    """
+    merged = []
+    for chunk, segments in zip(chunks, results):
+        for segment in segments:
+            start = segment["start"] + chunk.start
+            end = segment["end"] + chunk.start
+            midpoint = (start + end) / 2
+            is_last = chunk.index == len(chunks) - 1
+            if midpoint < chunk.keep_start or (midpoint >= chunk.keep_end and not is_last):
+                continue
+
+            if merged and start < merged[-1]["end"]:
+                previous_words = _normalize(merged[-1]["text"])
+                words = _normalize(segment["text"])
+                if not words or words == previous_words[-len(words):]:
+                    continue
+
+            shifted = {
+                "start": round(start, 3),
+                "end": round(end, 3),
+                "text": segment["text"]
+            }
+            if "words" in segment:
+                shifted["words"] = [
+                    {**word,
+                     "start": round(word["start"] + chunk.start, 3),
+                     "end": round(word["end"] + chunk.start, 3)}
+                    for word in segment["words"]
+                ]
+            merged.append(shifted)
+    return merged
+
+
+def transcribe_in_chunks(chunks, transcribe_chunk, max_workers=4, on_chunk_done=None,
+                         executor=None):
+    """
+    Transcribe ``chunks`` concurrently and return ``(transcript, segments)``.
+
+    ``transcribe_chunk(chunk)`` must return ``(text, segments)`` with segment
+    times relative to ``chunk.start``; it is called from a pool of
+    ``max_workers`` threads, or from ``executor`` when one is shared with
+    other work. ``on_chunk_done(done, total)`` is called as each chunk
+    finishes.
+    """
+    if executor is None:
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            return transcribe_in_chunks(
+                chunks, transcribe_chunk, on_chunk_done=on_chunk_done, executor=executor)
+
+    results = [None] * len(chunks)
+    futures = {executor.submit(transcribe_chunk, chunk): index
+               for index, chunk in enumerate(chunks)}
+    try:
+        for done, future in enumerate(as_completed(futures), start=1):
+            results[futures[future]] = future.result()
+            if on_chunk_done:
+                on_chunk_done(done, len(chunks))
+    finally:
+        # Do not leave queued chunks of a failed transcription in a shared pool
+        for future in futures:
+            future.cancel()
+
+    segments = merge_chunk_segments(chunks, [chunk_segments for _, chunk_segments in results])
+    transcript = " ".join(segment["text"].strip() for segment in segments)
+    return transcript, segments
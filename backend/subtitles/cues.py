@@ -0,0 +1,234 @@
+import sys
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from itertools import accumulate
+from django.conf import settings
+
+# Model fields holding a packed CueTrack, in from_fields/to_fields order
+CUE_FIELDS = (
+    'cue_starts', 'cue_ends', 'cue_text_offsets', 'cue_text',
+    'cue_word_offsets', 'cue_words', 'cue_ids', 'cue_next_id',
+)
+
+
+def _pack(values):
+    """Serialize an array in little-endian byte order."""
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _unpack(typecode, data):
+    values = array(typecode)
+    values.frombytes(bytes(data or b''))
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+class CueTrack:
+    """
+    Subtitle cues in columnar form.
+
+    Start and end times are parallel arrays of doubles, cue texts are slices
+    of one UTF-8 buffer delimited by an offsets array, and word timings (the
+    flat millisecond lists of ``subtitles.timing``) are packed the same way.
+    Reading one cue or a time range decodes only those cues.
+
+    Each cue also has an id that stays the same while other cues are
+    inserted, deleted or moved, for addressing cues in edits. Ids are never
+    reused: ``next_cue_id`` only grows, even when the latest cue is deleted.
+    """
+
+    def __init__(self, starts, ends, text_offsets, text, word_offsets, words, ids=None,
+                 next_cue_id=0):
+        self.starts = starts
+        self.ends = ends
+        self.text_offsets = text_offsets
+        self.text = text
+        self.word_offsets = word_offsets
+        self.words = words
+        self.ids = ids if ids is not None and len(ids) == len(starts) else array('I', range(len(starts)))
+        self.next_cue_id = max(next_cue_id or 0, max(self.ids, default=-1) + 1)
+
+    @classmethod
+    def from_cues(cls, cues):
+        """Build a track from ``{"start", "end", "text"[, "words"]}`` dicts."""
+        starts, ends = array('d'), array('d')
+        text_offsets, word_offsets = array('I', [0]), array('I', [0])
+        words = array('I')
+        texts = []
+        text_length = 0
+        for cue in cues:
+            encoded = cue['text'].encode('utf-8')
+            starts.append(cue['start'])
+            ends.append(cue['end'])
+            texts.append(encoded)
+            text_length += len(encoded)
+            text_offsets.append(text_length)
+            words.extend(cue.get('words') or ())
+            word_offsets.append(len(words))
+        return cls(starts, ends, text_offsets, b''.join(texts), word_offsets, words)
+
+    @classmethod
+    def from_fields(cls, cue_starts, cue_ends, cue_text_offsets, cue_text,
+                    cue_word_offsets, cue_words, cue_ids=b'', cue_next_id=0):
+        """Load a track from the packed model fields (bytes or memoryviews)."""
+        text_offsets = _unpack('I', cue_text_offsets) or array('I', [0])
+        word_offsets = _unpack('I', cue_word_offsets) or array('I', [0])
+        return cls(_unpack('d', cue_starts), _unpack('d', cue_ends), text_offsets,
+                   bytes(cue_text or b''), word_offsets, _unpack('I', cue_words),
+                   _unpack('I', cue_ids), cue_next_id)
+
+    def to_fields(self):
+        return {
+            'cue_starts': _pack(self.starts),
+            'cue_ends': _pack(self.ends),
+            'cue_text_offsets': _pack(self.text_offsets),
+            'cue_text': self.text,
+            'cue_word_offsets': _pack(self.word_offsets),
+            'cue_words': _pack(self.words),
+            'cue_ids': _pack(self.ids),
+            'cue_next_id': self.next_cue_id,
+        }
+
+    def __len__(self):
+        return len(self.starts)
+
+    def text_of(self, index):
+        return self.text[self.text_offsets[index]:self.text_offsets[index + 1]].decode('utf-8')
+
+    def words_of(self, index):
+        return list(self.words[self.word_offsets[index]:self.word_offsets[index + 1]])
+
+    def cue(self, index):
+        cue = {
+            'start': self.starts[index],
+            'end': self.ends[index],
+            'text': self.text_of(index),
+        }
+        words = self.words_of(index)
+        if words:
+            cue['words'] = words
+        return cue
+
+    def __iter__(self):
+        return (self.cue(index) for index in range(len(self)))
+
+    def to_list(self):
+        return list(self)
+
+    def max_ends(self):
+        """Running maximum of the end times, a sorted array to bisect."""
+        if getattr(self, '_max_ends', None) is None or len(self._max_ends) != len(self):
+            self._max_ends = array('d', accumulate(self.ends, max))
+        return self._max_ends
+
+    def overlapping(self, start, end):
+        """
+        Indices of the cues overlapping ``[start, end)``, found by binary search.
+
+        Cues are ordered by start time. Their ends need not be sorted, so the
+        lower bound is searched in the running maximum of the end times.
+        """
+        upper = bisect_left(self.starts, end)
+        lower = bisect_right(self.max_ends(), start, hi=upper)
+        return [index for index in range(lower, upper) if self.ends[index] > start]
+
+    def update_cue(self, index, start=None, end=None, text=None, words=None):
+        """
+        Change one cue in place. Only its own slice of the text and word
+        buffers is replaced; the offsets after it are shifted.
+        """
+        if start is not None:
+            self.starts[index] = start
+        if end is not None:
+            self.ends[index] = end
+        self._max_ends = None
+        if text is not None:
+            encoded = text.encode('utf-8')
+            begin, finish = self.text_offsets[index], self.text_offsets[index + 1]
+            self.text = self.text[:begin] + encoded + self.text[finish:]
+            self._shift(self.text_offsets, index, len(encoded) - (finish - begin))
+        if words is not None:
+            begin, finish = self.word_offsets[index], self.word_offsets[index + 1]
+            self.words[begin:finish] = array('I', words)
+            self._shift(self.word_offsets, index, len(words) - (finish - begin))
+
+    def index_of(self, cue_id):
+        """Position of the cue with ``cue_id``, or -1."""
+        try:
+            return self.ids.index(cue_id)
+        except ValueError:
+            return -1
+
+    def next_id(self):
+        """Allocate an id for a new cue."""
+        cue_id = self.next_cue_id
+        self.next_cue_id += 1
+        return cue_id
+
+    def splice(self, index, count, cues, ids=()):
+        """
+        Replace the ``count`` cues from ``index`` with ``cues`` (given ``ids``).
+        Cues before the slice are untouched and offsets after it are shifted.
+        """
+        stop = index + count
+        inserted = CueTrack.from_cues(cues)
+        self.starts[index:stop] = inserted.starts
+        self.ends[index:stop] = inserted.ends
+        self.ids[index:stop] = array('I', ids)
+        self.text, self.text_offsets = _splice_packed(
+            self.text, self.text_offsets, index, stop, inserted.text, inserted.text_offsets)
+        self.words, self.word_offsets = _splice_packed(
+            self.words, self.word_offsets, index, stop, inserted.words, inserted.word_offsets)
+        self._max_ends = None
+
+    def _shift(self, offsets, index, delta):
+        if delta:
+            for position in range(index + 1, len(offsets)):
+                offsets[position] += delta
+
+
+def _splice_packed(buffer, offsets, index, stop, inserted, inserted_offsets):
+    """Replace the slices of cues ``index:stop`` in a packed buffer."""
+    begin, finish = offsets[index], offsets[stop]
+    delta = len(inserted) - (finish - begin)
+    buffer = buffer[:begin] + inserted + buffer[finish:]
+    offsets = (offsets[:index + 1]
+               + array('I', (begin + offset for offset in inserted_offsets[1:]))
+               + array('I', (offset + delta for offset in offsets[stop + 1:])))
+    return buffer, offsets
+
+
+_track_cache = OrderedDict()
+_track_cache_lock = threading.Lock()
+
+
+def get_cached_track(key, load):
+    """
+    Return the CueTrack cached under ``key``, calling ``load()`` on a miss.
+
+    Keys include the subtitle revision, so edited subtitles miss and their
+    stale tracks are evicted as the least recently used.
+    """
+    with _track_cache_lock:
+        track = _track_cache.get(key)
+        if track is not None:
+            _track_cache.move_to_end(key)
+            return track
+    track = load()
+    track.max_ends()
+    with _track_cache_lock:
+        _track_cache[key] = track
+        while len(_track_cache) > settings.SUBTITLE_CUE_INDEX_CACHE_SIZE:
+            _track_cache.popitem(last=False)
+    return track
+
+
+def clear_track_cache():
+    with _track_cache_lock:
+        _track_cache.clear()
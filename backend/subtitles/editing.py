@@ -0,0 +1,140 @@
+from bisect import bisect_right
+from subtitles.timing import pack_word_timings, word_timings
+
+CUE_OPERATIONS = ('insert', 'update', 'delete', 'split', 'merge')
+
+
+class CueEditError(Exception):
+    """An edit operation was invalid; none of the operations in the request are applied."""
+
+
+def _time(operation, key, default=None):
+    value = operation.get(key, default)
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+        raise CueEditError(f'"{key}" must be a non-negative time in seconds.')
+    return float(value)
+
+
+def _text(operation, default=None):
+    value = operation.get('text', default)
+    if not isinstance(value, str):
+        raise CueEditError('"text" must be a string.')
+    return value
+
+
+def _words(operation, text):
+    words = operation.get('words')
+    if words is None:
+        return None
+    if (not isinstance(words, list) or len(words) != 2 * len(text.split())
+            or not all(isinstance(value, int) and value >= 0 for value in words)):
+        raise CueEditError('"words" must hold a start and end in milliseconds for each word.')
+    return words
+
+
+def _cue(start, end, text, words=None):
+    if end <= start:
+        raise CueEditError('A cue must end after it starts.')
+    cue = {'start': start, 'end': end, 'text': text}
+    if words:
+        cue['words'] = words
+    return cue
+
+
+def _index(track, operation):
+    index = track.index_of(operation.get('id'))
+    if index < 0:
+        raise CueEditError(f"Cue {operation.get('id')!r} does not exist.")
+    return index
+
+
+def _place(track, index, cue, cue_id):
+    """Put ``cue`` at ``index`` (replacing nothing), or where its start keeps the track sorted."""
+    if (index > 0 and track.starts[index - 1] > cue['start']) or \
+            (index < len(track) and track.starts[index] < cue['start']):
+        index = bisect_right(track.starts, cue['start'])
+    track.splice(index, 0, [cue], [cue_id])
+
+
+def apply_cue_operations(track, operations):
+    """
+    Apply cue-level edits to ``track`` in order and return the ids of the
+    cues that were changed (including inserted) and those that were deleted.
+
+    Cues are addressed by id. Operations are dicts with an ``op`` of:
+
+    - ``insert``: a new cue from ``start``, ``end``, ``text`` and optional ``words``
+    - ``update``: any of ``start``, ``end``, ``text`` and ``words`` of cue ``id``
+    - ``delete``: cue ``id``
+    - ``split``: cue ``id`` before its ``word``-th word, at that word's start
+    - ``merge``: cue ``id`` with the cue after it
+    """
+    if not isinstance(operations, list) or not operations:
+        raise CueEditError('"operations" must be a non-empty list.')
+    changed, deleted = set(), set()
+    for operation in operations:
+        if not isinstance(operation, dict) or operation.get('op') not in CUE_OPERATIONS:
+            raise CueEditError(f'Each operation needs an "op" of: {", ".join(CUE_OPERATIONS)}.')
+        kind = operation['op']
+
+        if kind == 'insert':
+            text = _text(operation)
+            cue = _cue(_time(operation, 'start'), _time(operation, 'end'),
+                       text, _words(operation, text))
+            cue_id = track.next_id()
+            _place(track, len(track), cue, cue_id)
+            changed.add(cue_id)
+            continue
+
+        index = _index(track, operation)
+        cue_id = track.ids[index]
+        cue = track.cue(index)
+
+        if kind == 'update':
+            text = _text(operation, cue['text'])
+            words = _words(operation, text)
+            if words is None and len(text.split()) == len(cue['text'].split()):
+                words = cue.get('words')
+            updated = _cue(_time(operation, 'start', cue['start']),
+                           _time(operation, 'end', cue['end']), text, words)
+            track.splice(index, 1, [])
+            _place(track, index, updated, cue_id)
+            changed.add(cue_id)
+
+        elif kind == 'delete':
+            track.splice(index, 1, [])
+            changed.discard(cue_id)
+            deleted.add(cue_id)
+
+        elif kind == 'split':
+            tokens = cue['text'].split()
+            position = operation.get('word')
+            if not isinstance(position, int) or not 0 < position < len(tokens):
+                raise CueEditError(f'"word" must be between 1 and {len(tokens) - 1}.')
+            timings = word_timings(cue)
+            at = timings[position][0]
+            has_words = bool(cue.get('words'))
+            first = _cue(cue['start'], at, ' '.join(tokens[:position]),
+                         pack_word_timings(cue['start'], timings[:position]) if has_words else None)
+            second = _cue(at, cue['end'], ' '.join(tokens[position:]),
+                          pack_word_timings(at, timings[position:]) if has_words else None)
+            new_id = track.next_id()
+            track.splice(index, 1, [first, second], [cue_id, new_id])
+            changed.update((cue_id, new_id))
+
+        elif kind == 'merge':
+            if index + 1 >= len(track):
+                raise CueEditError(f'Cue {cue_id} has no following cue to merge with.')
+            following = track.cue(index + 1)
+            words = None
+            if cue.get('words') or following.get('words'):
+                words = pack_word_timings(
+                    cue['start'], word_timings(cue) + word_timings(following))
+            merged = _cue(cue['start'], max(cue['end'], following['end']),
+                          ' '.join(filter(None, (cue['text'], following['text']))), words)
+            deleted.add(track.ids[index + 1])
+            changed.discard(track.ids[index + 1])
+            track.splice(index, 2, [merged], [cue_id])
+            changed.add(cue_id)
+
+    return changed, deleted
@@ -0,0 +1,363 @@
+import json
+import os
+import shutil
+import tempfile
+from xml.sax.saxutils import escape, quoteattr
+from django.conf import settings
+from subtitles.timing import word_timings
+
+# Registry of subtitle writers by export format
+EXPORT_WRITERS = {}
+
+# Font family names for the Subtitle.font choices
+FONT_FAMILIES = {
+    'montserrat': 'Montserrat',
+    'roboto': 'Roboto',
+    'arial': 'Arial',
+    'comicsans': 'Comic Sans MS',
+}
+
+# ASS numpad alignments (bottom row) for Subtitle.text_alignment
+ASS_ALIGNMENTS = {'left': 1, 'center': 2, 'right': 3}
+
+# Bump when a writer's output changes so previously rendered files are ignored
+EXPORT_VERSION = 3
+
+# Size of the pieces handed to the response, so output is neither built up
+# in memory nor written to the socket one cue line at a time
+STREAM_BUFFER_SIZE = 64 * 1024
+
+
+def register_writer(name):
+    """Class decorator that registers a subtitle writer under the format ``name``."""
+    def decorator(cls):
+        cls.format = name
+        EXPORT_WRITERS[name] = cls
+        return cls
+    return decorator
+
+
+def get_writer(name):
+    """Return a writer for the export format ``name``, or None if it is unsupported."""
+    writer_class = EXPORT_WRITERS.get(name)
+    return writer_class() if writer_class else None
+
+
+def buffered(pieces, size=STREAM_BUFFER_SIZE):
+    """Join small string pieces into chunks of roughly ``size`` characters."""
+    buffer = []
+    buffered_length = 0
+    for piece in pieces:
+        buffer.append(piece)
+        buffered_length += len(piece)
+        if buffered_length >= size:
+            yield ''.join(buffer)
+            buffer = []
+            buffered_length = 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def split_time(seconds):
+    """Split seconds into whole hours, minutes, seconds and milliseconds."""
+    millis = max(0, int(round(seconds * 1000)))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    return hours, minutes, secs, millis
+
+
+def format_timestamp(seconds, separator=','):
+    """Format seconds as HH:MM:SS,mmm (SRT) or, with ``separator='.'``, HH:MM:SS.mmm."""
+    hours, minutes, secs, millis = split_time(seconds)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{millis:03d}"
+
+
+def hex_to_rgb(color):
+    color = color.lstrip('#')
+    return int(color[0:2], 16), int(color[2:4], 16), int(color[4:6], 16)
+
+
+class SubtitleWriter:
+    """
+    Base class for export formats.
+
+    ``write`` is a generator yielding the file as string pieces, given the
+    ``Subtitle`` (for its styling and language) and its list of
+    ``{"start", "end", "text"}`` cues.
+    """
+    format = None
+    extension = None
+    content_type = 'text/plain'
+
+    def write(self, subtitle, cues):
+        raise NotImplementedError
+
+    def stream(self, subtitle, cues):
+        """The output of ``write`` in buffered chunks."""
+        return buffered(self.write(subtitle, cues))
+
+
+@register_writer('srt')
+class SRTWriter(SubtitleWriter):
+    extension = 'srt'
+    content_type = 'application/x-subrip'
+
+    def write(self, subtitle, cues):
+        for index, cue in enumerate(cues, start=1):
+            # Keep line breaks, but a blank line would end the cue
+            text = "\n".join(line for line in cue['text'].splitlines() if line.strip())
+            yield (f"{index}\n{format_timestamp(cue['start'])} --> "
+                   f"{format_timestamp(cue['end'])}\n{text}\n\n")
+
+
+@register_writer('vtt')
+class WebVTTWriter(SubtitleWriter):
+    extension = 'vtt'
+    content_type = 'text/vtt'
+
+    def write(self, subtitle, cues):
+        red, green, blue = hex_to_rgb(subtitle.background_color)
+        yield "WEBVTT\n\n"
+        yield (
+            "STYLE\n::cue {\n"
+            f"  font-family: {FONT_FAMILIES.get(subtitle.font, subtitle.font)};\n"
+            f"  color: {subtitle.font_color};\n"
+            f"  background-color: rgba({red}, {green}, {blue}, {subtitle.background_opacity});\n"
+            "}\n\n"
+        )
+        for index, cue in enumerate(cues, start=1):
+            # '-->' would end the cue timing line early
+            text = escape(cue['text'].replace("-->", "->"))
+            yield (f"{index}\n{format_timestamp(cue['start'], '.')} --> "
+                   f"{format_timestamp(cue['end'], '.')} align:{subtitle.text_alignment}\n"
+                   f"{text}\n\n")
+
+
+def ass_color(color, opacity=1.0):
+    """Convert #RRGGBB and an opacity to the ASS &HAABBGGRR notation."""
+    red, green, blue = hex_to_rgb(color)
+    alpha = int(round((1 - opacity) * 255))
+    return f"&H{alpha:02X}{blue:02X}{green:02X}{red:02X}"
+
+
+def ass_timestamp(seconds):
+    """Format seconds as H:MM:SS.cc, the ASS time notation."""
+    hours, minutes, secs, millis = split_time(seconds)
+    return f"{hours:d}:{minutes:02d}:{secs:02d}.{millis // 10:02d}"
+
+
+# ASS equivalents of the preview's CSS style presets
+STYLE_PRESETS = {
+    'clean': {},
+    'bold': {'bold': True, 'shadow': 2, 'scale': 105},
+    'classic': {'bold': True, 'spacing': 1, 'uppercase': True},
+    'comic': {'font': 'Comic Sans MS'},
+    # Pops in from a larger size on each cue
+    'banger': {'bold': True, 'spacing': 1, 'scale': 110,
+               'effect': r'{\fscx130\fscy130\t(0,150,\fscx110\fscy110)}'},
+    # Words change from the dimmed secondary colour as they are spoken
+    'karaoke': {'karaoke': True},
+}
+
+
+@register_writer('ass')
+class ASSWriter(SubtitleWriter):
+    """
+    Advanced SubStation Alpha, carrying the subtitle's font, colours,
+    alignment and style preset. Also the input of burned-in rendering.
+    """
+    extension = 'ass'
+    content_type = 'text/x-ssa'
+
+    # Script height the subtitle's font size is expressed in (the preview's)
+    reference_height = 360
+
+    def __init__(self, play_res=(640, 360)):
+        self.play_res = play_res
+
+    def style_line(self, subtitle, preset):
+        scale = self.play_res[1] / self.reference_height
+        background = ass_color(subtitle.background_color, subtitle.background_opacity)
+        secondary = ass_color(subtitle.font_color, 0.5) if preset.get('karaoke') else '&H000000FF'
+        font = preset.get('font') or FONT_FAMILIES.get(subtitle.font, subtitle.font)
+        bold = -1 if preset.get('bold') else 0
+        size = preset.get('scale', 100)
+        alignment = ASS_ALIGNMENTS.get(subtitle.text_alignment, 2)
+        return (
+            f"Style: Default,{font},{round(subtitle.font_size * scale)},"
+            f"{ass_color(subtitle.font_color)},{secondary},{background},{background},"
+            f"{bold},0,0,0,{size},{size},{preset.get('spacing', 0)},0,3,"
+            f"{round(2 * scale)},{round(preset.get('shadow', 0) * scale)},"
+            f"{alignment},{round(20 * scale)},{round(20 * scale)},{round(20 * scale)},1"
+        )
+
+    def write(self, subtitle, cues):
+        preset = STYLE_PRESETS.get(subtitle.style, {})
+        width, height = self.play_res
+        yield (
+            "[Script Info]\n"
+            "ScriptType: v4.00+\n"
+            f"PlayResX: {width}\n"
+            f"PlayResY: {height}\n"
+            "WrapStyle: 0\n"
+            "ScaledBorderAndShadow: yes\n\n"
+            "[V4+ Styles]\n"
+            "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, "
+            "OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, "
+            "ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, "
+            "Alignment, MarginL, MarginR, MarginV, Encoding\n"
+            f"{self.style_line(subtitle, preset)}\n\n"
+            "[Events]\n"
+            "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, "
+            "Effect, Text\n"
+        )
+        for cue in cues:
+            text = cue['text'].upper() if preset.get('uppercase') else cue['text']
+            if preset.get('karaoke'):
+                text = self.karaoke_text(cue, text)
+            else:
+                text = self.escape_text(text)
+            yield (f"Dialogue: 0,{ass_timestamp(cue['start'])},{ass_timestamp(cue['end'])},"
+                   f"Default,,0,0,0,,{preset.get('effect', '')}{text}\n")
+
+    def escape_text(self, text):
+        # Braces open override blocks and newlines are written as \N
+        return text.replace('{', '(').replace('}', ')').replace("\n", "\\N")
+
+    def karaoke_text(self, cue, text):
+        """
+        Write each word of a cue with a \\k tag lasting until the next word
+        starts, from its stored word timings (estimated when missing).
+        """
+        timings = word_timings(cue)
+        words = text.split()
+        if not words:
+            return ''
+        parts = []
+        # Silence before the first word
+        lead = int(round((timings[0][0] - cue['start']) * 100))
+        if lead > 0:
+            parts.append(f"{{\\k{lead}}}")
+        for index, word in enumerate(words):
+            next_start = timings[index + 1][0] if index + 1 < len(words) else cue['end']
+            length = max(0, int(round((next_start - timings[index][0]) * 100)))
+            parts.append(f"{{\\k{length}}}{self.escape_text(word)} ")
+        return ''.join(parts).rstrip()
+
+
+@register_writer('ttml')
+class TTMLWriter(SubtitleWriter):
+    extension = 'ttml'
+    content_type = 'application/ttml+xml'
+
+    def write(self, subtitle, cues):
+        red, green, blue = hex_to_rgb(subtitle.background_color)
+        background = f"#{red:02x}{green:02x}{blue:02x}{int(round(subtitle.background_opacity * 255)):02x}"
+        yield (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<tt xmlns="http://www.w3.org/ns/ttml" '
+            'xmlns:tts="http://www.w3.org/ns/ttml#styling" '
+            f'xml:lang={quoteattr(subtitle.language)}>\n'
+            '  <head>\n    <styling>\n'
+            '      <style xml:id="default" '
+            f'tts:fontFamily={quoteattr(FONT_FAMILIES.get(subtitle.font, subtitle.font))} '
+            f'tts:fontSize="{subtitle.font_size}px" '
+            f'tts:color={quoteattr(subtitle.font_color)} '
+            f'tts:backgroundColor="{background}" '
+            f'tts:textAlign={quoteattr(subtitle.text_alignment)}/>\n'
+            '    </styling>\n  </head>\n'
+            '  <body style="default">\n    <div>\n'
+        )
+        for cue in cues:
+            text = escape(cue['text']).replace("\n", "<br/>")
+            yield (f'      <p begin="{format_timestamp(cue["start"], ".")}" '
+                   f'end="{format_timestamp(cue["end"], ".")}">{text}</p>\n')
+        yield '    </div>\n  </body>\n</tt>\n'
+
+
+@register_writer('json')
+class JSONWriter(SubtitleWriter):
+    extension = 'json'
+    content_type = 'application/json'
+
+    def write(self, subtitle, cues):
+        header = {
+            'id': subtitle.id,
+            'language': subtitle.language,
+            'style': {
+                'font': subtitle.font,
+                'style': subtitle.style,
+                'font_size': subtitle.font_size,
+                'font_color': subtitle.font_color,
+                'background_color': subtitle.background_color,
+                'background_opacity': subtitle.background_opacity,
+                'text_alignment': subtitle.text_alignment,
+            },
+        }
+        # Stream the cue array one element at a time
+        yield json.dumps(header)[:-1] + ', "cues": ['
+        for index, cue in enumerate(cues):
+            item = {'start': cue['start'], 'end': cue['end'], 'text': cue['text']}
+            if cue.get('words'):
+                item['words'] = cue['words']
+            yield (', ' if index else '') + json.dumps(item)
+        yield ']}'
+
+
+def export_dir(subtitle_id):
+    """Directory holding the rendered exports of a subtitle."""
+    return os.path.join(settings.MEDIA_ROOT, 'exports', str(subtitle_id))
+
+
+def export_revision(subtitle):
+    """Identifies the row state an export is rendered from; changes on every save."""
+    return f"v{EXPORT_VERSION}-{int(subtitle.updated_at.timestamp() * 1000000)}"
+
+
+def export_path(subtitle, writer):
+    return os.path.join(
+        export_dir(subtitle.pk), f"{export_revision(subtitle)}.{writer.extension}")
+
+
+def get_or_render_export(subtitle, writer, load_cues):
+    """
+    Return the path of ``subtitle`` rendered by ``writer``, rendering it on first use.
+
+    ``load_cues`` is only called on a miss. The file is written from the
+    writer's stream and renamed into place, so concurrent requests never
+    serve a partial file.
+    """
+    path = export_path(subtitle, writer)
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as rendered:
+            for chunk in writer.stream(subtitle, load_cues()):
+                rendered.write(chunk)
+        os.replace(temp_path, path)
+    except Exception:
+        os.remove(temp_path)
+        raise
+    return path
+
+
+def clear_exports(subtitle_id, keep_revision=None):
+    """Remove rendered exports of a subtitle, except those of ``keep_revision``."""
+    directory = export_dir(subtitle_id)
+    if keep_revision is None:
+        shutil.rmtree(directory, ignore_errors=True)
+        return
+    try:
+        entries = list(os.scandir(directory))
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        if not entry.name.startswith(keep_revision + '.'):
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
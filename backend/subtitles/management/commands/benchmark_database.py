@@ -0,0 +1,122 @@
+import threading
+import time
+import uuid
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection, connections
+from subtitles.models import Subtitle, SubtitleJob
+from videos.models import Video
+
+CUES = [{'start': float(index), 'end': index + 0.8, 'text': f'Cue number {index}'}
+        for index in range(200)]
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the hot query paths of the configured database under concurrent "
+        "workers: list pages, (user, video) and (video, language) lookups, "
+        "job progress writes and subtitle upserts. Run once per DB_ENGINE to "
+        "compare. The rows it creates belong to a throwaway user that is "
+        "deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--operations', type=int, default=200,
+                            help="Operations per worker.")
+        parser.add_argument('--videos', type=int, default=200)
+        parser.add_argument('--write-ratio', type=float, default=0.3,
+                            help="Share of operations that write, like Celery progress updates.")
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.create_user(
+            username=f'benchmark-{uuid.uuid4().hex[:12]}', password=None)
+        try:
+            videos = self.create_rows(user, options['videos'])
+            timings, errors, elapsed = self.run_workers(user, videos, options)
+        finally:
+            user.delete()
+
+        self.stdout.write(f"{connection.vendor}: {options['workers']} workers, "
+                          f"{options['videos']} videos")
+        for kind, values in timings.items():
+            self.stdout.write(
+                f"  {kind:<8} {len(values):>6} ops  "
+                f"p50 {percentile(values, 0.5) * 1000:7.2f} ms  "
+                f"p95 {percentile(values, 0.95) * 1000:7.2f} ms  "
+                f"max {max(values, default=0) * 1000:7.2f} ms")
+        total = sum(len(values) for values in timings.values())
+        self.stdout.write(f"  {total / elapsed:.0f} ops/s, {errors} failed (e.g. database locked)")
+
+    def create_rows(self, user, count):
+        videos = Video.objects.bulk_create([
+            Video(user=user, title=f'Benchmark {index}', status='ready', duration=60)
+            for index in range(count)])
+        Subtitle.objects.bulk_create([
+            Subtitle(video=video, user=user, transcript='benchmark', subtitles_json=CUES)
+            for video in videos])
+        SubtitleJob.objects.bulk_create([
+            SubtitleJob(video=video, user=user, status='running') for video in videos])
+        return [video.id for video in videos]
+
+    def run_workers(self, user, video_ids, options):
+        timings = {'read': [], 'write': []}
+        errors = [0]
+        lock = threading.Lock()
+        writes_every = round(1 / options['write_ratio']) if options['write_ratio'] > 0 else 0
+
+        def work(worker):
+            local = {'read': [], 'write': []}
+            failed = 0
+            try:
+                for step in range(options['operations']):
+                    video_id = video_ids[(worker * 7919 + step) % len(video_ids)]
+                    write = writes_every and step % writes_every == 0
+                    began = time.perf_counter()
+                    try:
+                        if write:
+                            self.write(user, video_id, step)
+                        else:
+                            self.read(user, video_id, step)
+                    except DatabaseError:
+                        failed += 1
+                        continue
+                    local['write' if write else 'read'].append(time.perf_counter() - began)
+            finally:
+                connections.close_all()
+            with lock:
+                for kind, values in local.items():
+                    timings[kind].extend(values)
+                errors[0] += failed
+
+        threads = [threading.Thread(target=work, args=(worker,))
+                   for worker in range(options['workers'])]
+        began = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return timings, errors[0], time.perf_counter() - began
+
+    def read(self, user, video_id, step):
+        if step % 3 == 0:
+            # Dashboard page, newest first
+            list(Video.objects.filter(user=user).order_by('-created_at')[:50])
+        elif step % 3 == 1:
+            # Editor: the subtitles of one video
+            list(Subtitle.objects.filter(user=user, video_id=video_id)
+                 .only('id', 'language', 'cue_count', 'duration', 'updated_at'))
+        else:
+            Subtitle.objects.filter(video_id=video_id, language='en').only('id').first()
+
+    def write(self, user, video_id, step):
+        if step % 2:
+            # Worker progress report
+            SubtitleJob.objects.filter(video_id=video_id).update(progress=step % 100)
+        else:
+            Subtitle.save_generated(video_id, user, 'en', 'benchmark', CUES)
@@ -0,0 +1,43 @@
+import random
+import time
+import numpy as np
+from django.core.management.base import BaseCommand
+from subtitles.segmentation import segment_words, segmentation_options
+
+VOCABULARY = (
+    "the a to and of it you that we this is was so just like know really "
+    "people going video think right okay. well, actually because about time "
+    "here! there? something everything subtitles transcript"
+).split()
+
+
+def synthetic_words(count, seed=0):
+    """``count`` random words with speech-like durations, gaps and pauses."""
+    generator = np.random.default_rng(seed)
+    tokens = random.Random(seed).choices(VOCABULARY, k=count)
+    durations = generator.uniform(0.12, 0.6, count)
+    gaps = np.where(generator.random(count) < 0.05,
+                    generator.uniform(0.7, 2.0, count), generator.uniform(0.0, 0.08, count))
+    starts = np.concatenate(([0.0], np.cumsum(durations + gaps)[:-1]))
+    return tokens, starts, starts + durations
+
+
+class Command(BaseCommand):
+    help = "Time cue segmentation of a synthetic transcript."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--words', type=int, default=100000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        tokens, starts, ends = synthetic_words(options['words'])
+        limits = segmentation_options()
+        timings = []
+        for _ in range(options['repeat']):
+            began = time.perf_counter()
+            cues = segment_words(tokens, starts, ends, **limits)
+            timings.append(time.perf_counter() - began)
+        self.stdout.write(
+            f"{len(tokens)} words -> {len(cues)} cues: "
+            f"best {min(timings) * 1000:.1f} ms, "
+            f"median {sorted(timings)[len(timings) // 2] * 1000:.1f} ms")
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.7 on 2026-10-18 05:09
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subtitles', '0002_subtitlejob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RenderJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('revision', models.CharField(max_length=64)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='queued', max_length=20)),
+                ('progress', models.PositiveSmallIntegerField(default=0)),
+                ('error_message', models.TextField(blank=True, null=True)),
+                ('task_id', models.CharField(blank=True, max_length=255, null=True)),
+                ('output', models.FileField(blank=True, null=True, upload_to='renders/')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('subtitle', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='render_jobs', to='subtitles.subtitle')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='render_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,126 @@
+# Generated by Django 5.1.7 on 2026-10-18 05:10
+
+import json
+import sys
+from array import array
+from django.db import migrations, models
+
+
+# The packing format as of this migration, frozen so later changes to
+# subtitles.cues do not change what it does: little-endian arrays of
+# doubles (start and end times) and unsigned ints (offsets and word
+# timings), and one UTF-8 buffer of all cue texts
+
+
+def _pack(typecode, values):
+    values = array(typecode, values)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values.tobytes()
+
+
+def _unpack(typecode, data):
+    values = array(typecode)
+    values.frombytes(bytes(data or b''))
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def pack_cues(apps, schema_editor):
+    Subtitle = apps.get_model('subtitles', 'Subtitle')
+    for subtitle in Subtitle.objects.only('pk', 'subtitles_json').iterator():
+        cues = subtitle.subtitles_json or []
+        if not isinstance(cues, list):
+            cues = json.loads(cues)
+        texts = [cue['text'].encode('utf-8') for cue in cues]
+        text_offsets, word_offsets, words = [0], [0], []
+        for cue, text in zip(cues, texts):
+            text_offsets.append(text_offsets[-1] + len(text))
+            words.extend(cue.get('words') or ())
+            word_offsets.append(len(words))
+        Subtitle.objects.filter(pk=subtitle.pk).update(
+            cue_count=len(cues),
+            cue_starts=_pack('d', (cue['start'] for cue in cues)),
+            cue_ends=_pack('d', (cue['end'] for cue in cues)),
+            cue_text_offsets=_pack('I', text_offsets),
+            cue_text=b''.join(texts),
+            cue_word_offsets=_pack('I', word_offsets),
+            cue_words=_pack('I', words))
+
+
+def unpack_cues(apps, schema_editor):
+    Subtitle = apps.get_model('subtitles', 'Subtitle')
+    for subtitle in Subtitle.objects.all().iterator():
+        starts, ends = _unpack('d', subtitle.cue_starts), _unpack('d', subtitle.cue_ends)
+        text_offsets = _unpack('I', subtitle.cue_text_offsets) or array('I', [0])
+        word_offsets = _unpack('I', subtitle.cue_word_offsets) or array('I', [0])
+        text, words = bytes(subtitle.cue_text or b''), _unpack('I', subtitle.cue_words)
+        cues = []
+        for index in range(len(starts)):
+            cue = {
+                'start': starts[index],
+                'end': ends[index],
+                'text': text[text_offsets[index]:text_offsets[index + 1]].decode('utf-8'),
+            }
+            cue_words = list(words[word_offsets[index]:word_offsets[index + 1]])
+            if cue_words:
+                cue['words'] = cue_words
+            cues.append(cue)
+        Subtitle.objects.filter(pk=subtitle.pk).update(subtitles_json=cues)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subtitles', '0003_renderjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subtitle',
+            name='cue_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='subtitle',
+            name='cue_ends',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.AddField(
+            model_name='subtitle',
+            name='cue_starts',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.AddField(
+            model_name='subtitle',
+            name='cue_text',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.AddField(
+            model_name='subtitle',
+            name='cue_text_offsets',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.AddField(
+            model_name='subtitle',
+            name='cue_word_offsets',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.AddField(
+            model_name='subtitle',
+            name='cue_words',
+            field=models.BinaryField(default=b''),
+        ),
+        # A default lets the column be re-added on existing rows when reversing
+        migrations.AlterField(
+            model_name='subtitle',
+            name='subtitles_json',
+            field=models.JSONField(default=list),
+        ),
+        migrations.RunPython(pack_cues, unpack_cues),
+        migrations.RemoveField(
+            model_name='subtitle',
+            name='subtitles_json',
+        ),
+    ]
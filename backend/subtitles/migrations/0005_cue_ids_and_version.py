@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-18 05:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subtitles', '0004_columnar_cues'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subtitle',
+            name='cue_ids',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.AddField(
+            model_name='subtitle',
+            name='cue_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
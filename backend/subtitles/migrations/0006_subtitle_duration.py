@@ -0,0 +1,37 @@
+# Generated by Django 5.1.7 on 2026-10-18 05:09
+
+import sys
+from array import array
+from django.db import migrations, models
+
+
+def _unpack(typecode, data):
+    # Little-endian packed array, as written by 0004_columnar_cues
+    values = array(typecode)
+    values.frombytes(bytes(data or b''))
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def fill_durations(apps, schema_editor):
+    Subtitle = apps.get_model('subtitles', 'Subtitle')
+    for pk, cue_ends in Subtitle.objects.values_list('pk', 'cue_ends').iterator():
+        Subtitle.objects.filter(pk=pk).update(
+            duration=max(_unpack('d', cue_ends), default=0.0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subtitles', '0005_cue_ids_and_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subtitle',
+            name='duration',
+            field=models.FloatField(default=0),
+        ),
+        migrations.RunPython(fill_durations, migrations.RunPython.noop),
+    ]
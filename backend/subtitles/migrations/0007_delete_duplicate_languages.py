@@ -0,0 +1,25 @@
+# Generated by Django 5.1.7 on 2026-10-18 05:09
+
+from django.db import migrations, models
+
+
+def delete_duplicate_languages(apps, schema_editor):
+    """Keep only the latest subtitle of each (video, language) before adding the constraint."""
+    Subtitle = apps.get_model('subtitles', 'Subtitle')
+    duplicates = (Subtitle.objects.values('video', 'language')
+                  .annotate(count=models.Count('pk')).filter(count__gt=1))
+    for pair in list(duplicates):
+        rows = Subtitle.objects.filter(video=pair['video'], language=pair['language'])
+        latest = rows.order_by('-updated_at', '-pk').values_list('pk', flat=True).first()
+        rows.exclude(pk=latest).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subtitles', '0006_subtitle_duration'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_languages, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.7 on 2026-10-18 05:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subtitles', '0007_delete_duplicate_languages'),
+        ('videos', '0004_video_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='renderjob',
+            index=models.Index(fields=['user', '-created_at'], name='renderjob_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='renderjob',
+            index=models.Index(fields=['subtitle', 'revision'], name='renderjob_subtitle_rev_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subtitle',
+            index=models.Index(fields=['user', 'video'], name='subtitle_user_video_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subtitle',
+            index=models.Index(fields=['user', '-created_at'], name='subtitle_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subtitlejob',
+            index=models.Index(fields=['user', '-created_at'], name='subtitlejob_user_created_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='subtitle',
+            constraint=models.UniqueConstraint(fields=('video', 'language'), name='unique_subtitle_video_language'),
+        ),
+    ]
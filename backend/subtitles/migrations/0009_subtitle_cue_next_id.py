@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 05:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subtitles', '0008_indexes_and_unique_language'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subtitle',
+            name='cue_next_id',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -1,5 +1,13 @@
-from django.db import models
+import uuid
+from django.db import models, transaction
+from django.db.models.signals import post_save, pre_delete
+from django.dispatch import receiver
 from django.conf import settings
+from django.utils import timezone
+from subtitle_generator.events import publish_event
+from subtitles.cues import CUE_FIELDS, CueTrack
+from subtitles.export import clear_exports, export_dir, export_revision
+from videos.cleanup import remove_directory, remove_file
 from videos.models import Video
 
 
@@ -34,7 +42,21 @@ class Subtitle(models.Model):
 
     # Subtitle content and timing
     transcript = models.TextField()
-    subtitles_json = models.JSONField()
+    # Cues in columnar form, see subtitles.cues.CueTrack
+    cue_count = models.PositiveIntegerField(default=0)
+    # End of the latest cue in seconds, kept with cue_count for list views
+    duration = models.FloatField(default=0)
+    cue_starts = models.BinaryField(default=b'')
+    cue_ends = models.BinaryField(default=b'')
+    cue_text_offsets = models.BinaryField(default=b'')
+    cue_text = models.BinaryField(default=b'')
+    cue_word_offsets = models.BinaryField(default=b'')
+    cue_words = models.BinaryField(default=b'')
+    cue_ids = models.BinaryField(default=b'')
+    # Id of the next inserted cue; deleted ids are not handed out again
+    cue_next_id = models.PositiveIntegerField(default=0)
+    # Incremented by every cue edit, for optimistic concurrency
+    cue_version = models.PositiveIntegerField(default=0)
 
     # Styling options
     font = models.CharField(
@@ -63,5 +85,219 @@ class Subtitle(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        constraints = [
+            # One subtitle per language of a video; also serves (video, language) lookups
+            models.UniqueConstraint(
+                fields=['video', 'language'], name='unique_subtitle_video_language'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'video'], name='subtitle_user_video_idx'),
+            models.Index(fields=['user', '-created_at'], name='subtitle_user_created_idx'),
+        ]
+
     def __str__(self):
         return f"Subtitles for {self.video.title} - {self.get_language_display()}"
+
+    @classmethod
+    def save_generated(cls, video_id, user, language, transcript, subtitles_json):
+        """
+        Store generated subtitles for a video in ``language``. An existing row
+        is locked and its transcript and cues replaced in place, keeping its
+        styling; ``cue_version`` moves on so open editors reload. Concurrent
+        jobs cannot create a second row, the unique constraint turns that
+        into a lookup of the first.
+        """
+        with transaction.atomic():
+            subtitle, created = cls.objects.select_for_update().get_or_create(
+                video_id=video_id, language=language,
+                defaults={'user': user, 'transcript': transcript,
+                          'subtitles_json': subtitles_json})
+            if not created:
+                subtitle.transcript = transcript
+                subtitle.subtitles_json = subtitles_json
+                subtitle.cue_version += 1
+                subtitle.save()
+        return subtitle
+
+    @property
+    def cue_track(self):
+        return CueTrack.from_fields(*(getattr(self, field) for field in CUE_FIELDS))
+
+    @cue_track.setter
+    def cue_track(self, track):
+        for field, value in track.to_fields().items():
+            setattr(self, field, value)
+        self.cue_count = len(track)
+        self.duration = max(track.ends, default=0.0)
+
+    def load_cue_track(self):
+        """Fetch the packed cue columns in one query, even when they were deferred."""
+        fields = Subtitle.objects.filter(pk=self.pk).values_list(*CUE_FIELDS).get()
+        return CueTrack.from_fields(*fields)
+
+    @property
+    def subtitles_json(self):
+        """The cues as a list of ``{"start", "end", "text"[, "words"]}`` dicts."""
+        return self.cue_track.to_list()
+
+    @subtitles_json.setter
+    def subtitles_json(self, cues):
+        self.cue_track = CueTrack.from_cues(cues)
+
+
+@receiver(post_save, sender=Subtitle)
+def invalidate_exports(sender, instance, **kwargs):
+    """Drop exports rendered from earlier versions of an edited subtitle."""
+    clear_exports(instance.pk, keep_revision=export_revision(instance))
+
+
+@receiver(post_save, sender=Subtitle)
+def delete_stale_renders(sender, instance, created, **kwargs):
+    """Drop finished renders of earlier revisions, with their output files."""
+    if not created:
+        RenderJob.objects.filter(
+            subtitle_id=instance.pk, status__in=['succeeded', 'failed']
+        ).exclude(revision=export_revision(instance)).delete()
+
+
+@receiver(pre_delete, sender=Subtitle)
+def delete_exports(sender, instance, **kwargs):
+    remove_directory(export_dir(instance.pk))
+
+
+class SubtitleJob(models.Model):
+    """Background subtitle generation request, with its progress and result."""
+
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    video = models.ForeignKey(
+        Video, on_delete=models.CASCADE, related_name='subtitle_jobs')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL,
+                             on_delete=models.CASCADE, related_name='subtitle_jobs')
+    language = models.CharField(
+        max_length=5, choices=Subtitle.LANGUAGE_CHOICES, default='en')
+
+    # Progress reporting
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default='queued')
+    stage = models.CharField(max_length=50, blank=True, default='')
+    progress = models.PositiveSmallIntegerField(default=0)
+    error_message = models.TextField(null=True, blank=True)
+    task_id = models.CharField(max_length=255, null=True, blank=True)
+
+    # Result
+    subtitle = models.ForeignKey(
+        Subtitle, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='subtitlejob_user_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"Subtitle job {self.id} for {self.video.title} - {self.status}"
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.publish()
+
+    def set_progress(self, stage, progress):
+        """Record the current stage and percent complete without touching other fields."""
+        self.stage = stage
+        self.progress = progress
+        SubtitleJob.objects.filter(pk=self.pk).update(
+            stage=stage, progress=progress, updated_at=timezone.now())
+        self.publish()
+
+    def publish(self):
+        """Push the job state to the owner's live event stream."""
+        publish_event(
+            self.user_id,
+            'subtitle_job',
+            job_id=str(self.id),
+            video_id=self.video_id,
+            language=self.language,
+            status=self.status,
+            stage=self.stage,
+            progress=self.progress,
+            subtitle_id=self.subtitle_id,
+            error_message=self.error_message
+        )
+
+
+class RenderJob(models.Model):
+    """Background render of a video with its subtitles burned in."""
+
+    STATUS_CHOICES = SubtitleJob.STATUS_CHOICES
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    subtitle = models.ForeignKey(
+        Subtitle, on_delete=models.CASCADE, related_name='render_jobs')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL,
+                             on_delete=models.CASCADE, related_name='render_jobs')
+    # Subtitle revision (content and styling) the render was requested for
+    revision = models.CharField(max_length=64)
+
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default='queued')
+    progress = models.PositiveSmallIntegerField(default=0)
+    error_message = models.TextField(null=True, blank=True)
+    task_id = models.CharField(max_length=255, null=True, blank=True)
+    output = models.FileField(upload_to='renders/', null=True, blank=True)
+
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='renderjob_user_created_idx'),
+            # Reusing a render of the same subtitle revision
+            models.Index(fields=['subtitle', 'revision'], name='renderjob_subtitle_rev_idx'),
+        ]
+
+    def __str__(self):
+        return f"Render job {self.id} for subtitle {self.subtitle_id} - {self.status}"
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.publish()
+
+    def set_progress(self, progress):
+        """Record the percent complete without touching other fields."""
+        self.progress = int(progress)
+        RenderJob.objects.filter(pk=self.pk).update(
+            progress=self.progress, updated_at=timezone.now())
+        self.publish()
+
+    def publish(self):
+        """Push the job state to the owner's live event stream."""
+        publish_event(
+            self.user_id,
+            'render_job',
+            job_id=str(self.id),
+            subtitle_id=self.subtitle_id,
+            status=self.status,
+            progress=self.progress,
+            output=self.output.url if self.output else None,
+            error_message=self.error_message
+        )
+
+
+@receiver(pre_delete, sender=RenderJob)
+def delete_render_output(sender, instance, **kwargs):
+    if instance.output:
+        remove_file(instance.output.path)
@@ -0,0 +1,64 @@
+import os
+import subprocess
+from django.conf import settings
+from moviepy.config import FFMPEG_BINARY
+
+
+def escape_filter_value(value):
+    """Escape a value (such as a path) for use inside an ffmpeg filter graph option."""
+    value = value.replace('\\', '/')
+    for char in ("'", ':', ',', ';', '[', ']'):
+        value = value.replace(char, '\\' + char)
+    return value
+
+
+def subtitles_filter(ass_path):
+    """
+    The ``ass`` filter burning ``ass_path`` into the video.
+
+    libass caches rasterized glyphs and composited bitmaps by font, size and
+    text, and returns nothing for frames without an active event, so only
+    frames with visible text are blended.
+    """
+    options = [f"filename={escape_filter_value(ass_path)}"]
+    if settings.SUBTITLE_FONTS_DIR:
+        options.append(f"fontsdir={escape_filter_value(str(settings.SUBTITLE_FONTS_DIR))}")
+    return "ass=" + ":".join(options)
+
+
+def burn_subtitles(video_path, ass_path, output_path, duration=None, progress=None):
+    """
+    Render ``video_path`` with the ASS subtitles of ``ass_path`` burned in.
+
+    The audio stream is copied. ``progress(percent)`` is called as ffmpeg
+    reports its position when the ``duration`` in seconds is known.
+    """
+    command = [
+        FFMPEG_BINARY, '-nostdin', '-y', '-loglevel', 'error',
+        '-i', video_path,
+        '-vf', subtitles_filter(ass_path),
+        '-c:v', 'libx264', '-preset', settings.SUBTITLE_RENDER_PRESET,
+        '-crf', str(settings.SUBTITLE_RENDER_CRF), '-pix_fmt', 'yuv420p',
+        '-c:a', 'copy', '-movflags', '+faststart',
+        '-progress', 'pipe:1', '-nostats',
+        output_path,
+    ]
+    process = subprocess.Popen(
+        command, stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    try:
+        for line in process.stdout:
+            key, _, value = line.strip().partition('=')
+            if key == 'out_time_us' and progress and duration and value.isdigit():
+                progress(min(100, int(value) / 1000000 / duration * 100))
+        error = process.stderr.read()
+        process.wait()
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+    if process.returncode != 0:
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        raise IOError(f"ffmpeg failed to render {video_path}: {error.strip()}")
+    return output_path
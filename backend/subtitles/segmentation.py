@@ -0,0 +1,176 @@
+from bisect import bisect_right
+import numpy as np
+from django.conf import settings
+from subtitles.timing import align_words, estimate_word_timings
+
+# Break scores for the boundary after a word: pauses dominate, then
+# sentence and clause punctuation
+SENTENCE_END = '.?!…'
+CLAUSE_END = ',;:—'
+SENTENCE_BONUS = 1.0
+CLAUSE_BONUS = 0.3
+
+
+def segmentation_options(**overrides):
+    """The configured segmentation limits, with ``overrides`` applied."""
+    options = {
+        'max_line_chars': settings.SUBTITLE_MAX_LINE_CHARS,
+        'max_lines': settings.SUBTITLE_MAX_LINES,
+        'max_cps': settings.SUBTITLE_MAX_CPS,
+        'min_duration': settings.SUBTITLE_MIN_CUE_SECONDS,
+        'max_duration': settings.SUBTITLE_MAX_CUE_SECONDS,
+        'pause': settings.SUBTITLE_PAUSE_SECONDS,
+    }
+    options.update(overrides)
+    return options
+
+
+def flatten_segments(segments):
+    """
+    Return the words of ``segments`` as a token list and arrays of start and
+    end times. Recognized word timings are aligned to the segment text, and
+    estimated where a segment has none.
+    """
+    tokens, timings = [], []
+    for segment in segments:
+        segment_tokens = segment["text"].split()
+        words = segment.get("words")
+        if words and len(words) == len(segment_tokens) and all(
+                word["word"].strip() == token for word, token in zip(words, segment_tokens)):
+            # Recognizers usually return exactly the words of the text
+            segment_timings = [(word["start"], word["end"]) for word in words]
+        elif words:
+            segment_timings = align_words(
+                segment_tokens, words, segment["start"], segment["end"])
+        else:
+            segment_timings = estimate_word_timings(
+                segment_tokens, segment["start"], segment["end"])
+        tokens.extend(segment_tokens)
+        timings.extend(segment_timings)
+    times = np.array(timings, dtype=np.float64).reshape(-1, 2)
+    return tokens, times[:, 0], times[:, 1]
+
+
+def break_scores(tokens, starts, ends):
+    """How good a cue break after each word is (the last word scores highest)."""
+    scores = np.empty(len(tokens), dtype=np.float64)
+    scores[:-1] = starts[1:] - ends[:-1]
+    scores[-1] = np.inf
+    # Last characters as code points, to test punctuation without a Python loop
+    last_chars = np.frombuffer(
+        ''.join([token[-1] for token in tokens]).encode('utf-32-le'), dtype=np.uint32)
+    scores += SENTENCE_BONUS * np.isin(last_chars, [ord(char) for char in SENTENCE_END])
+    scores += CLAUSE_BONUS * np.isin(last_chars, [ord(char) for char in CLAUSE_END])
+    # Among equal scores prefer the later break, for fuller cues
+    scores += np.arange(len(tokens)) * 1e-9
+    return scores
+
+
+def line_breaks(offsets, firsts, lasts, max_line_chars, max_lines):
+    """
+    Indices of the words that start a new line, splitting each cue
+    ``firsts[i]..lasts[i]`` into as few lines as fit, of similar length.
+    ``offsets`` are the character positions of the words in the joined text.
+    """
+    cue_chars = offsets[lasts + 1] - offsets[firsts] - 1
+    line_counts = np.minimum(-(-cue_chars // max_line_chars), max_lines)
+    line_counts = np.minimum(line_counts, lasts - firsts + 1)
+    breaks = []
+    for line in range(1, max_lines):
+        split = line_counts > line
+        first, last = firsts[split], lasts[split]
+        targets = offsets[first] + (offsets[last + 1] - offsets[first]) * line / line_counts[split]
+        cuts = np.searchsorted(offsets, targets, side='right')
+        # Move back to the previous boundary when it is nearer the target
+        nearer = targets - offsets[cuts - 1] < offsets[np.minimum(cuts, len(offsets) - 1)] - targets
+        cuts = np.clip(np.where(nearer, cuts - 1, cuts), first + 1, last)
+        breaks.append(cuts)
+    return np.concatenate(breaks) if breaks else np.empty(0, dtype=np.int64)
+
+
+def segment_words(tokens, starts, ends, max_line_chars=42, max_lines=2, max_cps=17.0,
+                  min_duration=1.0, max_duration=7.0, pause=0.6):
+    """
+    Split a timed word sequence into subtitle cues.
+
+    - A pause longer than ``pause`` seconds always starts a new cue.
+    - A cue holds at most ``max_lines`` lines of ``max_line_chars`` and lasts
+      at most ``max_duration`` seconds of speech. When a run of words does
+      not fit, it is broken at the best pause or punctuation in the back half
+      of what fits.
+    - Cues are held on screen for at least ``min_duration`` and long enough
+      to read at ``max_cps`` characters per second, without overlapping the
+      next cue.
+    - Text is broken into lines of similar length.
+
+    ``starts`` and ``ends`` are arrays of word times; the per-word work is
+    vectorized and each cue is found by binary search.
+    """
+    count = len(tokens)
+    if not count:
+        return []
+    starts = np.asarray(starts, dtype=np.float64)
+    ends = np.maximum(np.asarray(ends, dtype=np.float64), starts)
+
+    lengths = np.fromiter(map(len, tokens), dtype=np.int64, count=count)
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(lengths + 1, out=offsets[1:])
+    scores = break_scores(tokens, starts, ends)
+    hard_breaks = np.flatnonzero(starts[1:] - ends[:-1] > pause) + 1
+
+    # Python lists bisect faster than numpy scalars in the per-cue loop
+    offset_list = offsets.tolist()
+    reach_list = np.maximum.accumulate(ends).tolist()
+    start_list = starts.tolist()
+    max_chars = max_line_chars * max_lines
+
+    firsts = []
+    run_start = 0
+    for run_end in [*hard_breaks.tolist(), count]:
+        first = run_start
+        while first < run_end:
+            fits_chars = bisect_right(offset_list, offset_list[first] + max_chars + 1) - 1
+            fits_time = bisect_right(reach_list, start_list[first] + max_duration)
+            stop = max(first + 1, min(fits_chars, fits_time, run_end))
+            if stop < run_end:
+                low = first + (stop - first + 1) // 2
+                stop = low + int(np.argmax(scores[low - 1:stop]))
+            firsts.append(first)
+            first = stop
+        run_start = run_end
+
+    firsts = np.array(firsts, dtype=np.int64)
+    lasts = np.append(firsts[1:], count) - 1
+    cue_starts = starts[firsts]
+    cue_ends = ends[lasts]
+    cue_chars = offsets[lasts + 1] - offsets[firsts] - 1
+
+    # Hold cues long enough to read, up to the next cue
+    next_starts = np.append(cue_starts[1:], np.inf)
+    wanted = cue_starts + np.maximum(min_duration, cue_chars / max_cps)
+    cue_ends = np.maximum(cue_ends, np.minimum.reduce(
+        [wanted, next_starts, cue_starts + max_duration]))
+
+    # Word times in milliseconds from the start of their cue, interleaved
+    word_cue_starts = np.repeat(cue_starts, lasts - firsts + 1)
+    relative = np.empty((count, 2), dtype=np.float64)
+    relative[:, 0] = starts - word_cue_starts
+    relative[:, 1] = ends - word_cue_starts
+    packed = np.maximum(0, np.rint(relative * 1000)).astype(np.int64).ravel().tolist()
+
+    # Join all words once, turn the spaces before line breaks into newlines
+    # and slice out each cue's text
+    text = np.frombuffer(' '.join(tokens).encode('utf-32-le'), dtype=np.uint32).copy()
+    text[offsets[line_breaks(offsets, firsts, lasts, max_line_chars, max_lines)] - 1] = ord('\n')
+    text = text.tobytes().decode('utf-32-le')
+
+    return [
+        {
+            "start": start,
+            "end": end,
+            "text": text[offset_list[first]:offset_list[last + 1] - 1],
+            "words": packed[2 * first:2 * last + 2],
+        }
+        for first, last, start, end in zip(
+            firsts.tolist(), lasts.tolist(), cue_starts.tolist(), cue_ends.tolist())
+    ]
@@ -0,0 +1,192 @@
+import os
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+from subtitles.export import ASSWriter
+from subtitles.models import RenderJob, Subtitle, SubtitleJob
+from subtitles.render import burn_subtitles
+from subtitles.utils import (
+    generate_subtitles_for_video,
+    get_or_create_transcripts,
+    group_segments_into_subtitles,
+)
+from videos.artifacts import artifact_dir
+from videos.media import MediaProbe
+import logging
+
+file_name = "tasks.log"
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+formatter = logging.Formatter(
+    '%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+file_handler = logging.FileHandler(file_name)
+file_handler.setFormatter(formatter)
+logger.addHandler(file_handler)
+
+
+@shared_task
+def generate_subtitles_task(job_id):
+    logger.info(f"Starting generate_subtitles_task for job_id={job_id}")
+    job = SubtitleJob.objects.select_related('video__blob').filter(id=job_id).first()
+
+    if not job:
+        logger.error(f"No subtitle job found with ID {job_id}")
+        return
+
+    video = job.video
+    job.status = 'running'
+    job.stage = 'starting'
+    job.progress = 0
+    job.save()
+
+    try:
+        # The duration stored at upload; the video is probed only without it
+        transcript, subtitles_json, _ = generate_subtitles_for_video(
+            video.file.path, job.language, progress=job.set_progress,
+            content_hash=video.blob.sha256 if video.blob_id else None,
+            duration=video.duration)
+
+        job.set_progress('saving', 95)
+        subtitle = save_generated_subtitle(job, transcript, subtitles_json)
+        logger.info(f"Subtitle job {job_id} finished with subtitle {subtitle.id}")
+        return subtitle.id
+    except Exception as e:
+        logger.error(f"Error in subtitle job {job_id}: {str(e)}")
+        fail_subtitle_job(job, e)
+        raise
+
+
+def save_generated_subtitle(job, transcript, subtitles_json):
+    """Replace the job's video subtitles in its language and mark the job done."""
+    subtitle = Subtitle.save_generated(
+        job.video_id, job.user, job.language, transcript, subtitles_json)
+
+    job.subtitle = subtitle
+    job.status = 'succeeded'
+    job.stage = 'done'
+    job.progress = 100
+    job.finished_at = timezone.now()
+    job.save()
+    return subtitle
+
+
+def fail_subtitle_job(job, error):
+    job.status = 'failed'
+    job.error_message = str(error)
+    job.finished_at = timezone.now()
+    job.save()
+
+
+@shared_task
+def generate_subtitles_batch_task(job_ids):
+    """
+    Run the subtitle jobs of one video, one per language, decoding its
+    audio once. Each job is saved or failed as its language finishes.
+    """
+    logger.info(f"Starting generate_subtitles_batch_task for job_ids={job_ids}")
+    jobs = {
+        job.language: job
+        for job in SubtitleJob.objects.select_related('video__blob').filter(id__in=job_ids)
+    }
+    if not jobs:
+        logger.error(f"No subtitle jobs found with IDs {job_ids}")
+        return
+
+    video = next(iter(jobs.values())).video
+    for job in jobs.values():
+        job.status = 'running'
+        job.stage = 'transcribing'
+        job.progress = 10
+        job.save()
+
+    def on_done(language, result):
+        job = jobs[language]
+        if isinstance(result, Exception):
+            fail_subtitle_job(job, result)
+            return
+        try:
+            transcript, segments = result
+            save_generated_subtitle(
+                job, transcript, group_segments_into_subtitles(segments))
+        except Exception as e:
+            logger.error(f"Error saving subtitle job {job.id}: {str(e)}")
+            fail_subtitle_job(job, e)
+
+    try:
+        duration = video.duration
+        if duration is None:
+            with MediaProbe(video.file.path) as probe:
+                duration = probe.duration
+        get_or_create_transcripts(
+            video.file.path, duration, list(jobs),
+            content_hash=video.blob.sha256 if video.blob_id else None,
+            on_done=on_done)
+    except Exception as e:
+        logger.error(f"Error in subtitle batch for video {video.id}: {str(e)}")
+        for job in jobs.values():
+            if job.status == 'running':
+                fail_subtitle_job(job, e)
+
+    return {language: job.subtitle_id for language, job in jobs.items()}
+
+
+@shared_task
+def render_subtitled_video_task(job_id):
+    """Burn a subtitle's cues, in its style preset, into its video."""
+    logger.info(f"Starting render_subtitled_video_task for job_id={job_id}")
+    job = RenderJob.objects.select_related('subtitle__video').filter(id=job_id).first()
+
+    if not job:
+        logger.error(f"No render job found with ID {job_id}")
+        return
+
+    subtitle = job.subtitle
+    video = subtitle.video
+    job.status = 'running'
+    job.progress = 0
+    job.save()
+
+    work_dir = artifact_dir(video.id)
+    ass_path = os.path.join(work_dir, f'render_{job.id}.ass')
+    output_name = os.path.join('renders', f'{job.id}.mp4')
+    output_path = os.path.join(settings.MEDIA_ROOT, output_name)
+    try:
+        with MediaProbe(video.file.path) as probe:
+            width, height = probe.width, probe.height
+            duration = probe.duration
+
+        # Lay the script out at the video's own resolution
+        os.makedirs(work_dir, exist_ok=True)
+        writer = ASSWriter(play_res=(width, height))
+        with open(ass_path, 'w', encoding='utf-8') as script:
+            for chunk in writer.stream(subtitle, subtitle.cue_track):
+                script.write(chunk)
+
+        reported = [0]
+
+        def report(percent):
+            # Publish whole-percent changes only
+            if int(percent) > reported[0]:
+                reported[0] = int(percent)
+                job.set_progress(percent)
+
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        burn_subtitles(video.file.path, ass_path, output_path, duration, report)
+
+        job.output = output_name
+        job.status = 'succeeded'
+        job.progress = 100
+        job.finished_at = timezone.now()
+        job.save()
+        logger.info(f"Render job {job_id} finished: {output_path}")
+        return output_name
+    except Exception as e:
+        logger.error(f"Error in render job {job_id}: {str(e)}")
+        job.status = 'failed'
+        job.error_message = str(e)
+        job.finished_at = timezone.now()
+        job.save()
+        raise
+    finally:
+        if os.path.exists(ass_path):
+            os.remove(ass_path)
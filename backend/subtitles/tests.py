@@ -1,3 +1,1015 @@
-from django.test import TestCase
+import json
+import os
+import subprocess
+import tempfile
+import threading
+import time
+import numpy as np
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files import File
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from moviepy.config import FFMPEG_BINARY
+from subtitles.chunking import (
+    AudioChunk,
+    merge_chunk_segments,
+    parse_silences,
+    plan_chunks,
+    transcribe_in_chunks,
+)
+from subtitles.cache import FileSystemStore, audio_fingerprint
+from subtitles.cues import CUE_FIELDS, CueTrack, clear_track_cache
+from subtitles.editing import CueEditError, apply_cue_operations
+from subtitles.export import (
+    ASSWriter, SRTWriter, ass_color, export_dir, export_revision, format_timestamp
+)
+from subtitles.management.commands.benchmark_segmentation import synthetic_words
+from subtitles.models import RenderJob, Subtitle, SubtitleJob
+from subtitles.segmentation import segment_words
+from subtitles.tasks import (
+    generate_subtitles_batch_task,
+    generate_subtitles_task,
+    render_subtitled_video_task,
+)
+from subtitles.transcription import StubBackend, get_backend
+from subtitles.timing import active_word_index, assign_words_to_segments, word_timings
+from subtitles.utils import (
+    extract_audio_from_video,
+    generate_subtitles_for_video,
+    get_or_create_transcripts,
+    group_segments_into_subtitles,
+)
+from videos.media import MediaProbe
+from videos.models import Video, VideoBlob
+
+
+def make_script(duration, word_length=0.4, words_per_sentence=10, pause=1.0):
+    """Build a synthetic list of sentences, each a list of (start, end, word)."""
+    sentences = []
+    t = 0.0
+    index = 0
+    while t + word_length * words_per_sentence <= duration:
+        sentence = []
+        for _ in range(words_per_sentence):
+            sentence.append((t, t + word_length, f"word{index}"))
+            index += 1
+            t += word_length
+        sentences.append(sentence)
+        t += pause
+    return sentences
+
+
+class FakeTranscriptionBackend:
+    """
+    Local stand-in for the transcription API that reads from a script.
+    Returns one segment per sentence, holding only the words fully inside the
+    requested window, with times relative to the window start.
+    """
+
+    def __init__(self, sentences):
+        self.sentences = sentences
+        self.threads = set()
+
+    def __call__(self, chunk):
+        self.threads.add(threading.get_ident())
+        time.sleep(0.01)
+        segments = []
+        for sentence in self.sentences:
+            heard = [word for word in sentence
+                     if word[0] >= chunk.start and word[1] <= chunk.end]
+            if heard:
+                segments.append({
+                    "start": heard[0][0] - chunk.start,
+                    "end": heard[-1][1] - chunk.start,
+                    "text": " " + " ".join(word[2] for word in heard),
+                })
+        return " ".join(segment["text"] for segment in segments), segments
+
+
+class ChunkingTests(SimpleTestCase):
+
+    def test_parse_silences(self):
+        output = (
+            "[silencedetect @ 0x1] silence_start: -0.01\n"
+            "[silencedetect @ 0x1] silence_end: 1.5 | silence_duration: 1.51\n"
+            "size=N/A time=00:00:10.00\n"
+            "[silencedetect @ 0x1] silence_start: 598.2\n"
+            "[silencedetect @ 0x1] silence_end: 599.0 | silence_duration: 0.8\n"
+        )
+        self.assertEqual(parse_silences(output), [(0.0, 1.5), (598.2, 599.0)])
+
+    def test_short_audio_is_single_chunk(self):
+        chunks = plan_chunks(120, [], chunk_length=600)
+        self.assertEqual(chunks, [AudioChunk(0, 0.0, 120, 0.0, 120)])
+
+    def test_cuts_prefer_nearby_silence(self):
+        chunks = plan_chunks(
+            1500, [(590.0, 592.0), (1195.0, 1196.0)], chunk_length=600, overlap=2)
+        self.assertEqual([chunk.keep_start for chunk in chunks], [0.0, 591.0, 1195.5])
+        self.assertEqual(chunks[1].start, 589.0)
+        self.assertEqual(chunks[1].end, 1197.5)
+        self.assertEqual(chunks[-1].keep_end, 1500)
+
+    def test_cuts_fall_back_without_silence(self):
+        chunks = plan_chunks(1300, [], chunk_length=600, overlap=2)
+        self.assertEqual([chunk.keep_start for chunk in chunks], [0.0, 600.0, 1200.0])
+
+    def test_parallel_transcription_is_stitched_without_duplicates(self):
+        sentences = make_script(300)
+        backend = FakeTranscriptionBackend(sentences)
+        # No silences: cuts land mid-sentence so the overlaps carry repeated words
+        chunks = plan_chunks(300, [], chunk_length=47, overlap=5)
+
+        transcript, segments = transcribe_in_chunks(chunks, backend, max_workers=4)
+
+        expected = [word[2] for sentence in sentences for word in sentence]
+        self.assertEqual(transcript.split(), expected)
+        starts = [segment["start"] for segment in segments]
+        self.assertEqual(starts, sorted(starts))
+        self.assertEqual(segments[-1]["end"], round(sentences[-1][-1][1], 3))
+        self.assertGreater(len(backend.threads), 1)
+
+    def test_seam_duplicates_are_dropped(self):
+        chunks = [AudioChunk(0, 0.0, 12.0, 0.0, 10.0),
+                  AudioChunk(1, 8.0, 20.0, 10.0, 20.0)]
+        results = [
+            [{"start": 8.0, "end": 10.5, "text": " see you there"}],
+            [{"start": 1.8, "end": 2.4, "text": " there."},
+             {"start": 3.0, "end": 5.0, "text": " Bye now"}],
+        ]
+        merged = merge_chunk_segments(chunks, results)
+        self.assertEqual([segment["text"] for segment in merged],
+                         [" see you there", " Bye now"])
+        self.assertEqual(merged[1]["start"], 11.0)
+
+
+def make_test_video(path, duration=3):
+    """Render a short test-pattern video with a sine-wave soundtrack."""
+    subprocess.run([
+        FFMPEG_BINARY, '-y', '-loglevel', 'error',
+        '-f', 'lavfi', '-i', f'testsrc=size=160x120:rate=10:duration={duration}',
+        '-f', 'lavfi', '-i', f'sine=frequency=440:duration={duration}',
+        '-shortest', '-c:v', 'libx264', '-c:a', 'aac', path,
+    ], check=True)
+
+
+@override_settings(SUBTITLE_TRANSCRIPTION_BACKEND='stub', SUBTITLE_TRANSCRIPT_CACHE='')
+class TranscriptionBackendTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tempdir = tempfile.TemporaryDirectory()
+        cls.video_path = os.path.join(cls.tempdir.name, 'sample.mp4')
+        make_test_video(cls.video_path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tempdir.cleanup()
+        super().tearDownClass()
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ImproperlyConfigured):
+            get_backend('does-not-exist')
+
+    def test_pipeline_runs_offline(self):
+        for stream_audio in (True, False):
+            with self.subTest(stream_audio=stream_audio), \
+                    self.settings(SUBTITLE_STREAM_AUDIO=stream_audio):
+                transcript, subtitles, duration = generate_subtitles_for_video(
+                    self.video_path)
+                self.assertEqual(transcript, get_backend().text)
+                self.assertEqual(subtitles, [
+                    # Held on screen for the reading time of its 29 characters
+                    {"start": 0.0, "end": 29 / 17, "text": get_backend().text,
+                     "words": [0, 200, 200, 400, 400, 600, 600, 800, 800, 1000]}])
+                self.assertAlmostEqual(duration, 3, places=0)
+
+
+class FileSystemStoreTests(SimpleTestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+
+    def test_round_trip(self):
+        store = FileSystemStore(self.tempdir.name, max_bytes=1024 * 1024)
+        self.assertIsNone(store.get('transcript:missing'))
+        store.set('transcript:a', {'segments': [{'start': 0, 'end': 1, 'text': 'hi'}]})
+        self.assertEqual(store.get('transcript:a')['segments'][0]['text'], 'hi')
+
+    def test_least_recently_used_entries_are_evicted(self):
+        store = FileSystemStore(self.tempdir.name, max_bytes=250)
+        payload = 'x' * 100
+        store.set('a', payload)
+        store.set('b', payload)
+        # Make 'a' the most recently used entry
+        os.utime(store._path('b'), (1, 1))
+        store.get('a')
+        store.set('c', payload)
+
+        self.assertEqual(store.get('a'), payload)
+        self.assertIsNone(store.get('b'))
+        self.assertEqual(store.get('c'), payload)
+
+
+@override_settings(SUBTITLE_TRANSCRIPTION_BACKEND='stub', SUBTITLE_TRANSCRIPT_CACHE='filesystem')
+class TranscriptCacheTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tempdir = tempfile.TemporaryDirectory()
+        cls.video_path = os.path.join(cls.tempdir.name, 'sample.mp4')
+        make_test_video(cls.video_path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tempdir.cleanup()
+        super().tearDownClass()
+
+    def test_fingerprint_ignores_video_stream_and_metadata(self):
+        reencoded_path = os.path.join(self.tempdir.name, 'reencoded.mp4')
+        subprocess.run([
+            FFMPEG_BINARY, '-y', '-loglevel', 'error', '-i', self.video_path,
+            '-c:v', 'mpeg4', '-c:a', 'copy', '-metadata', 'title=copy', reencoded_path,
+        ], check=True)
+        self.assertEqual(audio_fingerprint(self.video_path),
+                         audio_fingerprint(reencoded_path))
+
+    def test_repeat_transcription_hits_cache(self):
+        with tempfile.TemporaryDirectory() as cache_dir, \
+                self.settings(SUBTITLE_TRANSCRIPT_CACHE_DIR=cache_dir), \
+                mock.patch.object(StubBackend, 'transcribe', autospec=True,
+                                  side_effect=StubBackend.transcribe) as transcribe:
+            first = generate_subtitles_for_video(self.video_path)
+            second = generate_subtitles_for_video(self.video_path)
+            generate_subtitles_for_video(self.video_path, language='hi')
+
+        self.assertEqual(first, second)
+        self.assertEqual(transcribe.call_count, 2)
+
+
+    def test_batch_cache_miss_decodes_audio_once(self):
+        with tempfile.TemporaryDirectory() as cache_dir, \
+                self.settings(SUBTITLE_TRANSCRIPT_CACHE_DIR=cache_dir), \
+                mock.patch('subtitles.cache.audio_fingerprint',
+                           wraps=audio_fingerprint) as fingerprint, \
+                mock.patch.object(MediaProbe, 'write_audio') as write_audio:
+            first = get_or_create_transcripts(self.video_path, 3, ['en', 'hi'])
+            second = get_or_create_transcripts(self.video_path, 3, ['en', 'hi'])
+
+        self.assertEqual(fingerprint.call_count, 1)
+        write_audio.assert_not_called()
+        self.assertEqual(first['en'][0], StubBackend.text)
+        self.assertEqual(first, second)
+
+class WordTimingTests(SimpleTestCase):
+
+    def test_recognized_words_are_aligned_to_cue_text(self):
+        segments = [
+            {"start": 0.5, "end": 1.5, "text": "Hello, world!",
+             "words": [{"start": 0.6, "end": 0.9, "word": "Hello"},
+                       {"start": 1.0, "end": 1.4, "word": "world"}]},
+            {"start": 1.5, "end": 2.5, "text": "It's a well-known fact.",
+             "words": [{"start": 1.5, "end": 1.7, "word": "It's"},
+                       {"start": 2.1, "end": 2.4, "word": "fact"}]},
+        ]
+        cue, = group_segments_into_subtitles(segments)
+        self.assertEqual(cue["text"], "Hello, world! It's a well-known fact.")
+        self.assertEqual(cue["start"], 0.6)
+        # Unmatched words are spread over the gap between their neighbours
+        self.assertEqual(cue["words"], [0, 300, 400, 800, 900, 1100,
+                                        1100, 1136, 1136, 1500, 1500, 1800])
+
+    def test_active_word_lookup(self):
+        cue = {"start": 10.0, "end": 12.0, "text": "one two three",
+               "words": [100, 500, 600, 900, 1200, 1800]}
+        timings = word_timings(cue)
+        self.assertEqual(timings[1], (10.6, 10.9))
+        self.assertEqual(active_word_index(timings, 10.05), -1)
+        self.assertEqual(active_word_index(timings, 10.95), 1)
+        self.assertEqual(active_word_index(timings, 11.2), 2)
+
+    def test_openai_words_are_assigned_by_midpoint(self):
+        segments = [{"start": 0.0, "end": 1.0, "text": "a b"},
+                    {"start": 1.0, "end": 2.0, "text": "c"}]
+        assign_words_to_segments(segments, [
+            {"start": 0.1, "end": 0.3, "word": "a"},
+            {"start": 0.8, "end": 1.1, "word": "b"},
+            {"start": 1.2, "end": 1.5, "word": "c"},
+        ])
+        self.assertEqual([len(segment["words"]) for segment in segments], [2, 1])
+
+
+class SegmentationTests(SimpleTestCase):
+
+    def test_cues_break_at_pauses_and_punctuation(self):
+        tokens = ("Welcome back everyone. Today we look at subtitles and how "
+                  "they are timed on screen. Then questions").split()
+        starts = np.arange(len(tokens)) * 0.3
+        starts[-2:] += 2.0
+        cues = segment_words(tokens, starts, starts + 0.25, max_line_chars=24)
+
+        self.assertEqual([cue["text"] for cue in cues], [
+            "Welcome back everyone.\nToday we look at",
+            "subtitles and how they\nare timed on screen.",
+            "Then questions",
+        ])
+        # A cue starting at zero keeps its start
+        self.assertEqual(cues[0]["start"], 0.0)
+        self.assertEqual(cues[0]["words"][:4], [0, 250, 300, 550])
+        # Short cues are held for the reading time but never overlap the next
+        self.assertEqual(cues[0]["end"], cues[1]["start"])
+        self.assertAlmostEqual(cues[2]["end"], cues[2]["start"] + 1.0)
+
+    def test_large_transcripts_respect_limits(self):
+        tokens, starts, ends = synthetic_words(100000)
+        cues = segment_words(tokens, starts, ends)
+
+        self.assertEqual(sum(len(cue["text"].split()) for cue in cues), len(tokens))
+        for previous, cue in zip(cues, cues[1:]):
+            self.assertLessEqual(previous["end"], cue["start"])
+        for cue in cues:
+            self.assertLessEqual(len(cue["text"]), 2 * 42 + 1)
+            self.assertLessEqual(cue["text"].count("\n"), 1)
+            self.assertLessEqual(cue["words"][-1] / 1000, 7.0)
+
+
+class CueTrackTests(SimpleTestCase):
+
+    cues = [
+        {"start": 0.0, "end": 1.5, "text": "Héllo wörld", "words": [0, 600, 700, 1500]},
+        {"start": 1.0, "end": 6.0, "text": "long cue"},
+        {"start": 2.0, "end": 3.0, "text": "日本語"},
+        {"start": 7.0, "end": 8.0, "text": ""},
+    ]
+
+    def test_round_trip_through_packed_fields(self):
+        track = CueTrack.from_cues(self.cues)
+        fields = track.to_fields()
+        self.assertEqual(set(fields), set(CUE_FIELDS))
+        loaded = CueTrack.from_fields(*(
+            memoryview(value) if isinstance(value, bytes) else value
+            for value in (fields[name] for name in CUE_FIELDS)))
+        self.assertEqual(loaded.to_list(), self.cues)
+        self.assertEqual(CueTrack.from_fields(*[b''] * len(CUE_FIELDS)).to_list(), [])
+
+    def test_overlapping_includes_long_earlier_cues(self):
+        track = CueTrack.from_cues(self.cues)
+        self.assertEqual(track.overlapping(2.5, 4.0), [1, 2])
+        self.assertEqual(track.overlapping(6.0, 7.0), [])
+        self.assertEqual(track.overlapping(0.0, 100.0), [0, 1, 2, 3])
+
+    def test_update_cue_splices_buffers(self):
+        track = CueTrack.from_cues(self.cues)
+        track.update_cue(0, end=0.9, text="Hi", words=[])
+        track.update_cue(1, text="a much longer cue", words=[0, 100, 100, 200, 200, 300, 300, 400])
+        self.assertEqual(track.cue(0), {"start": 0.0, "end": 0.9, "text": "Hi"})
+        self.assertEqual(track.words_of(1), [0, 100, 100, 200, 200, 300, 300, 400])
+        self.assertEqual(track.text_of(2), "日本語")
+        self.assertEqual(track.overlapping(0.95, 1.0), [])
+
+
+class CueEditTests(SimpleTestCase):
+
+    def setUp(self):
+        self.track = CueTrack.from_cues([
+            {"start": 0.0, "end": 2.0, "text": "one two three four", "words": [0, 400, 500, 900, 1000, 1400, 1500, 2000]},
+            {"start": 3.0, "end": 4.0, "text": "five"},
+        ])
+
+    def test_split_and_merge_keep_word_timings(self):
+        changed, deleted = apply_cue_operations(self.track, [{"op": "split", "id": 0, "word": 2}])
+        self.assertEqual((changed, deleted), ({0, 2}, set()))
+        self.assertEqual(self.track.to_list()[:2], [
+            {"start": 0.0, "end": 1.0, "text": "one two", "words": [0, 400, 500, 900]},
+            {"start": 1.0, "end": 2.0, "text": "three four", "words": [0, 400, 500, 1000]},
+        ])
+        self.assertEqual(list(self.track.ids), [0, 2, 1])
+
+        changed, deleted = apply_cue_operations(self.track, [{"op": "merge", "id": 2}])
+        self.assertEqual((changed, deleted), ({2}, {1}))
+        merged = self.track.cue(1)
+        self.assertEqual((merged["text"], merged["end"]), ("three four five", 4.0))
+        self.assertEqual(merged["words"], [0, 400, 500, 1000, 2000, 3000])
+
+    def test_moved_cues_stay_sorted(self):
+        apply_cue_operations(self.track, [
+            {"op": "update", "id": 0, "start": 5.0, "end": 6.0},
+            {"op": "insert", "start": 0.5, "end": 1.0, "text": "zero"},
+        ])
+        self.assertEqual(list(self.track.ids), [2, 1, 0])
+        self.assertEqual(self.track.words_of(2), [0, 400, 500, 900, 1000, 1400, 1500, 2000])
+        self.assertEqual(self.track.overlapping(5.5, 5.6), [2])
+
+        for operation in ({"op": "update", "id": 0, "end": 1.0},
+                          {"op": "delete", "id": 9},
+                          {"op": "split", "id": 1, "word": 1},
+                          {"op": "merge", "id": 0},
+                          {"op": "insert", "start": 1, "end": 2, "text": "a b", "words": [0]}):
+            with self.assertRaises(CueEditError):
+                apply_cue_operations(self.track, [operation])
+
+    def test_ids_of_deleted_cues_are_not_reused(self):
+        changed, deleted = apply_cue_operations(self.track, [
+            {"op": "delete", "id": 1},
+            {"op": "insert", "start": 5.0, "end": 6.0, "text": "six"},
+        ])
+        self.assertEqual((changed, deleted), ({2}, {1}))
+        self.assertEqual(self.track.to_fields()['cue_next_id'], 3)
+
+
+@override_settings(SUBTITLE_TRANSCRIPTION_BACKEND='stub', SUBTITLE_TRANSCRIPT_CACHE='',
+                   EVENTS_REDIS_URL='')
+class SubtitleJobTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tempdir = tempfile.TemporaryDirectory()
+        cls.media_settings = override_settings(MEDIA_ROOT=cls.tempdir.name)
+        cls.media_settings.enable()
+        cls.video_path = os.path.join(cls.tempdir.name, 'source.mp4')
+        make_test_video(cls.video_path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.media_settings.disable()
+        cls.tempdir.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='alice', email='alice@example.com', password='secret')
+        with open(self.video_path, 'rb') as source:
+            self.video = Video.objects.create(
+                user=self.user, title='Sample', status='ready',
+                file=File(source, name='sample.mp4'))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_generate_returns_job_without_blocking(self):
+        self.video.duration = 60
+        self.video.save()
+        with mock.patch.object(generate_subtitles_task, 'apply_async') as apply_async:
+            apply_async.return_value.id = 'task-1'
+            response = self.client.post(
+                '/api/subtitles/generate/', {'video_id': self.video.id, 'language': 'en'})
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job = SubtitleJob.objects.get(id=response.data['id'])
+        args, options = apply_async.call_args
+        self.assertEqual(args, ((str(job.id),),))
+        self.assertEqual(options['queue'], 'priority')
+        self.assertEqual(job.task_id, 'task-1')
+        self.assertEqual(response.data['status'], 'queued')
+        self.assertFalse(Subtitle.objects.exists())
+
+    def test_job_reports_result(self):
+        old = Subtitle.objects.create(
+            video=self.video, user=self.user, transcript='old',
+            subtitles_json=[], language='en', style='karaoke')
+        job = SubtitleJob.objects.create(video=self.video, user=self.user)
+
+        subtitle_id = generate_subtitles_task(str(job.id))
+
+        response = self.client.get(f'/api/subtitle-jobs/{job.id}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'succeeded')
+        self.assertEqual(response.data['progress'], 100)
+        self.assertEqual(response.data['subtitle_id'], subtitle_id)
+        # Regenerating replaces the cues in place and keeps the styling
+        subtitle = Subtitle.objects.get()
+        self.assertEqual(subtitle.id, old.id)
+        self.assertNotEqual(subtitle.transcript, 'old')
+        self.assertEqual(subtitle.style, 'karaoke')
+        self.assertEqual(subtitle.cue_version, 1)
+
+    def test_jobs_use_the_stored_duration(self):
+        self.video.duration = 3
+        self.video.save()
+        job = SubtitleJob.objects.create(video=self.video, user=self.user)
+        batch_job = SubtitleJob.objects.create(video=self.video, user=self.user, language='hi')
+
+        with mock.patch('subtitles.utils.MediaProbe', wraps=MediaProbe) as utils_probe, \
+                mock.patch('subtitles.tasks.MediaProbe', wraps=MediaProbe) as tasks_probe:
+            generate_subtitles_task(str(job.id))
+            utils_probe.assert_not_called()
+            generate_subtitles_batch_task([str(batch_job.id)])
+
+        tasks_probe.assert_not_called()
+        self.assertEqual(SubtitleJob.objects.get(pk=job.pk).status, 'succeeded')
+        self.assertEqual(SubtitleJob.objects.get(pk=batch_job.pk).status, 'succeeded')
+
+    def test_job_reports_errors(self):
+        job = SubtitleJob.objects.create(video=self.video, user=self.user)
+        with mock.patch('subtitles.tasks.generate_subtitles_for_video',
+                        side_effect=IOError('decode failed')):
+            with self.assertRaises(IOError):
+                generate_subtitles_task(str(job.id))
+
+        response = self.client.get(f'/api/subtitle-jobs/{job.id}/')
+        self.assertEqual(response.data['status'], 'failed')
+        self.assertEqual(response.data['error_message'], 'decode failed')
+
+    def test_generate_batch_queues_one_task_per_video(self):
+        other = Video.objects.create(
+            user=self.user, title='Processing', status='processing', file='videos/other.mp4')
+        items = [{'video_id': self.video.id, 'language': 'en'},
+                 {'video_id': self.video.id, 'language': 'hi'},
+                 {'video_id': self.video.id, 'language': 'en'},
+                 {'video_id': other.id, 'language': 'en'}]
+        with mock.patch.object(generate_subtitles_batch_task, 'apply_async') as apply_async, \
+                self.assertNumQueries(3):
+            apply_async.return_value.id = 'task-1'
+            response = self.client.post(
+                '/api/subtitles/generate_batch/', {'items': items}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual([job['language'] for job in response.data['jobs']], ['en', 'hi'])
+        self.assertEqual(response.data['skipped'][0]['video_id'], other.id)
+        # One query resolves the videos, one inserts the jobs and one records the task
+        self.assertEqual(apply_async.call_count, 1)
+        ((job_ids,),), options = apply_async.call_args
+        self.assertEqual(set(job_ids), {job['id'] for job in response.data['jobs']})
+        self.assertEqual(set(SubtitleJob.objects.values_list('task_id', flat=True)), {'task-1'})
+
+        stranger = get_user_model().objects.create_user(
+            username='bob', email='bob@example.com', password='secret')
+        self.client.force_authenticate(stranger)
+        response = self.client.post(
+            '/api/subtitles/generate_batch/', {'items': items[:1]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(SUBTITLE_BATCH_LANGUAGE_WORKERS=2)
+    def test_batch_task_decodes_audio_once(self):
+        jobs = [SubtitleJob.objects.create(video=self.video, user=self.user, language=language)
+                for language in ('en', 'hi')]
+        original_transcribe = StubBackend.transcribe
+
+        def transcribe(backend, audio, language='en'):
+            if language == 'hi':
+                raise IOError('no hindi model')
+            return original_transcribe(backend, audio, language)
+
+        with mock.patch('subtitles.utils.extract_audio_from_video',
+                        wraps=extract_audio_from_video) as extract, \
+                mock.patch.object(StubBackend, 'transcribe', transcribe):
+            generate_subtitles_batch_task([str(job.id) for job in jobs])
+
+        self.assertEqual(extract.call_count, 1)
+        english, hindi = (SubtitleJob.objects.get(pk=job.pk) for job in jobs)
+        self.assertEqual(english.status, 'succeeded')
+        self.assertEqual(english.subtitle.transcript, StubBackend.text)
+        self.assertEqual((hindi.status, hindi.error_message), ('failed', 'no hindi model'))
+
+    @override_settings(SUBTITLE_BATCH_LANGUAGE_WORKERS=3, SUBTITLE_CHUNK_WORKERS=2,
+                       SUBTITLE_CHUNK_SECONDS=1, SUBTITLE_CHUNK_OVERLAP=0.1)
+    def test_batch_languages_share_one_request_pool(self):
+        self.video.duration = 3
+        self.video.save()
+        jobs = [SubtitleJob.objects.create(video=self.video, user=self.user, language=language)
+                for language in ('en', 'hi', 'fr')]
+        original_transcribe = StubBackend.transcribe
+        lock = threading.Lock()
+        running = [0, 0]
+
+        def transcribe(backend, audio, language='en'):
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+            try:
+                time.sleep(0.05)
+                return original_transcribe(backend, audio, language)
+            finally:
+                with lock:
+                    running[0] -= 1
+
+        with mock.patch.object(StubBackend, 'transcribe', transcribe):
+            generate_subtitles_batch_task([str(job.id) for job in jobs])
+
+        # Three languages of three chunks each, two requests at a time
+        self.assertEqual(running[1], 2)
+        self.assertEqual({SubtitleJob.objects.get(pk=job.pk).status for job in jobs},
+                         {'succeeded'})
+
+    def test_jobs_are_private(self):
+        other = get_user_model().objects.create_user(
+            username='bob', email='bob@example.com', password='secret')
+        job = SubtitleJob.objects.create(video=self.video, user=self.user)
+        self.client.force_authenticate(other)
+        response = self.client.get(f'/api/subtitle-jobs/{job.id}/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(EVENTS_REDIS_URL='')
+class SubtitleExportTests(TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+        media_settings = override_settings(MEDIA_ROOT=self.tempdir.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+        self.user = get_user_model().objects.create_user(
+            username='alice', email='alice@example.com', password='secret')
+        token = Token.objects.create(user=self.user)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Token {token.key}'
+        video = Video.objects.create(
+            user=self.user, title='Sample', file='videos/sample.mp4', status='ready')
+        self.subtitle = Subtitle.objects.create(
+            video=video, user=self.user, transcript='Hello <world>. Bye',
+            font='roboto', font_color='#FFCC00', background_color='#102030',
+            background_opacity=0.5, text_alignment='left',
+            subtitles_json=[
+                {'start': 0.0, 'end': 1.9996, 'text': 'Hello <world>.'},
+                {'start': 3661.25, 'end': 3662.5, 'text': 'Bye'},
+            ])
+
+    def export(self, export_format):
+        response = self.client.get(
+            f'/api/subtitles/{self.subtitle.id}/export_subtitle/', {'format': export_format})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn(f'.{export_format}"', response['Content-Disposition'])
+        return b''.join(response.streaming_content).decode()
+
+    def test_timestamps_round_without_overflowing(self):
+        self.assertEqual(format_timestamp(1.9996), '00:00:02,000')
+        self.assertEqual(format_timestamp(3661.25, '.'), '01:01:01.250')
+        self.assertEqual(ass_color('#FFCC00', 0.5), '&H8000CCFF')
+
+    def test_srt_and_vtt(self):
+        srt = self.export('srt')
+        self.assertTrue(srt.startswith('1\n00:00:00,000 --> 00:00:02,000\nHello <world>.\n\n2\n'))
+
+        vtt = self.export('vtt')
+        self.assertTrue(vtt.startswith('WEBVTT\n'))
+        self.assertIn('font-family: Roboto;', vtt)
+        self.assertIn('01:01:01.250 --> 01:01:02.500 align:left\nBye', vtt)
+        self.assertIn('Hello &lt;world&gt;.', vtt)
+
+    def test_cue_range_query(self):
+        self.addCleanup(clear_track_cache)
+        url = f'/api/subtitles/{self.subtitle.id}/cues/'
+        response = self.client.get(url, {'from': 3000, 'to': 4000})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 1)
+        self.assertEqual(response.json()['results'], [
+            {'start': 3661.25, 'end': 3662.5, 'text': 'Bye', 'id': 1, 'index': 1}])
+
+        response = self.client.get(url, {'limit': 1})
+        self.assertEqual(response.json()['count'], 2)
+        self.assertEqual([cue['index'] for cue in response.json()['results']], [0])
+        self.assertIsNotNone(response.json()['next'])
+
+        # Edits change the revision, so the cached index is not reused
+        self.subtitle.subtitles_json = [{'start': 1.0, 'end': 2.0, 'text': 'Edited'}]
+        self.subtitle.save()
+        response = self.client.get(url, {'from': 1.5})
+        self.assertEqual(response.json()['results'][0]['text'], 'Edited')
+        self.assertEqual(self.client.get(url, {'from': 'soon'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'from': 5, 'to': 1}).status_code, 400)
+
+    def test_cue_edits_require_current_version(self):
+        url = f'/api/subtitles/{self.subtitle.id}/cues/'
+        srt = self.export('srt')
+        response = self.client.patch(url, {'version': 0, 'operations': [
+            {'op': 'update', 'id': 1, 'text': 'Goodbye'},
+            {'op': 'insert', 'start': 10, 'end': 11, 'text': 'Middle'},
+        ]}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['version'], 1)
+        self.assertEqual([(cue['id'], cue['index']) for cue in response.json()['cues']],
+                         [(1, 2), (2, 1)])
+
+        self.subtitle.refresh_from_db()
+        self.assertEqual([cue['text'] for cue in self.subtitle.subtitles_json],
+                         ['Hello <world>.', 'Middle', 'Goodbye'])
+        self.assertNotEqual(self.export('srt'), srt)
+
+        response = self.client.patch(url, {'version': 0, 'operations': [
+            {'op': 'delete', 'id': 0}]}, content_type='application/json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['version'], 1)
+
+        response = self.client.patch(url, {'version': 1, 'operations': [
+            {'op': 'delete', 'id': 0}, {'op': 'delete', 'id': 7}]}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.subtitle.refresh_from_db()
+        self.assertEqual((self.subtitle.cue_count, self.subtitle.cue_version), (3, 1))
+
+    def test_cue_edits_validate_the_version(self):
+        url = f'/api/subtitles/{self.subtitle.id}/cues/'
+        operations = [{'op': 'update', 'id': 1, 'text': 'Goodbye'}]
+        for body in ({'operations': operations}, {'version': 'latest', 'operations': operations}):
+            response = self.client.patch(url, body, content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('version', response.json())
+
+        # Integers sent as strings, as form-encoded bodies do, are accepted
+        response = self.client.patch(url, {'version': '0', 'operations': operations},
+                                     content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['version'], 1)
+
+    def test_cue_edits_write_only_changed_columns(self):
+        url = f'/api/subtitles/{self.subtitle.id}/cues/'
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(url, {'version': 0, 'operations': [
+                {'op': 'update', 'id': 1, 'start': 3661.0}]}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        update = next(query['sql'] for query in queries if query['sql'].startswith('UPDATE'))
+        self.assertIn('"cue_starts"', update)
+        self.assertNotIn('"cue_text"', update)
+        self.assertNotIn('"cue_words"', update)
+
+    def test_renders_of_earlier_revisions_are_removed(self):
+        output = os.path.join(self.tempdir.name, 'renders', 'old.mp4')
+        os.makedirs(os.path.dirname(output))
+        open(output, 'wb').close()
+        stale = RenderJob.objects.create(subtitle=self.subtitle, user=self.user, status='succeeded',
+                                         revision=export_revision(self.subtitle),
+                                         output='renders/old.mp4')
+
+        # Still rendering, so left for its client to pick up
+        running = RenderJob.objects.create(subtitle=self.subtitle, user=self.user,
+                                           status='running', revision=stale.revision)
+
+        self.client.patch(f'/api/subtitles/{self.subtitle.id}/update_style/', {'font_size': 20},
+                          content_type='application/json')
+
+        self.assertFalse(RenderJob.objects.filter(pk=stale.pk).exists())
+        self.assertFalse(os.path.exists(output))
+        self.assertTrue(RenderJob.objects.filter(pk=running.pk).exists())
+
+    def test_deleted_cue_ids_are_not_reused(self):
+        url = f'/api/subtitles/{self.subtitle.id}/cues/'
+        response = self.client.patch(url, {'version': 0, 'operations': [
+            {'op': 'delete', 'id': 1},
+            {'op': 'insert', 'start': 10, 'end': 11, 'text': 'New'},
+        ]}, content_type='application/json')
+        self.assertEqual(response.json()['deleted'], [1])
+        self.assertEqual([cue['id'] for cue in response.json()['cues']], [2])
+
+        # Nor in a later request, once the newest cue is gone too
+        response = self.client.patch(url, {'version': 1, 'operations': [
+            {'op': 'delete', 'id': 2}]}, content_type='application/json')
+        response = self.client.patch(url, {'version': 2, 'operations': [
+            {'op': 'insert', 'start': 12, 'end': 13, 'text': 'Newer'},
+        ]}, content_type='application/json')
+        self.assertEqual([cue['id'] for cue in response.json()['cues']], [3])
+
+    def test_ass_carries_style(self):
+        ass = self.export('ass')
+        self.assertIn('Style: Default,Roboto,16,&H0000CCFF,&H000000FF,&H80302010,', ass)
+        self.assertIn(',1,20,20,20,1\n', ass)
+        self.assertIn('Dialogue: 0,1:01:01.25,1:01:02.50,Default,,0,0,0,,Bye', ass)
+
+    def test_ttml_and_json(self):
+        ttml = self.export('ttml')
+        self.assertIn('<p begin="00:00:00.000" end="00:00:02.000">Hello &lt;world&gt;.</p>', ttml)
+        self.assertIn('tts:backgroundColor="#10203080"', ttml)
+
+        data = json.loads(self.export('json'))
+        self.assertEqual(data['language'], 'en')
+        self.assertEqual(data['style']['font_color'], '#FFCC00')
+        self.assertEqual([cue['text'] for cue in data['cues']], ['Hello <world>.', 'Bye'])
+
+    def test_unsupported_format(self):
+        response = self.client.get(
+            f'/api/subtitles/{self.subtitle.id}/export_subtitle/', {'format': 'doc'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_rendered_exports_are_cached_and_revalidated(self):
+        url = f'/api/subtitles/{self.subtitle.id}/export_subtitle/'
+        first = self.client.get(url, {'format': 'srt'})
+        b''.join(first.streaming_content)
+        etag = first['ETag']
+        self.assertEqual(first['Cache-Control'], 'private, no-cache')
+
+        with mock.patch.object(SRTWriter, 'write') as write:
+            self.assertEqual(self.client.get(url, {'format': 'srt'}).status_code, 200)
+            response = self.client.get(url, {'format': 'srt'}, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+            response = self.client.get(
+                url, {'format': 'srt'}, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+            self.assertEqual(response.status_code, 304)
+        write.assert_not_called()
+
+        response = self.client.patch(
+            f'/api/subtitles/{self.subtitle.id}/update_style/', {'font_size': 20},
+            content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(os.listdir(export_dir(self.subtitle.id)), [])
+
+        response = self.client.get(url, {'format': 'srt'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_style_update_rejects_a_language_the_video_already_has(self):
+        Subtitle.objects.create(video=self.subtitle.video, user=self.user, language='fr',
+                                transcript='Bonjour', subtitles_json=[])
+        url = f'/api/subtitles/{self.subtitle.id}/update_style/'
+
+        response = self.client.patch(url, {'language': 'fr'}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('language', response.json())
+
+        # Its own language, as the styler sends it with every update
+        response = self.client.patch(url, {'language': 'en', 'font_size': 30},
+                                     content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(EVENTS_REDIS_URL='')
+class BurnInRenderTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tempdir = tempfile.TemporaryDirectory()
+        cls.media_settings = override_settings(MEDIA_ROOT=cls.tempdir.name)
+        cls.media_settings.enable()
+        cls.video_path = os.path.join(cls.tempdir.name, 'source.mp4')
+        make_test_video(cls.video_path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.media_settings.disable()
+        cls.tempdir.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='alice', email='alice@example.com', password='secret')
+        with open(self.video_path, 'rb') as source:
+            video = Video.objects.create(
+                user=self.user, title='Sample', status='ready', duration=3,
+                file=File(source, name='sample.mp4'))
+        self.subtitle = Subtitle.objects.create(
+            video=video, user=self.user, transcript='Hello there world',
+            style='karaoke', subtitles_json=[
+                {'start': 0.5, 'end': 1.5, 'text': 'Hello there world'},
+            ])
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_ass_presets(self):
+        lines = ''.join(ASSWriter(play_res=(1280, 720)).write(
+            self.subtitle, self.subtitle.subtitles_json)).splitlines()
+        style = next(line for line in lines if line.startswith('Style:'))
+        # Font size and margins scale with the script height
+        self.assertTrue(style.startswith('Style: Default,Montserrat,32,&H00FFFFFF,&H80FFFFFF,'))
+        self.assertEqual(lines[-1], 'Dialogue: 0,0:00:00.50,0:00:01.50,Default,,0,0,0,,'
+                                    '{\\k33}Hello {\\k33}there {\\k33}world')
+
+        # Stored word timings drive the \\k durations, including a lead-in
+        cues = self.subtitle.subtitles_json
+        cues[0]['words'] = [100, 300, 400, 600, 700, 1000]
+        dialogue = list(ASSWriter().write(self.subtitle, cues))[-1]
+        self.assertTrue(dialogue.endswith(',,{\\k10}{\\k30}Hello {\\k30}there {\\k30}world\n'))
+
+        self.subtitle.style = 'classic'
+        dialogue = list(ASSWriter().write(self.subtitle, cues))[-1]
+        self.assertTrue(dialogue.endswith(',,HELLO THERE WORLD\n'))
+
+    def test_render_task_burns_subtitles_into_video(self):
+        job = RenderJob.objects.create(
+            subtitle=self.subtitle, user=self.user, revision='test')
+        render_subtitled_video_task(str(job.id))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'succeeded')
+        self.assertEqual(job.progress, 100)
+        with MediaProbe(job.output.path) as probe:
+            self.assertEqual((probe.width, probe.height), (160, 120))
+            self.assertAlmostEqual(probe.duration, 3, places=0)
+            self.assertTrue(probe.has_audio)
+
+    def test_render_requests_reuse_jobs_of_the_same_revision(self):
+        url = f'/api/subtitles/{self.subtitle.id}/render_video/'
+        with mock.patch.object(render_subtitled_video_task, 'apply_async') as apply_async:
+            apply_async.return_value.id = 'task-1'
+            first = self.client.post(url)
+            second = self.client.post(url)
+            self.client.patch(f'/api/subtitles/{self.subtitle.id}/update_style/',
+                              {'style': 'bold'}, format='json')
+            third = self.client.post(url)
+
+        self.assertEqual(first.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(second.data['id'], first.data['id'])
+        self.assertNotEqual(third.data['id'], first.data['id'])
+        self.assertEqual(apply_async.call_count, 2)
+        self.assertEqual(apply_async.call_args[1]['queue'], 'priority')
+
+        response = self.client.get(f'/api/render-jobs/{third.data["id"]}/')
+        self.assertEqual(response.data['status'], 'queued')
+
+
+@override_settings(EVENTS_REDIS_URL='')
+class ListEndpointQueryTests(TestCase):
+    """List endpoints run one query per page, however many rows and relations it holds."""
+
+    ENDPOINTS = ['/api/videos/', '/api/subtitles/', '/api/subtitle-jobs/', '/api/render-jobs/']
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='alice', email='alice@example.com', password='secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def add_rows(self, count):
+        for _ in range(count):
+            index = VideoBlob.objects.count()
+            blob = VideoBlob.objects.create(sha256=f'{index:064x}', file='blobs/clip.mp4', size=1)
+            video = Video.objects.create(
+                user=self.user, title=f'Clip {index}', status='ready', blob=blob)
+            subtitle = Subtitle.objects.create(
+                video=video, user=self.user, transcript='Hello',
+                subtitles_json=[{'start': 0.0, 'end': 1.0, 'text': 'Hello'}])
+            SubtitleJob.objects.create(video=video, user=self.user, subtitle=subtitle)
+            RenderJob.objects.create(subtitle=subtitle, user=self.user)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        for rows in (1, 5):
+            self.add_rows(rows - Video.objects.count())
+            for url in self.ENDPOINTS:
+                with self.subTest(url=url, rows=rows), self.assertNumQueries(1):
+                    response = self.client.get(url)
+                    self.assertEqual(len(response.data['results']), rows)
+
+    def test_sparse_fieldset_narrows_output_and_query(self):
+        self.add_rows(2)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/videos/', {'fields': 'id,title,status'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([set(video) for video in response.data['results']],
+                         [{'id', 'title', 'status'}] * 2)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('description', queries[0]['sql'])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/subtitles/', {'fields': 'id,language'})
+        self.assertEqual(set(response.data['results'][0]), {'id', 'language'})
+        self.assertNotIn('cue_text', queries[0]['sql'])
+        self.assertNotIn('videos_video', queries[0]['sql'])
+
+        response = self.client.get('/api/videos/', {'fields': 'id,password'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('password', response.data['fields'])
+
+    def test_sparse_fieldset_on_detail_keeps_nested_fields(self):
+        self.add_rows(1)
+        subtitle = Subtitle.objects.get()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/subtitles/{subtitle.id}/', {'fields': 'id,video'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data), {'id', 'video'})
+        self.assertEqual(response.data['video']['title'], subtitle.video.title)
+        self.assertIn('status', response.data['video'])
+        self.assertNotIn('cue_text', queries[-1]['sql'])
+
+    def test_subtitle_list_returns_summaries(self):
+        self.add_rows(1)
+        subtitle = Subtitle.objects.get()
+        subtitle.transcript = 'word ' * 50000
+        subtitle.subtitles_json = [
+            {'start': float(index), 'end': index + 0.5, 'text': f'Cue {index}'}
+            for index in range(2000)]
+        subtitle.save()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/subtitles/', {'video': subtitle.video_id})
+        self.assertEqual(response.data['results'], [{
+            'id': subtitle.id, 'video_id': subtitle.video_id, 'language': 'en',
+            'style': 'clean', 'cue_count': 2000, 'duration': 1999.5, 'cue_version': 0,
+            'created_at': response.data['results'][0]['created_at'],
+            'updated_at': response.data['results'][0]['updated_at'],
+        }])
+        self.assertNotIn('transcript', queries[0]['sql'])
+        self.assertNotIn('cue_text', queries[0]['sql'])
+
+        response = self.client.get(f'/api/subtitles/{subtitle.id}/')
+        self.assertEqual(len(response.data['subtitles_json']), 2000)
+
+    @override_settings(API_PAGE_SIZE=2)
+    def test_cursor_pages_cover_every_row_once(self):
+        self.add_rows(5)
+        titles = []
+        url = '/api/videos/'
+        while url:
+            response = self.client.get(url)
+            self.assertLessEqual(len(response.data['results']), 2)
+            titles += [video['title'] for video in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(titles, [f'Clip {index}' for index in range(4, -1, -1)])
 
-# Create your tests here.
@@ -0,0 +1,100 @@
+import re
+from bisect import bisect_right
+
+# Word timings are stored with each cue as a flat list of integer
+# milliseconds relative to the cue start, [start0, end0, start1, end1, ...],
+# one pair per whitespace-separated word of the cue text.
+
+
+def normalize_word(word):
+    return re.sub(r"[^\w']", '', word.lower())
+
+
+def estimate_word_timings(tokens, start, end):
+    """Spread ``tokens`` over ``[start, end]`` in proportion to their length."""
+    if not tokens:
+        return []
+    total_chars = sum(len(token) for token in tokens)
+    timings = []
+    position = start
+    for token in tokens:
+        length = (end - start) * len(token) / total_chars
+        timings.append((position, position + length))
+        position += length
+    return timings
+
+
+def align_words(tokens, words, start, end):
+    """
+    Match recognized ``words`` (``{"start", "end", "word"}`` dicts) to the
+    ``tokens`` of the cue text and return one ``(start, end)`` per token.
+
+    The recognizer's words may differ from the text in punctuation or
+    splitting, so tokens are matched in order by their normalized form.
+    Tokens without a match are spread over the gap between their matched
+    neighbours.
+    """
+    timings = [None] * len(tokens)
+    position = 0
+    for index, token in enumerate(tokens):
+        normalized = normalize_word(token)
+        for candidate in range(position, min(position + 3, len(words))):
+            if normalize_word(words[candidate]["word"]) == normalized:
+                timings[index] = (words[candidate]["start"], words[candidate]["end"])
+                position = candidate + 1
+                break
+
+    index = 0
+    while index < len(tokens):
+        if timings[index] is not None:
+            index += 1
+            continue
+        gap_end = index
+        while gap_end < len(tokens) and timings[gap_end] is None:
+            gap_end += 1
+        gap_start_time = timings[index - 1][1] if index else start
+        gap_end_time = timings[gap_end][0] if gap_end < len(tokens) else end
+        timings[index:gap_end] = estimate_word_timings(
+            tokens[index:gap_end], gap_start_time, max(gap_start_time, gap_end_time))
+        index = gap_end
+    return timings
+
+
+def pack_word_timings(cue_start, timings):
+    packed = []
+    for word_start, word_end in timings:
+        packed.append(max(0, int(round((word_start - cue_start) * 1000))))
+        packed.append(max(0, int(round((word_end - cue_start) * 1000))))
+    return packed
+
+
+def word_timings(cue):
+    """
+    Return ``(start, end)`` in seconds for each word of a cue.
+    Cues stored without word timings get an estimate.
+    """
+    tokens = cue["text"].split()
+    packed = cue.get("words")
+    if not packed or len(packed) != 2 * len(tokens):
+        return estimate_word_timings(tokens, cue["start"], cue["end"])
+    return [
+        (cue["start"] + packed[i] / 1000, cue["start"] + packed[i + 1] / 1000)
+        for i in range(0, len(packed), 2)
+    ]
+
+
+def active_word_index(timings, t):
+    """Index of the last word started at time ``t``, or -1 before the first word."""
+    return bisect_right([word_start for word_start, _ in timings], t) - 1
+
+
+def assign_words_to_segments(segments, words):
+    """Attach each recognized word to the segment containing its midpoint."""
+    starts = [segment["start"] for segment in segments]
+    for segment in segments:
+        segment["words"] = []
+    for word in words:
+        index = bisect_right(starts, (word["start"] + word["end"]) / 2) - 1
+        if index >= 0:
+            segments[index]["words"].append(word)
+    return segments
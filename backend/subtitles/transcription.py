@@ -0,0 +1,177 @@
+import os
+import threading
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from subtitles.timing import assign_words_to_segments
+
+# Registry of transcription backend classes by name
+TRANSCRIPTION_BACKENDS = {}
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def register_backend(name):
+    """Class decorator that registers a transcription backend under ``name``."""
+    def decorator(cls):
+        cls.name = name
+        TRANSCRIPTION_BACKENDS[name] = cls
+        return cls
+    return decorator
+
+
+def get_backend(name=None):
+    """
+    Return the shared backend instance for ``name``.
+    Defaults to ``settings.SUBTITLE_TRANSCRIPTION_BACKEND``. Instances are
+    created once per process because local engines load their model on init.
+    """
+    name = name or settings.SUBTITLE_TRANSCRIPTION_BACKEND
+    if name not in TRANSCRIPTION_BACKENDS:
+        raise ImproperlyConfigured(
+            f"Unknown transcription backend '{name}'. "
+            f"Available backends: {', '.join(sorted(TRANSCRIPTION_BACKENDS))}")
+
+    with _instances_lock:
+        if name not in _instances:
+            _instances[name] = TRANSCRIPTION_BACKENDS[name]()
+        return _instances[name]
+
+
+class TranscriptionBackend:
+    """
+    Base class for speech-to-text engines.
+
+    ``transcribe`` receives a path or a readable binary stream and returns
+    ``(transcript, segments)`` where segments is a list of
+    ``{"start", "end", "text"}`` dicts with times in seconds. Engines that
+    report word timings add ``"words"``: a list of ``{"start", "end", "word"}``.
+    """
+    name = None
+    model = None
+
+    def transcribe(self, audio, language="en"):
+        raise NotImplementedError
+
+
+@register_backend('openai')
+class OpenAIBackend(TranscriptionBackend):
+    """OpenAI's hosted Whisper API."""
+
+    def __init__(self):
+        from openai import OpenAI
+        self.model = settings.SUBTITLE_TRANSCRIPTION_MODEL or "whisper-1"
+        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+
+    def transcribe(self, audio, language="en"):
+        if isinstance(audio, (str, os.PathLike)):
+            with open(audio, "rb") as audio_file:
+                response = self._create(self.client, audio_file, language)
+        else:
+            # A consumed stream cannot be replayed, so never retry the upload
+            response = self._create(
+                self.client.with_options(max_retries=0), audio, language)
+
+        # Extract segments with timestamps
+        segments = []
+        for segment in response.segments:
+            segments.append({
+                "start": segment.start,
+                "end": segment.end,
+                "text": segment.text
+            })
+
+        # Word timings are returned for the whole file, not per segment
+        words = [
+            {"start": word.start, "end": word.end, "word": word.word}
+            for word in (response.words or [])
+        ]
+        assign_words_to_segments(segments, words)
+
+        return response.text, segments
+
+    def _create(self, client, audio_file, language):
+        return client.audio.transcriptions.create(
+            model=self.model,
+            file=audio_file,
+            language=language,
+            response_format="verbose_json",
+            timestamp_granularities=["segment", "word"]
+        )
+
+
+@register_backend('faster_whisper')
+class FasterWhisperBackend(TranscriptionBackend):
+    """
+    Local CPU engine using faster-whisper (CTranslate2).
+    Runs offline with an int8-quantized model by default; requires the
+    optional ``faster-whisper`` package.
+    """
+
+    def __init__(self):
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError:
+            raise ImproperlyConfigured(
+                "The 'faster_whisper' transcription backend requires the "
+                "faster-whisper package (pip install faster-whisper).")
+
+        self.model = settings.SUBTITLE_TRANSCRIPTION_MODEL or "small"
+        self.engine = WhisperModel(
+            self.model,
+            device="cpu",
+            compute_type=settings.SUBTITLE_LOCAL_COMPUTE_TYPE,
+            cpu_threads=settings.SUBTITLE_LOCAL_CPU_THREADS
+        )
+
+    def transcribe(self, audio, language="en"):
+        if isinstance(audio, os.PathLike):
+            audio = os.fspath(audio)
+        results, _ = self.engine.transcribe(
+            audio, language=language, vad_filter=True, word_timestamps=True)
+
+        segments = [
+            {
+                "start": segment.start,
+                "end": segment.end,
+                "text": segment.text,
+                "words": [
+                    {"start": word.start, "end": word.end, "word": word.word}
+                    for word in segment.words or []
+                ],
+            }
+            for segment in results
+        ]
+        transcript = "".join(segment["text"] for segment in segments).strip()
+        return transcript, segments
+
+
+@register_backend('stub')
+class StubBackend(TranscriptionBackend):
+    """
+    Deterministic offline backend for tests and CI.
+    Drains the audio and returns a fixed transcript without touching the
+    network or loading a model.
+    """
+    model = "stub"
+    text = "This is a generated subtitle."
+
+    def transcribe(self, audio, language="en"):
+        if isinstance(audio, (str, os.PathLike)):
+            size = os.path.getsize(audio)
+        else:
+            size = 0
+            while True:
+                chunk = audio.read(64 * 1024)
+                if not chunk:
+                    break
+                size += len(chunk)
+
+        if not size:
+            return "", []
+        tokens = self.text.split()
+        words = [
+            {"start": round(i / len(tokens), 3), "end": round((i + 1) / len(tokens), 3), "word": token}
+            for i, token in enumerate(tokens)
+        ]
+        return self.text, [{"start": 0.0, "end": 1.0, "text": f" {self.text}", "words": words}]
@@ -1,8 +1,15 @@
 import os
 import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from django.conf import settings
-from openai import OpenAI
-from moviepy import VideoFileClip
+from videos.media import MediaProbe
+from subtitles.audio import stream_audio_from_video
+from subtitles.chunking import detect_silences, plan_chunks, transcribe_in_chunks
+from subtitles.transcription import get_backend
+from subtitles.cache import (
+    get_audio_fingerprint, get_transcript_store, transcript_cache_key
+)
+from subtitles.segmentation import flatten_segments, segment_words, segmentation_options
 import logging
 
 file_name = "utils.log"
@@ -15,134 +22,143 @@ file_handler.setFormatter(formatter)
 logger.addHandler(file_handler)
 
 
-def extract_audio_from_video(video_path):
-    """Extract audio from video file."""
+def temporary_audio_path():
+    """Create an empty, uniquely named temporary MP3 file and return its path."""
+    # Include a unique id in the filename to ensure uniqueness
+    import uuid
+    unique_id = uuid.uuid4().hex
+
+    with tempfile.NamedTemporaryFile(suffix=f'_{unique_id}.mp3', delete=False) as temp_audio:
+        return temp_audio.name
+
+
+def extract_audio_from_video(video_path, probe=None, audio_path=None):
+    """
+    Extract audio from video file.
+    Reuses an already opened ``MediaProbe`` when one is given, and writes to
+    ``audio_path`` when given, otherwise to a new temporary file.
+    """
+    owns_probe = probe is None
     try:
-        video = VideoFileClip(video_path)
+        if owns_probe:
+            probe = MediaProbe(video_path)
 
         # Create a unique temporary file for the audio
-        # Include video path in the filename to ensure uniqueness
-        import uuid
-        unique_id = uuid.uuid4().hex
-
-        with tempfile.NamedTemporaryFile(suffix=f'_{unique_id}.mp3', delete=False) as temp_audio:
-            audio_path = temp_audio.name
+        audio_path = audio_path or temporary_audio_path()
 
         # Extract audio to the temporary file
-        video.audio.write_audiofile(audio_path, logger=None)
-        video.close()
+        probe.write_audio(audio_path)
 
         return audio_path
     except Exception as e:
         logger.error(f"Error extracting audio from video: {str(e)}")
         raise
+    finally:
+        if owns_probe and probe is not None:
+            probe.close()
 
 
-def generate_transcript_with_timestamps(audio_path, language="en"):
+def generate_transcript_with_timestamps(audio, language="en", backend=None):
     """
-    Generate transcript with timestamps using OpenAI's Whisper API.
+    Generate transcript with timestamps using the configured transcription backend.
+    ``audio`` is either a path to an audio file, which is deleted afterwards,
+    or a readable stream such as an ``AudioStream``, which is consumed as it
+    is produced.
     """
+    is_path = isinstance(audio, (str, os.PathLike))
     try:
-        # Initialize the OpenAI client
-        client = OpenAI(api_key=settings.OPENAI_API_KEY)
-        with open(audio_path, "rb") as audio_file:
-            response = client.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio_file,
-                response_format="verbose_json",
-                timestamp_granularities=["segment"]
-            )
-
-        # Extract the transcript
-        transcript = response.text
-
-        # Extract segments with timestamps
-        segments = []
-        for segment in response.segments:
-            segments.append({
-                "start": segment.start,
-                "end": segment.end,
-                "text": segment.text
-            })
-
-        return transcript, segments
+        backend = backend or get_backend()
+        return backend.transcribe(audio, language)
     except Exception as e:
-        logger.error(f"Error generating transcript with OpenAI: {str(e)}")
+        logger.error(f"Error generating transcript: {str(e)}")
         raise
     finally:
         # Clean up the temporary audio file
-        if os.path.exists(audio_path):
-            os.unlink(audio_path)
+        if is_path and os.path.exists(audio):
+            os.unlink(audio)
 
 
-def group_segments_into_subtitles(segments, max_chars=70):
+def group_segments_into_subtitles(segments, **options):
     """
-    Group segments into subtitle entries based on character limit and timing.
+    Split transcribed segments into subtitle cues by their word timings.
+    Limits default to the SUBTITLE_* segmentation settings; see
+    ``subtitles.segmentation.segment_words`` for the rules.
     """
-    subtitles = []
-    current_text = ""
-    current_start = None
-    current_end = None
+    tokens, starts, ends = flatten_segments(segments)
+    return segment_words(tokens, starts, ends, **segmentation_options(**options))
 
-    for segment in segments:
-        # If adding this segment would exceed max_chars, create a new subtitle
-        if len(current_text) + len(segment["text"]) > max_chars and current_text:
-            subtitles.append({
-                "start": current_start,
-                "end": current_end,
-                "text": current_text.strip()
-            })
-            current_text = ""
-            current_start = None
 
-        # Start a new subtitle or add to existing
-        if not current_start:
-            current_start = segment["start"]
+def generate_transcript_in_chunks(video_path, duration, language="en", progress=None,
+                                  silences=None, executor=None):
+    """
+    Transcribe a long video as overlapping windows cut at silences.
+    Windows are streamed and transcribed concurrently, then stitched back
+    onto the global timeline. Pass already detected ``silences`` to skip
+    scanning the audio again, and an ``executor`` to run the windows in a
+    pool shared with other transcriptions.
+    """
+    if silences is None:
+        silences = detect_silences(video_path)
+    chunks = plan_chunks(
+        duration,
+        silences,
+        chunk_length=settings.SUBTITLE_CHUNK_SECONDS,
+        overlap=settings.SUBTITLE_CHUNK_OVERLAP
+    )
+    logger.info(
+        f"Transcribing {len(chunks)} chunks with {settings.SUBTITLE_CHUNK_WORKERS} workers")
 
-        current_text += " " + segment["text"]
-        current_end = segment["end"]
+    def transcribe_chunk(chunk):
+        with stream_audio_from_video(
+                video_path,
+                audio_format=settings.SUBTITLE_AUDIO_FORMAT,
+                sample_rate=settings.SUBTITLE_AUDIO_SAMPLE_RATE,
+                start=chunk.start,
+                duration=chunk.duration) as audio:
+            return generate_transcript_with_timestamps(audio, language)
 
-    # Add the last subtitle if there's any text left
-    if current_text:
-        subtitles.append({
-            "start": current_start,
-            "end": current_end,
-            "text": current_text.strip()
-        })
+    def on_chunk_done(done, total):
+        if progress:
+            progress('transcribing', 10 + 80 * done // total)
 
-    return subtitles
+    return transcribe_in_chunks(
+        chunks,
+        transcribe_chunk,
+        max_workers=settings.SUBTITLE_CHUNK_WORKERS,
+        on_chunk_done=on_chunk_done,
+        executor=executor
+    )
 
 
-def generate_subtitles_for_video(video_path, language="en"):
+def transcribe_video(video_path, duration, language="en", probe=None, progress=None):
     """
-    Generate subtitles for a video using AI.
-    Returns the full transcript, subtitles, and video duration.
+    Transcribe a video's audio and return ``(transcript, segments)``.
+    Long videos are chunked; shorter ones are streamed or, when streaming is
+    disabled, extracted to a temporary file first.
     """
     audio_path = None
     try:
-        # Extract audio and get video duration
-        video = VideoFileClip(video_path)
-        duration = video.duration
-        video.close()
+        if duration and duration > settings.SUBTITLE_CHUNK_SECONDS:
+            # Long videos are split at silences and transcribed in parallel
+            return generate_transcript_in_chunks(
+                video_path, duration, language, progress)
 
-        # Extract audio from video
-        audio_path = extract_audio_from_video(video_path)
+        if settings.SUBTITLE_STREAM_AUDIO:
+            # Pipe encoded audio straight into the transcription request
+            logger.info(
+                f"Streaming {settings.SUBTITLE_AUDIO_FORMAT} audio for transcription")
+            with stream_audio_from_video(
+                    video_path,
+                    audio_format=settings.SUBTITLE_AUDIO_FORMAT,
+                    sample_rate=settings.SUBTITLE_AUDIO_SAMPLE_RATE) as audio:
+                return generate_transcript_with_timestamps(audio, language)
 
-        # Log the paths for debugging
-        logger.info(f"Video path: {video_path}")
+        # Extract audio from video
+        audio_path = extract_audio_from_video(video_path, probe=probe)
         logger.info(f"Audio path: {audio_path}")
 
         # Generate transcript with timestamps
-        transcript, segments = generate_transcript_with_timestamps(
-            audio_path, language)
-
-        # Group segments into subtitles
-        subtitles = group_segments_into_subtitles(segments)
-
-        return transcript, subtitles, duration
-    except Exception as e:
-        logger.error(f"Error generating subtitles: {str(e)}")
-        raise
+        return generate_transcript_with_timestamps(audio_path, language)
     finally:
         # Ensure audio file is always cleaned up
         if audio_path and os.path.exists(audio_path):
@@ -152,3 +168,150 @@ def generate_subtitles_for_video(video_path, language="en"):
             except Exception as e:
                 logger.error(
                     f"Failed to clean up audio file {audio_path}: {str(e)}")
+
+
+def get_or_create_transcript(video_path, duration, language="en", probe=None, progress=None,
+                             content_hash=None):
+    """
+    Return ``(transcript, segments)`` from the transcript cache when the same
+    audio was already transcribed by the same backend, model and language,
+    otherwise transcribe it and store the result. Pass the stored file's
+    ``content_hash`` to skip decoding the audio of already seen content.
+    """
+    store = get_transcript_store()
+    if store is None:
+        return transcribe_video(video_path, duration, language, probe, progress)
+
+    backend = get_backend()
+    fingerprint = get_audio_fingerprint(video_path, store, content_hash)
+    cache_key = transcript_cache_key(
+        fingerprint, backend.name, backend.model, language)
+
+    cached = store.get(cache_key)
+    if cached is not None:
+        logger.info(f"Transcript cache hit for audio {fingerprint}")
+        return cached["transcript"], cached["segments"]
+
+    transcript, segments = transcribe_video(
+        video_path, duration, language, probe, progress)
+    store.set(cache_key, {"transcript": transcript, "segments": segments})
+    return transcript, segments
+
+
+def get_or_create_transcripts(video_path, duration, languages, probe=None, content_hash=None,
+                              on_done=None):
+    """
+    Transcribe one video in several ``languages`` and return a dict of
+    ``language: (transcript, segments)``, or the exception that language
+    failed with.
+
+    Cached languages are served from the transcript cache. The audio is
+    decoded once, together with its fingerprint when that is not memoized
+    yet, and the rest are transcribed from that copy. At most
+    SUBTITLE_BATCH_LANGUAGE_WORKERS languages run at a time, and all their
+    transcription requests, chunked or not, share one pool of
+    SUBTITLE_CHUNK_WORKERS. ``on_done(language, result)`` is called from
+    this thread as each language finishes.
+    """
+    results = {}
+
+    def finish(language, result):
+        results[language] = result
+        if on_done:
+            on_done(language, result)
+
+    store = get_transcript_store()
+    backend = get_backend()
+    cache_keys = {}
+    audio_path = temporary_audio_path()
+    try:
+        if store is not None:
+            fingerprint = get_audio_fingerprint(
+                video_path, store, content_hash, audio_path=audio_path)
+            for language in languages:
+                cache_keys[language] = transcript_cache_key(
+                    fingerprint, backend.name, backend.model, language)
+                cached = store.get(cache_keys[language])
+                if cached is not None:
+                    logger.info(f"Transcript cache hit for audio {fingerprint} ({language})")
+                    finish(language, (cached["transcript"], cached["segments"]))
+
+        missing = [language for language in languages if language not in results]
+        if not missing:
+            return results
+
+        # Still empty unless the audio was decoded for its fingerprint
+        if not os.path.getsize(audio_path):
+            extract_audio_from_video(video_path, probe=probe, audio_path=audio_path)
+        chunked = duration and duration > settings.SUBTITLE_CHUNK_SECONDS
+        silences = detect_silences(audio_path) if chunked else None
+
+        def transcribe_file(language):
+            # An open file is read without deleting the shared copy
+            with open(audio_path, 'rb') as audio:
+                return generate_transcript_with_timestamps(audio, language)
+
+        def transcribe(language):
+            if chunked:
+                return generate_transcript_in_chunks(
+                    audio_path, duration, language, silences=silences, executor=request_pool)
+            return request_pool.submit(transcribe_file, language).result()
+
+        logger.info(f"Transcribing {video_path} in {len(missing)} languages")
+        workers = max(1, min(settings.SUBTITLE_BATCH_LANGUAGE_WORKERS, len(missing)))
+        # Language threads only wait on the shared pool, which does the requests
+        with ThreadPoolExecutor(max_workers=max(1, settings.SUBTITLE_CHUNK_WORKERS)) as request_pool, \
+                ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(transcribe, language): language for language in missing}
+            for future in as_completed(futures):
+                language = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"Error transcribing {video_path} ({language}): {str(e)}")
+                    finish(language, e)
+                    continue
+                if store is not None:
+                    store.set(cache_keys[language],
+                              {"transcript": result[0], "segments": result[1]})
+                finish(language, result)
+    finally:
+        if os.path.exists(audio_path):
+            os.unlink(audio_path)
+    return results
+
+
+def generate_subtitles_for_video(video_path, language="en", probe=None, progress=None,
+                                 content_hash=None, duration=None):
+    """
+    Generate subtitles for a video using AI.
+    Returns the full transcript, subtitles, and video duration.
+    Pass an open ``MediaProbe`` to avoid re-opening the video container, or
+    the already known ``duration`` to skip probing it, and a
+    ``progress(stage, percent)`` callable to be told how far along it is.
+    """
+    owns_probe = probe is None and duration is None
+    try:
+        if owns_probe:
+            probe = MediaProbe(video_path)
+        if duration is None:
+            duration = probe.duration
+
+        logger.info(f"Video path: {video_path}")
+        if progress:
+            progress('transcribing', 10)
+        transcript, segments = get_or_create_transcript(
+            video_path, duration, language, probe, progress, content_hash)
+
+        # Group segments into subtitles
+        if progress:
+            progress('segmenting', 90)
+        subtitles = group_segments_into_subtitles(segments)
+
+        return transcript, subtitles, duration
+    except Exception as e:
+        logger.error(f"Error generating subtitles: {str(e)}")
+        raise
+    finally:
+        if owns_probe and probe is not None:
+            probe.close()
@@ -1,5 +1,9 @@
 import json
-from django.http import HttpResponse
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from subtitles.cues import CUE_FIELDS
+from subtitles.export import EXPORT_WRITERS, export_revision, get_or_render_export, get_writer
 from subtitles.models import Subtitle
 from rest_framework.authentication import TokenAuthentication
 
@@ -23,8 +27,9 @@ def export_subtitle(request, pk=None):
         )
 
     try:
+        # The cue data is only loaded when the export has to be rendered
         subtitle = Subtitle.objects.filter(
-            id=pk, user=request.user.id).first()
+            id=pk, user=request.user.id).defer('transcript', *CUE_FIELDS).first()
         if not subtitle:
             return HttpResponse(
                 json.dumps(
@@ -35,55 +40,40 @@ def export_subtitle(request, pk=None):
 
         # Get the requested format (default to SRT)
         export_format = request.GET.get('format', 'srt').lower()
-        if export_format not in ['srt']:
+        writer = get_writer(export_format)
+        if writer is None:
             return HttpResponse(
                 json.dumps(
-                    {'detail': 'Unsupported format. Only "srt" is supported.'}),
+                    {'detail': f'Unsupported format. Use one of: {", ".join(EXPORT_WRITERS)}.'}),
                 content_type='application/json',
                 status=400
             )
 
-        # Convert subtitles_json to SRT format
-        subtitles_json = subtitle.subtitles_json
+        # Exports only change when the row is saved, so revalidation is cheap
+        etag = quote_etag(f"{subtitle.pk}-{export_format}-{export_revision(subtitle)}")
+        last_modified = int(subtitle.updated_at.timestamp())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified)
+        if response is None:
+            path = get_or_render_export(
+                subtitle, writer, subtitle.load_cue_track)
+            response = FileResponse(
+                open(path, 'rb'), as_attachment=True,
+                filename=f"subtitles_{pk}.{writer.extension}",
+                content_type=f"{writer.content_type}; charset=utf-8")
 
-        if not isinstance(subtitles_json, list):
-            try:
-                subtitles_json = json.loads(subtitles_json)
-            except Exception as e:
-                print(f"Error parsing subtitles_json: {str(e)}")
-                return HttpResponse(
-                    json.dumps(
-                        {'detail': f'Error parsing subtitle data: {str(e)}'}),
-                    content_type='application/json',
-                    status=500
-                )
-
-        srt_content = ""
-        for index, sub in enumerate(subtitles_json, start=1):
-            start_time = format_time(sub['start'])
-            end_time = format_time(sub['end'])
-            text = sub['text'].replace("\n", " ")
-            srt_content += f"{index}\n{start_time} --> {end_time}\n{text}\n\n"
-
-        # Return the SRT file as a downloadable response
-        response = HttpResponse(srt_content, content_type="text/plain")
-        response["Content-Disposition"] = f'attachment; filename="subtitles_{pk}.srt"'
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        # Authenticated content: browsers may keep it but must revalidate
+        response['Cache-Control'] = 'private, no-cache'
         return response
     except Exception as e:
         print(f"Error exporting subtitles: {str(e)}")
         import traceback
         traceback.print_exc()
         return HttpResponse(
-            json.dumps({'detail': f'Error generating SRT: {str(e)}'}),
+            json.dumps({'detail': f'Error exporting subtitles: {str(e)}'}),
             content_type='application/json',
             status=500
         )
 
-
-def format_time(seconds):
-    """Convert seconds to SRT time format (HH:MM:SS,mmm)."""
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = int(seconds % 60)
-    millis = int((seconds % 1) * 1000)
-    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
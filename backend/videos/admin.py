@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Video
+from .models import UploadSession, Video, VideoBlob
 # Register your models here.
 
 admin.site.register(Video)
+admin.site.register(UploadSession)
+admin.site.register(VideoBlob)
@@ -1,18 +1,25 @@
 from rest_framework import serializers
-from videos.models import Video
+from django.conf import settings
+from django.db import transaction
+from subtitle_generator.api import SparseFieldsetMixin
+from videos.blobs import link_blob, store_blob
+from videos.models import UploadSession, Video
 
 
-class VideoSerializer(serializers.ModelSerializer):
+class VideoSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for the Video model."""
 
     user = serializers.ReadOnlyField(source='user.username')
+    content_hash = serializers.ReadOnlyField(source='blob.sha256', default=None)
+
+    field_columns = {'user': ['user__username'], 'content_hash': ['blob__sha256']}
 
     class Meta:
         model = Video
         fields = [
             'id', 'title', 'description', 'file', 'thumbnail',
             'duration', 'status', 'error_message', 'user',
-            'created_at', 'updated_at'
+            'content_hash', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'user', 'status',
                             'error_message', 'duration', 'created_at', 'updated_at']
@@ -38,4 +45,41 @@ class VideoUploadSerializer(serializers.ModelSerializer):
         """Custom create method to set the user and status."""
         validated_data['user'] = self.context['request'].user
         validated_data['status'] = 'uploading'
-        return super().create(validated_data)
+        upload = validated_data.pop('file')
+        with transaction.atomic():
+            # Identical content shares one stored file
+            video = link_blob(Video(**validated_data), store_blob(upload, upload.name))
+            video.save()
+        return video
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """Serializer for starting and inspecting a chunked upload."""
+
+    chunk_size = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UploadSession
+        fields = [
+            'id', 'filename', 'title', 'description', 'size', 'offset',
+            'chunk_size', 'status', 'video', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'offset', 'status', 'video',
+                            'created_at', 'updated_at']
+
+    def get_chunk_size(self, obj):
+        return settings.VIDEO_UPLOAD_CHUNK_SIZE
+
+    def validate_filename(self, value):
+        filename = value.replace('\\', '/').rsplit('/', 1)[-1]
+        if not filename:
+            raise serializers.ValidationError("A file name is required.")
+        return filename
+
+    def validate_size(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("The file is empty.")
+        if value > settings.VIDEO_UPLOAD_MAX_BYTES:
+            raise serializers.ValidationError(
+                f"Files larger than {settings.VIDEO_UPLOAD_MAX_BYTES} bytes are not accepted.")
+        return value
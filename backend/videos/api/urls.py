@@ -1,10 +1,14 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import VideoViewSet
+from .views import EventStreamTokenView, UploadSessionViewSet, VideoViewSet
+from videos.views import event_stream
 
 router = DefaultRouter()
 router.register(r'videos', VideoViewSet, basename='video')
+router.register(r'uploads', UploadSessionViewSet, basename='upload')
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('events/', event_stream, name='event-stream'),
+    path('events/token/', EventStreamTokenView.as_view(), name='event-stream-token'),
 ]
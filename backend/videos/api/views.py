@@ -1,9 +1,31 @@
-from rest_framework import viewsets, status, permissions
+from django.db import transaction
+from rest_framework import mixins, viewsets, status, permissions
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from videos.models import Video
-from ..tasks import process_video
-from .serializers import VideoSerializer, VideoUpdateSerializer, VideoUploadSerializer
+from rest_framework.views import APIView
+from django.conf import settings
+from subtitle_generator.events import stream_token
+from videos.models import UploadSession, Video
+from videos.uploads import (
+    ChunkError, PartialFile, create_partial_upload, parse_checksum,
+    partial_upload_path, remove_partial_upload, write_chunk
+)
+from ..tasks import start_video_pipeline
+from .serializers import (
+    UploadSessionSerializer, VideoSerializer, VideoUpdateSerializer, VideoUploadSerializer
+)
+
+
+def queue_video_processing(video):
+    """Start the processing pipeline of a newly uploaded video."""
+    try:
+        start_video_pipeline(video.id)
+    except Exception as e:
+        print(f"Failed to queue video processing pipeline: {str(e)}")
+        video.status = 'error'
+        video.error_message = 'Failed to start processing'
+        video.save()
+        video.publish_status('error')
 
 
 class VideoViewSet(viewsets.ModelViewSet):
@@ -15,7 +37,10 @@ class VideoViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Return videos for the current user only."""
-        return Video.objects.filter(user=self.request.user)
+        queryset = Video.objects.filter(user=self.request.user)
+        if self.action in ('list', 'retrieve'):
+            queryset = VideoSerializer.query_plan(queryset, self.request)
+        return queryset
 
     def get_serializer_class(self):
         """Return appropriate serializer class based on the action."""
@@ -28,13 +53,7 @@ class VideoViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         """Save the video with the current user as owner."""
         video = serializer.save(user=self.request.user, status='uploading')
-        try:
-            process_video.delay(video.id)
-        except Exception as e:
-            print(f"Failed to queue process_video task: {str(e)}")
-            video.status = 'error'
-            video.error_message = 'Failed to start processing'
-            video.save()
+        queue_video_processing(video)
         return video
 
     @action(detail=True, methods=['post'])
@@ -49,9 +68,10 @@ class VideoViewSet(viewsets.ModelViewSet):
         video.status = 'processing'
         video.error_message = None
         video.save()
+        video.publish_status('queued', 0)
 
         try:
-            process_video.delay(video.id)
+            start_video_pipeline(video.id)
             return Response({
                 'status': 'success',
                 'message': 'Video processing has been initiated.',
@@ -61,6 +81,7 @@ class VideoViewSet(viewsets.ModelViewSet):
             video.status = 'error'
             video.error_message = f"Failed to start processing: {str(e)}"
             video.save()
+            video.publish_status('error')
             return Response({
                 'status': 'error',
                 'message': f"Failed to start processing: {str(e)}"
@@ -74,3 +95,121 @@ class VideoViewSet(viewsets.ModelViewSet):
             'status': video.status,
             'error_message': video.error_message
         })
+
+
+class UploadSessionViewSet(mixins.CreateModelMixin,
+                           mixins.RetrieveModelMixin,
+                           mixins.DestroyModelMixin,
+                           viewsets.GenericViewSet):
+    """
+    Chunked, resumable video uploads.
+
+    POST creates a session from the file name and total size. Each chunk is
+    sent as a PATCH with the raw bytes as body, the ``Upload-Offset`` it
+    starts at and an ``Upload-Checksum: <algorithm> <base64 digest>``
+    header. HEAD (or GET) returns the current offset, so an interrupted
+    upload resumes from the last stored byte. Once the final chunk is stored,
+    the file is moved into ``media/videos/`` and processing starts. DELETE
+    abandons the upload.
+    """
+
+    serializer_class = UploadSessionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        """Return upload sessions for the current user only."""
+        return UploadSession.objects.filter(user=self.request.user)
+
+    def offset_headers(self, upload):
+        return {
+            'Upload-Offset': str(upload.offset),
+            'Upload-Length': str(upload.size),
+            'Cache-Control': 'no-store',
+        }
+
+    def perform_create(self, serializer):
+        upload = serializer.save(user=self.request.user)
+        create_partial_upload(upload.id)
+
+    def retrieve(self, request, *args, **kwargs):
+        upload = self.get_object()
+        return Response(self.get_serializer(upload).data,
+                        headers=self.offset_headers(upload))
+
+    def partial_update(self, request, *args, **kwargs):
+        """Append one chunk to the upload."""
+        try:
+            offset = int(request.headers['Upload-Offset'])
+            length = int(request.headers['Content-Length'])
+            algorithm, digest = parse_checksum(request.headers['Upload-Checksum'])
+        except KeyError as e:
+            return Response({'detail': f"The {e.args[0]} header is required."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        except ValueError:
+            return Response({'detail': 'Upload-Offset and Content-Length must be integers.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        except ChunkError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if length > settings.VIDEO_UPLOAD_CHUNK_SIZE:
+            return Response({'detail': f'Chunks may not exceed {settings.VIDEO_UPLOAD_CHUNK_SIZE} bytes.'},
+                            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+        with transaction.atomic():
+            # Lock the session so concurrent chunks cannot interleave
+            upload = self.get_queryset().select_for_update().get(pk=self.get_object().pk)
+            headers = self.offset_headers(upload)
+
+            if upload.status != 'uploading':
+                return Response({'detail': 'This upload is already complete.'},
+                                status=status.HTTP_409_CONFLICT, headers=headers)
+            if offset != upload.offset:
+                return Response({'detail': f'Expected a chunk at offset {upload.offset}.',
+                                 'offset': upload.offset},
+                                status=status.HTTP_409_CONFLICT, headers=headers)
+            if offset + length > upload.size:
+                return Response({'detail': 'Chunk extends past the declared upload size.'},
+                                status=status.HTTP_400_BAD_REQUEST, headers=headers)
+
+            try:
+                upload.offset = write_chunk(
+                    upload.id, offset, request.stream, length, algorithm, digest)
+            except ChunkError as e:
+                return Response({'detail': str(e), 'offset': upload.offset},
+                                status=status.HTTP_400_BAD_REQUEST, headers=headers)
+
+            if upload.offset == upload.size:
+                self.assemble(upload)
+            upload.save()
+
+        if upload.video_id:
+            transaction.on_commit(lambda: queue_video_processing(upload.video))
+        return Response(self.get_serializer(upload).data,
+                        headers=self.offset_headers(upload))
+
+    def assemble(self, upload):
+        """
+        Move the completed file into place and create its Video. Hashing it
+        and reusing identical content is left to the prepare stage, so the
+        last chunk is answered as quickly as the others.
+        """
+        video = Video(user=upload.user, title=upload.title,
+                      description=upload.description, status='uploading')
+        with open(partial_upload_path(upload.id), 'rb') as partial:
+            video.file.save(upload.filename, PartialFile(partial), save=False)
+        video.save()
+        remove_partial_upload(upload.id)
+        upload.video = video
+        upload.status = 'completed'
+
+
+class EventStreamTokenView(APIView):
+    """Issue a short-lived token that opens the current user's event stream."""
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        return Response({
+            'token': stream_token(request.user),
+            'expires_in': settings.EVENTS_STREAM_TOKEN_MAX_AGE,
+        })
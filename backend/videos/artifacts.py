@@ -0,0 +1,37 @@
+import json
+import os
+import shutil
+import tempfile
+from django.conf import settings
+
+
+def artifact_dir(video_id):
+    """Directory holding the intermediate pipeline artifacts of a video."""
+    return os.path.join(settings.MEDIA_ROOT, 'artifacts', str(video_id))
+
+
+def segments_checkpoint_path(video_id, language):
+    return os.path.join(artifact_dir(video_id), f'segments_{language}.json')
+
+
+def write_checkpoint(path, data):
+    """Write a JSON checkpoint atomically so a crash never leaves a partial file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as checkpoint:
+        json.dump(data, checkpoint)
+    os.replace(temp_path, path)
+
+
+def read_checkpoint(path):
+    """Return the checkpoint stored at ``path``, or None if there is none."""
+    try:
+        with open(path, 'r', encoding='utf-8') as checkpoint:
+            return json.load(checkpoint)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def clear_artifacts(video_id):
+    """Remove every intermediate artifact of a video."""
+    shutil.rmtree(artifact_dir(video_id), ignore_errors=True)
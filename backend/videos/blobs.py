@@ -0,0 +1,75 @@
+import hashlib
+import os
+from django.core.files import File
+from django.db import IntegrityError, transaction
+from videos.cleanup import remove_file
+from videos.models import VideoBlob
+from videos.uploads import PartialFile
+
+
+def hash_content(content):
+    """SHA-256 of a Django File, read in chunks."""
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def store_blob(content, filename, sha256=None):
+    """
+    Return the blob holding ``content``, storing it only if it is new.
+
+    Pass the content's ``sha256`` when it is known; uploads received through
+    the hashing upload handlers carry it as their ``sha256`` attribute.
+    Otherwise the content is read once more to hash it. Identical content
+    that is already stored is reused and the new copy discarded; otherwise
+    the file is saved (moved, for files already on disk) under its content
+    address. Call it inside the transaction that saves the referencing
+    video, so the blob cannot be released in between.
+    """
+    sha256 = sha256 or getattr(content, 'sha256', None) or hash_content(content)
+    blob = VideoBlob(sha256=sha256, size=content.size)
+    try:
+        with transaction.atomic():
+            existing = VideoBlob.objects.select_for_update().filter(sha256=sha256).first()
+            if existing is not None:
+                return existing
+            blob.file.save(filename, content, save=False)
+            blob.save()
+            return blob
+    except IntegrityError:
+        # Another upload of the same content stored it first
+        blob.file.delete(save=False)
+        return VideoBlob.objects.get(sha256=sha256)
+
+
+def link_blob(video, blob):
+    """Point a (not yet saved) video at a shared blob."""
+    video.blob = blob
+    video.file.name = blob.file.name
+    return video
+
+
+def adopt_blob(video):
+    """
+    Move a video's own file under its content address, or link the video to
+    an identical stored blob and remove its copy.
+
+    Chunked uploads are hashed only here, after assembly: the per-chunk
+    checksums clients send cover single chunks and cannot be combined into
+    the file's SHA-256. They are stored as plain files when their last chunk
+    arrives and adopted by the prepare stage, so this extra read of a large
+    file never holds up the request (and upload lock) that completed it.
+    """
+    path = video.file.path
+    with open(path, 'rb') as source:
+        # Hashed outside the transaction; only the lookup and link hold locks
+        sha256 = hash_content(File(source))
+        with transaction.atomic():
+            blob = store_blob(PartialFile(source), os.path.basename(video.file.name), sha256)
+            link_blob(video, blob)
+            video.save(update_fields=['blob', 'file', 'updated_at'])
+    if blob.file.path != path:
+        # Identical content was already stored (a new blob moved the file away)
+        remove_file(path)
+    return blob
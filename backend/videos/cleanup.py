@@ -0,0 +1,125 @@
+import contextvars
+import logging
+import os
+import shutil
+from contextlib import contextmanager
+from subtitles.cache import file_identity_key, forget_audio
+
+logger = logging.getLogger(__name__)
+
+_pending = contextvars.ContextVar('pending_storage_cleanup', default=None)
+
+
+class StorageCleanup:
+    """
+    Stored files to remove once a deletion has committed.
+
+    ``media`` holds ``[path, content_hash]`` pairs of video files, whose
+    memoized audio fingerprints are dropped with them.
+    ``blob_ids`` are blobs that may have lost their last video.
+    """
+
+    def __init__(self):
+        self.files = []
+        self.directories = []
+        self.media = []
+        self.blob_ids = set()
+
+    def __bool__(self):
+        return bool(self.files or self.directories or self.media)
+
+    def batches(self, size):
+        """Split into ``{"files", "directories", "media"}`` dicts of at most ``size`` entries."""
+        entries = ([('files', path) for path in self.files]
+                   + [('directories', path) for path in self.directories]
+                   + [('media', entry) for entry in self.media])
+        for start in range(0, len(entries), size):
+            batch = {'files': [], 'directories': [], 'media': []}
+            for kind, entry in entries[start:start + size]:
+                batch[kind].append(entry)
+            yield batch
+
+
+@contextmanager
+def deferred_cleanup():
+    """
+    Record the files that deletions inside the block would remove instead of
+    removing them, so a bulk delete does no storage I/O while its
+    transaction is open. Deferred cleanup purges whole accounts, so it also
+    drops the memoized audio fingerprints of removed media.
+    """
+    cleanup = StorageCleanup()
+    token = _pending.set(cleanup)
+    try:
+        yield cleanup
+    finally:
+        _pending.reset(token)
+
+
+def pending_cleanup():
+    """The StorageCleanup collecting removals, or None when they happen immediately."""
+    return _pending.get()
+
+
+def remove_file(path):
+    cleanup = _pending.get()
+    if cleanup is not None:
+        cleanup.files.append(path)
+        return
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def remove_directory(path):
+    cleanup = _pending.get()
+    if cleanup is not None:
+        cleanup.directories.append(path)
+        return
+    shutil.rmtree(path, ignore_errors=True)
+
+
+def remove_media(path, content_hash=None):
+    """Remove a stored video file (a blob's when ``content_hash`` is given)."""
+    cleanup = _pending.get()
+    if cleanup is not None:
+        cleanup.media.append([path, content_hash])
+        return
+    remove_file(path)
+
+
+def clean_storage(files=(), directories=(), media=()):
+    """
+    Remove stored files and directories, skipping those already gone. Errors
+    are logged and the rest still removed; returns the number of failures.
+    """
+    failures = 0
+    for path, content_hash in media:
+        try:
+            # A file's identity is read from disk, so forget its audio first
+            if content_hash:
+                forget_audio(f"blob:{content_hash}")
+            elif os.path.exists(path):
+                forget_audio(file_identity_key(path))
+        except Exception as e:
+            logger.error(f"Failed to drop cached audio of {path}: {str(e)}")
+
+    for path in [*files, *(path for path, _ in media)]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            failures += 1
+            logger.error(f"Failed to remove {path}: {str(e)}")
+
+    for path in directories:
+        try:
+            shutil.rmtree(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            failures += 1
+            logger.error(f"Failed to remove {path}: {str(e)}")
+    return failures
@@ -0,0 +1,75 @@
+from moviepy import VideoFileClip
+
+
+class MediaProbe:
+    """
+    Open a media container once and expose its metadata to every pipeline stage.
+
+    Wraps a single ``VideoFileClip`` so the thumbnail, duration and audio
+    extraction steps of a task share one ffmpeg probe instead of each opening
+    the file again. Use it as a context manager so the readers are closed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.clip = VideoFileClip(path)
+        infos = self.clip.reader.infos
+
+        self.duration = self.clip.duration
+        self.size = tuple(infos.get('video_size') or self.clip.size)
+        self.fps = infos.get('video_fps') or self.clip.fps
+        self.video_codec = infos.get('video_codec_name')
+        self.has_audio = self.clip.audio is not None
+        self.audio_fps = infos.get('audio_fps') if self.has_audio else None
+        self.streams = [
+            {
+                'type': stream.get('stream_type'),
+                'codec': stream.get('codec_name'),
+                'language': stream.get('language'),
+            }
+            for media_input in infos.get('inputs', [])
+            for stream in media_input.get('streams', [])
+        ]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def width(self):
+        return self.size[0]
+
+    @property
+    def height(self):
+        return self.size[1]
+
+    def save_frame(self, output_path, t=1):
+        """Save the frame at time ``t`` (clamped to the clip) as an image."""
+        t = min(t, max(self.duration - 0.1, 0)) if self.duration else 0
+        self.clip.save_frame(output_path, t=t)
+
+    def write_audio(self, output_path):
+        """Write the audio track to ``output_path``."""
+        if not self.has_audio:
+            raise ValueError(f"Video {self.path} has no audio stream")
+        self.clip.audio.write_audiofile(output_path, logger=None)
+
+    def close(self):
+        if self.clip is not None:
+            self.clip.close()
+            self.clip = None
+
+    def as_dict(self):
+        """Return the probed metadata as a JSON-serializable dict."""
+        return {
+            'duration': self.duration,
+            'width': self.width,
+            'height': self.height,
+            'fps': self.fps,
+            'video_codec': self.video_codec,
+            'has_audio': self.has_audio,
+            'audio_fps': self.audio_fps,
+            'streams': self.streams,
+        }
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.7 on 2026-10-18 05:09
+
+import django.db.models.deletion
+import videos.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('videos', '0002_uploadsession'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VideoBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('file', models.FileField(max_length=255, upload_to=videos.models.blob_upload_to)),
+                ('size', models.BigIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='video',
+            name='file',
+            field=models.FileField(max_length=255, upload_to='videos/'),
+        ),
+        migrations.AddField(
+            model_name='video',
+            name='blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='videos', to='videos.videoblob'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-18 05:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('videos', '0003_videoblob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='video',
+            index=models.Index(fields=['user', '-created_at'], name='video_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='video',
+            index=models.Index(fields=['user', 'status'], name='video_user_status_idx'),
+        ),
+    ]
@@ -1,8 +1,56 @@
 import os
+import uuid
 from django.dispatch import receiver
-from django.db.models.signals import pre_delete
-from django.db import models
+from django.db.models.signals import post_delete, pre_delete
+from django.db import models, transaction
 from django.conf import settings
+from subtitle_generator.events import publish_event
+from videos.artifacts import artifact_dir
+from videos.cleanup import pending_cleanup, remove_directory, remove_file, remove_media
+from videos.uploads import partial_upload_path
+
+
+def blob_upload_to(instance, filename):
+    """Blobs are addressed by their content hash, fanned out over subdirectories."""
+    extension = os.path.splitext(filename)[1].lower()
+    return f'blobs/{instance.sha256[:2]}/{instance.sha256}{extension}'
+
+
+class VideoBlob(models.Model):
+    """
+    A stored video file, shared by every Video with identical content.
+    The blob is deleted with its last referencing video.
+    """
+
+    sha256 = models.CharField(max_length=64, unique=True)
+    file = models.FileField(upload_to=blob_upload_to, max_length=255)
+    size = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.sha256
+
+    @classmethod
+    def release(cls, blob_id):
+        """Delete the blob and its file if no video references it anymore."""
+        with transaction.atomic():
+            # Lock the blob so a concurrent upload cannot link to it meanwhile
+            blob = cls.objects.select_for_update().filter(pk=blob_id).first()
+            if blob is None or blob.videos.exists():
+                return
+            remove_media(blob.file.path, blob.sha256)
+            blob.delete()
+            print(f"Deleted video blob: {blob.sha256}")
+
+    @classmethod
+    def release_unreferenced(cls, blob_ids):
+        """Delete those of ``blob_ids`` that no video references anymore, in bulk."""
+        with transaction.atomic():
+            blobs = list(cls.objects.select_for_update().filter(pk__in=blob_ids).exclude(
+                pk__in=Video.objects.filter(blob_id__in=blob_ids).values('blob_id')))
+            for blob in blobs:
+                remove_media(blob.file.path, blob.sha256)
+            cls.objects.filter(pk__in=[blob.pk for blob in blobs]).delete()
 
 
 class Video(models.Model):
@@ -17,7 +65,9 @@ class Video(models.Model):
 
     title = models.CharField(max_length=255)
     description = models.TextField(null=True, blank=True)
-    file = models.FileField(upload_to='videos/')
+    file = models.FileField(upload_to='videos/', max_length=255)
+    blob = models.ForeignKey(VideoBlob, on_delete=models.PROTECT,
+                             null=True, blank=True, related_name='videos')
     thumbnail = models.ImageField(
         upload_to='thumbnails/', null=True, blank=True)
 
@@ -32,26 +82,89 @@ class Video(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # A user's videos, newest first (the dashboard list)
+            models.Index(fields=['user', '-created_at'], name='video_user_created_idx'),
+            # A user's videos by status
+            models.Index(fields=['user', 'status'], name='video_user_status_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
+    def publish_status(self, stage=None, progress=None):
+        """Push the current status to the owner's live event stream."""
+        publish_event(
+            self.user_id,
+            'video_status',
+            video_id=self.id,
+            status=self.status,
+            stage=stage,
+            progress=progress,
+            error_message=self.error_message
+        )
+
+
+class UploadSession(models.Model):
+    """A chunked, resumable video upload, assembled into a Video once complete."""
+
+    STATUS_CHOICES = (
+        ('uploading', 'Uploading'),
+        ('completed', 'Completed'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL,
+                             on_delete=models.CASCADE, related_name='upload_sessions')
+    filename = models.CharField(max_length=255)
+    title = models.CharField(max_length=255)
+    description = models.TextField(null=True, blank=True)
+
+    size = models.BigIntegerField()
+    offset = models.BigIntegerField(default=0)
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default='uploading')
+    video = models.ForeignKey(Video, on_delete=models.SET_NULL,
+                              null=True, blank=True, related_name='+')
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
+
 
 @receiver(pre_delete, sender=Video)
 def delete_video_files(sender, instance, **kwargs):
     """
-    Delete video file and thumbnail when Video instance is deleted.
+    Delete video file, thumbnail and pipeline artifacts when Video instance is deleted.
     """
-    # Delete video file
-    if instance.file:
-        if os.path.isfile(instance.file.path):
-            os.remove(instance.file.path)
-            print(f"Deleted video file: {instance.file.path}")
+    # Delete video file, unless it is a blob shared with other videos
+    if instance.file and not instance.blob_id:
+        remove_media(instance.file.path)
 
     # Delete thumbnail
     if instance.thumbnail:
-        try:
-            if os.path.isfile(instance.thumbnail.path):
-                os.remove(instance.thumbnail.path)
-                print(f"Deleted thumbnail: {instance.thumbnail.path}")
-        except Exception as e:
-            print(f"Error deleting thumbnail: {str(e)}")
+        remove_file(instance.thumbnail.path)
+
+    # Delete intermediate pipeline artifacts
+    remove_directory(artifact_dir(instance.id))
+
+
+@receiver(post_delete, sender=Video)
+def release_video_blob(sender, instance, **kwargs):
+    """Delete a video's blob once no other video references it."""
+    if instance.blob_id:
+        cleanup = pending_cleanup()
+        if cleanup is not None:
+            # Released in bulk once the whole deletion is done
+            cleanup.blob_ids.add(instance.blob_id)
+        else:
+            VideoBlob.release(instance.blob_id)
+
+
+@receiver(pre_delete, sender=UploadSession)
+def delete_partial_upload(sender, instance, **kwargs):
+    """Delete the partially received file of an abandoned upload."""
+    remove_file(partial_upload_path(instance.id))
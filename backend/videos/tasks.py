@@ -1,10 +1,16 @@
 import os
-from moviepy import VideoFileClip
-from celery import shared_task
+import shutil
+from celery import chain, shared_task
 from videos.models import Video
+from videos.media import MediaProbe
+from videos.blobs import adopt_blob
+from videos.artifacts import read_checkpoint, segments_checkpoint_path, write_checkpoint
+from videos.cleanup import clean_storage, remove_file
 from django.conf import settings
+from django.db import transaction
+from subtitle_generator.celery import stage_options
 from subtitles.models import Subtitle
-from subtitles.utils import generate_subtitles_for_video
+from subtitles.utils import get_or_create_transcript, group_segments_into_subtitles
 import logging
 
 file_name = "tasks.log"
@@ -17,68 +23,247 @@ file_handler.setFormatter(formatter)
 logger.addHandler(file_handler)
 
 
-@shared_task
-def process_video(video_id):
-    logger.info(f"Starting process_video task for video_id={video_id}")
+def retry_or_fail(task, video, exc):
+    """
+    Retry a pipeline stage, or mark the video as failed once retries run out.
+    Completed stages are checkpointed, so a retry resumes where it failed.
+    """
+    if task.request.retries < task.max_retries:
+        logger.warning(
+            f"{task.name} failed for video ID {video.id}, retrying: {str(exc)}")
+        raise task.retry(exc=exc, countdown=10 * 2 ** task.request.retries)
+
+    logger.error(f"Error processing video {video.id}: {str(exc)}")
+    video.status = 'error'
+    video.error_message = str(exc)
+    video.save()
+    video.publish_status('error')
+    raise exc
+
+
+def reuse_prepared_twin(video, thumbnail_path):
+    """
+    Copy the duration and thumbnail of an already prepared video with the same
+    content blob. Returns False when there is none.
+    """
+    if not video.blob_id:
+        return False
+    twin = Video.objects.filter(
+        blob_id=video.blob_id, duration__isnull=False
+    ).exclude(pk=video.pk).exclude(thumbnail='').first()
+    if twin is None or not os.path.exists(twin.thumbnail.path):
+        return False
+
+    os.makedirs(os.path.dirname(thumbnail_path), exist_ok=True)
+    shutil.copyfile(twin.thumbnail.path, thumbnail_path)
+    video.thumbnail = os.path.relpath(thumbnail_path, settings.MEDIA_ROOT)
+    video.duration = twin.duration
+    video.save(update_fields=['thumbnail', 'duration', 'updated_at'])
+    return True
+
+
+@shared_task(bind=True, max_retries=2)
+def prepare_video(self, video_id, language='en'):
+    """
+    Stage 1 (ffmpeg, CPU bound): probe the container and render the thumbnail.
+    Once the duration is known, queues the remaining stages with queues and
+    time limits sized for it.
+    """
+    logger.info(f"Starting prepare_video task for video_id={video_id}")
     video = Video.objects.filter(id=video_id).first()
 
     if not video:
         logger.error(f"No video found with ID {video_id}")
         return
 
+    thumbnail_path = os.path.join(
+        settings.MEDIA_ROOT, 'thumbnails', f'{video.id}.jpg')
+    if video.duration is not None and os.path.exists(thumbnail_path):
+        logger.info(f"Video ID {video_id} already prepared, skipping")
+        build_video_pipeline(video_id, language, video.duration).apply_async()
+        return
+
     try:
-        # Step 1: Generate thumbnail
-        logger.info(f"Generating thumbnail for video ID {video_id}...")
-        thumbnail_path = os.path.join(
-            settings.MEDIA_ROOT, 'thumbnails', f'{video.id}.jpg')
-        os.makedirs(os.path.dirname(thumbnail_path), exist_ok=True)
+        if video.status != 'processing':
+            video.status = 'processing'
+            video.error_message = None
+            video.save(update_fields=['status', 'error_message', 'updated_at'])
+        video.publish_status('probing', 0)
+
+        if not video.blob_id and video.file:
+            # Completed chunked uploads are hashed and deduplicated here
+            adopt_blob(video)
 
+        if reuse_prepared_twin(video, thumbnail_path):
+            logger.info(f"Reused probe results of identical content for video ID {video_id}")
+            build_video_pipeline(video_id, language, video.duration).apply_async()
+            return
+
+        # Open the container once for metadata and the thumbnail
         logger.info(f"Video file path: {video.file.path}")
-        clip = VideoFileClip(video.file.path)
-        clip.save_frame(thumbnail_path, t=1)
+        with MediaProbe(video.file.path) as probe:
+            logger.info(
+                f"Probed video ID {video_id}: {probe.as_dict()}")
+
+            logger.info(f"Generating thumbnail for video ID {video_id}...")
+            video.publish_status('thumbnail', 5)
+            os.makedirs(os.path.dirname(thumbnail_path), exist_ok=True)
+            probe.save_frame(thumbnail_path, t=1)
+
+            video.thumbnail = os.path.relpath(
+                thumbnail_path, settings.MEDIA_ROOT)
+            video.duration = probe.duration
 
-        video.thumbnail = os.path.relpath(thumbnail_path, settings.MEDIA_ROOT)
-        video.duration = clip.duration  # Set duration here
-        clip.close()
+        video.save(update_fields=['thumbnail', 'duration', 'updated_at'])
         logger.info(
             f"Thumbnail generated successfully for video ID {video_id}")
+    except Exception as e:
+        retry_or_fail(self, video, e)
+
+    build_video_pipeline(video_id, language, video.duration).apply_async()
+
+
+@shared_task(bind=True, max_retries=3)
+def transcribe_video(self, video_id, language='en'):
+    """Stage 2 (network or ASR bound): transcribe the audio and checkpoint the raw segments."""
+    logger.info(f"Starting transcribe_video task for video_id={video_id}")
+    video = Video.objects.select_related('blob').filter(id=video_id).first()
+
+    if not video:
+        logger.error(f"No video found with ID {video_id}")
+        return
+
+    checkpoint_path = segments_checkpoint_path(video_id, language)
+    if read_checkpoint(checkpoint_path) is not None:
+        logger.info(f"Video ID {video_id} already transcribed, skipping")
+        return
 
-        # Step 2: Generate subtitles with unique video path
+    try:
         logger.info(f"Generating subtitles for video ID {video_id}...")
-        transcript, subtitles_json, _ = generate_subtitles_for_video(
-            video.file.path, 'en')
+        video.publish_status('transcribing', 10)
+        transcript, segments = get_or_create_transcript(
+            video.file.path, video.duration, language,
+            progress=video.publish_status,
+            content_hash=video.blob.sha256 if video.blob_id else None)
+
+        write_checkpoint(checkpoint_path, {
+            'transcript': transcript,
+            'segments': segments,
+        })
         logger.info(
-            f"Subtitles generated successfully for video ID {video_id}")
+            f"Transcript checkpointed for video ID {video_id}")
+    except Exception as e:
+        retry_or_fail(self, video, e)
+
+
+@shared_task(bind=True, max_retries=3)
+def save_subtitles(self, video_id, language='en'):
+    """Stage 3 (database): build subtitles from the checkpoint and mark the video ready."""
+    logger.info(f"Starting save_subtitles task for video_id={video_id}")
+    video = Video.objects.filter(id=video_id).first()
+
+    if not video:
+        logger.error(f"No video found with ID {video_id}")
+        return
+
+    checkpoint_path = segments_checkpoint_path(video_id, language)
+    try:
+        checkpoint = read_checkpoint(checkpoint_path)
+        if checkpoint is None:
+            raise ValueError(
+                f"No transcript checkpoint found for video ID {video_id}")
 
-        # Step 3: Save subtitles to the database
         logger.info(f"Saving subtitles to database for video ID {video_id}...")
+        video.publish_status('saving', 95)
+        subtitles_json = group_segments_into_subtitles(checkpoint['segments'])
 
-        # Check if subtitles already exist and delete them
-        existing_subtitles = Subtitle.objects.filter(video=video)
-        if existing_subtitles.exists():
-            logger.warning(
-                f"Found existing subtitles for video ID {video_id}, deleting...")
-            existing_subtitles.delete()
-
-        Subtitle.objects.create(
-            video=video,
-            user=video.user,
-            transcript=transcript,
-            subtitles_json=subtitles_json,
-            language='en'
-        )
+        # Replace existing subtitles and flip the status in one transaction
+        with transaction.atomic():
+            Subtitle.save_generated(
+                video.id, video.user, language, checkpoint['transcript'], subtitles_json)
+            video.status = "ready"
+            video.error_message = None
+            video.save()
         logger.info(f"Subtitles saved successfully for video ID {video_id}")
+    except Exception as e:
+        retry_or_fail(self, video, e)
 
-        # Step 4: Update video status to "ready"
-        video.status = "ready"
-        video.save()
-        logger.info(
-            f"Video {video_id} processed successfully and status set to 'ready'")
-        logger.info(
-            "**********************************************************")
+    # The subtitles are committed, so nothing below may fail or retry the stage
+    try:
+        remove_file(checkpoint_path)
+    except OSError as e:
+        logger.error(
+            f"Failed to remove transcript checkpoint of video ID {video_id}: {str(e)}")
+    try:
+        video.publish_status('ready', 100)
     except Exception as e:
-        logger.error(f"Error processing video {video_id}: {str(e)}")
-        video.status = 'error'
-        video.error_message = str(e)
-        video.save()
-        raise
+        logger.error(f"Failed to publish ready status of video ID {video_id}: {str(e)}")
+    logger.info(
+        f"Video {video_id} processed successfully and status set to 'ready'")
+    logger.info(
+        "**********************************************************")
+
+
+def build_video_pipeline(video_id, language='en', duration=None):
+    """
+    Return the stages that follow ``prepare_video`` as a Celery chain.
+    Each stage is a separate task routed to its own queue with time limits
+    scaled to ``duration``, and is idempotent, so re-running the chain skips
+    the stages already done.
+    """
+    return chain(
+        transcribe_video.si(video_id, language).set(
+            **stage_options('transcribe', duration)),
+        save_subtitles.si(video_id, language).set(
+            **stage_options('save', duration)),
+    )
+
+
+def start_video_pipeline(video_id, language='en'):
+    """
+    Queue the staged processing pipeline for a video.
+    The duration is unknown until the probe stage runs, so small uploads are
+    sent to the priority queue based on their file size.
+    """
+    video = Video.objects.filter(id=video_id).first()
+    short = False
+    if video and video.file:
+        try:
+            short = video.file.size <= settings.CELERY_SHORT_CLIP_BYTES
+        except OSError:
+            pass
+
+    return prepare_video.apply_async(
+        (video_id, language), **stage_options('probe', short=short))
+
+
+@shared_task
+def process_video(video_id):
+    """Queue the staged pipeline; kept so already queued messages still run."""
+    logger.info(f"Starting process_video task for video_id={video_id}")
+    start_video_pipeline(video_id)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def cleanup_storage_task(self, files=(), directories=(), media=()):
+    """
+    Remove stored files left behind by a bulk deletion (see
+    ``videos.cleanup.deferred_cleanup``). Missing files are skipped, so a
+    retried batch only finishes what failed.
+    """
+    failures = clean_storage(files, directories, media)
+    logger.info(
+        f"Storage cleanup removed {len(files) + len(directories) + len(media) - failures} "
+        f"entries, {failures} failed")
+    if failures and self.request.retries < self.max_retries:
+        raise self.retry()
+
+
+def queue_storage_cleanup(cleanup):
+    """Queue the removals collected in ``cleanup`` as batches of cleanup_storage_task."""
+    for batch in cleanup.batches(settings.STORAGE_CLEANUP_BATCH_SIZE):
+        try:
+            cleanup_storage_task.delay(**batch)
+        except Exception as e:
+            logger.error(f"Failed to queue storage cleanup: {str(e)}")
+
@@ -1,3 +1,391 @@
-from django.test import TestCase
+import base64
+import hashlib
+import json
+import os
+import tempfile
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.files import File
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import transaction
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from subtitle_generator.celery import app, stage_options
+from subtitle_generator.events import stream_token
+from subtitles.models import Subtitle
+from subtitles.tests import make_test_video
+from subtitles.transcription import StubBackend
+from videos.artifacts import segments_checkpoint_path
+from videos.blobs import adopt_blob
+from videos.models import UploadSession, Video, VideoBlob
+from videos.uploads import partial_upload_path
+from videos.tasks import start_video_pipeline, transcribe_video
 
-# Create your tests here.
+
+async def fake_subscription(user_id, heartbeat=15):
+    yield "retry: 5000\n\n"
+    yield 'event: video_status\ndata: {"type": "video_status", "video_id": 99}\n\n'
+
+
+@override_settings(EVENTS_REDIS_URL='')
+class EventStreamTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='alice', email='alice@example.com', password='secret')
+        self.token = Token.objects.create(user=self.user)
+        self.video = Video.objects.create(
+            user=self.user, title='Sample', file='videos/sample.mp4', status='processing')
+        Video.objects.create(
+            user=self.user, title='Done', file='videos/done.mp4', status='ready')
+
+    def test_requires_token(self):
+        response = self.client.get('/api/events/')
+        self.assertEqual(response.status_code, 401)
+
+        # The long-lived API token is not accepted in the URL
+        for token in ('invalid', self.token.key):
+            response = self.client.get('/api/events/', {'token': token})
+            self.assertEqual(response.status_code, 401)
+
+        self.assertEqual(self.client.post('/api/events/token/').status_code, 401)
+        response = self.client.post(
+            '/api/events/token/', HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.assertEqual(response.json()['expires_in'], 60)
+        stream_token = response.json()['token']
+        self.assertEqual(
+            self.client.get('/api/events/', {'token': stream_token}).status_code, 503)
+        with override_settings(EVENTS_STREAM_TOKEN_MAX_AGE=-1):
+            self.assertEqual(
+                self.client.get('/api/events/', {'token': stream_token}).status_code, 401)
+        response = self.client.get(
+            '/api/events/', HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.assertEqual(response.status_code, 503)
+
+    def test_refused_without_redis_or_asgi(self):
+        response = self.client.get('/api/events/', {'token': stream_token(self.user)})
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('disabled', response.json()['detail'])
+
+        with override_settings(EVENTS_REDIS_URL='redis://127.0.0.1:6379/1'):
+            response = self.client.get('/api/events/', {'token': stream_token(self.user)})
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('ASGI', response.json()['detail'])
+
+    @override_settings(EVENTS_REDIS_URL='redis://127.0.0.1:6379/1')
+    def test_events_are_published_once_committed(self):
+        with mock.patch('subtitle_generator.events.get_redis') as get_redis:
+            with self.captureOnCommitCallbacks(execute=True):
+                with transaction.atomic():
+                    self.video.publish_status('transcribing', 10)
+                    get_redis.return_value.publish.assert_not_called()
+            get_redis.return_value.publish.assert_called_once()
+
+            try:
+                with transaction.atomic():
+                    self.video.publish_status('saving', 95)
+                    raise RuntimeError('rolled back')
+            except RuntimeError:
+                pass
+        get_redis.return_value.publish.assert_called_once()
+
+    @override_settings(EVENTS_REDIS_URL='redis://127.0.0.1:6379/1')
+    @mock.patch('videos.views.subscribe_user_events', fake_subscription)
+    async def test_streams_snapshot_then_published_events(self):
+        response = await self.async_client.get(
+            '/api/events/', {'token': stream_token(self.user)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        messages = [message async for message in response.streaming_content]
+        self.assertEqual(messages[0], b"retry: 5000\n\n")
+
+        snapshot = json.loads(messages[1].decode().split('data: ', 1)[1])
+        self.assertEqual(snapshot['video_id'], self.video.id)
+        self.assertEqual(snapshot['status'], 'processing')
+        self.assertIn(b'"video_id": 99', messages[2])
+        self.assertEqual(len(messages), 3)
+
+
+@override_settings(SUBTITLE_TRANSCRIPTION_BACKEND='stub', SUBTITLE_TRANSCRIPT_CACHE='',
+                   EVENTS_REDIS_URL='')
+class VideoPipelineTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tempdir = tempfile.TemporaryDirectory()
+        cls.media_settings = override_settings(MEDIA_ROOT=cls.tempdir.name)
+        cls.media_settings.enable()
+        cls.video_path = os.path.join(cls.tempdir.name, 'source.mp4')
+        make_test_video(cls.video_path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.media_settings.disable()
+        cls.tempdir.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='alice', email='alice@example.com', password='secret')
+        with open(self.video_path, 'rb') as source:
+            self.video = Video.objects.create(
+                user=self.user, title='Sample', file=File(source, name='sample.mp4'))
+
+        # Run the chained stages in-process instead of through a broker
+        always_eager = app.conf.task_always_eager
+        app.conf.task_always_eager = True
+        self.addCleanup(setattr, app.conf, 'task_always_eager', always_eager)
+
+    def test_pipeline_processes_video(self):
+        start_video_pipeline(self.video.id)
+
+        self.video.refresh_from_db()
+        self.assertEqual(self.video.status, 'ready')
+        self.assertAlmostEqual(self.video.duration, 3, places=0)
+        self.assertTrue(self.video.thumbnail)
+        subtitle = Subtitle.objects.get(video=self.video, language='en')
+        self.assertEqual(subtitle.transcript, StubBackend.text)
+        self.assertFalse(os.path.exists(segments_checkpoint_path(self.video.id, 'en')))
+
+    def test_retry_resumes_after_last_checkpoint(self):
+        original_save = Subtitle.save_generated
+        attempts = []
+
+        def flaky_save(*args):
+            attempts.append(args)
+            if len(attempts) == 1:
+                raise RuntimeError('database went away')
+            return original_save(*args)
+
+        with mock.patch('videos.tasks.get_or_create_transcript',
+                        return_value=('hello', [{'start': 0.0, 'end': 1.0, 'text': 'hello'}])) as transcribe, \
+                mock.patch.object(Subtitle, 'save_generated', side_effect=flaky_save):
+            start_video_pipeline(self.video.id)
+
+        self.assertEqual(transcribe.call_count, 1)
+        self.assertEqual(len(attempts), 2)
+        self.video.refresh_from_db()
+        self.assertEqual(self.video.status, 'ready')
+
+    def test_cleanup_after_saving_never_fails_the_stage(self):
+        original_publish = Video.publish_status
+
+        def publish_status(video, stage=None, progress=None):
+            if stage == 'ready':
+                raise RuntimeError('publisher crashed')
+            return original_publish(video, stage, progress)
+
+        with mock.patch.object(Video, 'publish_status', publish_status), \
+                mock.patch('videos.tasks.remove_file', side_effect=PermissionError('busy')):
+            start_video_pipeline(self.video.id)
+        checkpoint_path = segments_checkpoint_path(self.video.id, 'en')
+        self.addCleanup(os.remove, checkpoint_path)
+
+        self.video.refresh_from_db()
+        self.assertEqual(self.video.status, 'ready')
+        self.assertIsNone(self.video.error_message)
+        self.assertTrue(Subtitle.objects.filter(video=self.video, language='en').exists())
+
+    def test_exhausted_retries_mark_video_failed(self):
+        with mock.patch('videos.tasks.get_or_create_transcript',
+                        side_effect=IOError('upstream unavailable')) as transcribe:
+            start_video_pipeline(self.video.id)
+
+        self.assertEqual(transcribe.call_count, transcribe_video.max_retries + 1)
+        self.video.refresh_from_db()
+        self.assertEqual(self.video.status, 'error')
+        self.assertEqual(self.video.error_message, 'upstream unavailable')
+        self.assertFalse(Subtitle.objects.filter(video=self.video).exists())
+
+
+class StageOptionsTests(TestCase):
+
+    def test_time_limits_scale_with_duration(self):
+        options = stage_options('transcribe', duration=3600)
+        self.assertEqual(options['queue'], 'transcribe')
+        self.assertEqual(options['soft_time_limit'], 300 + 3600)
+        self.assertEqual(options['time_limit'], 300 + 3600 + 60)
+
+    @override_settings(CELERY_MAX_TIME_LIMIT=7200)
+    def test_time_limits_stay_below_broker_ack_timeout(self):
+        options = stage_options('render', duration=3600)
+        self.assertEqual(options['time_limit'], 7200)
+        self.assertEqual(options['soft_time_limit'], 7200 - 60)
+
+    def test_short_clips_use_priority_queue(self):
+        self.assertEqual(stage_options('transcribe', duration=30)['queue'], 'priority')
+        self.assertEqual(stage_options('probe', short=True)['queue'], 'priority')
+        self.assertEqual(stage_options('probe', short=False)['queue'], 'probe')
+
+
+def checksum_header(data):
+    return 'sha256 ' + base64.b64encode(hashlib.sha256(data).digest()).decode()
+
+
+@override_settings(EVENTS_REDIS_URL='', VIDEO_UPLOAD_CHUNK_SIZE=4)
+class UploadSessionTests(TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+        media_settings = override_settings(MEDIA_ROOT=self.tempdir.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+        self.user = get_user_model().objects.create_user(
+            username='alice', email='alice@example.com', password='secret')
+        self.client.force_login(self.user)
+        response = self.client.post('/api/uploads/', {
+            'filename': 'C:\\clips\\holiday.mp4', 'title': 'Holiday', 'size': 10,
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.upload_id = response.json()['id']
+        self.url = f'/api/uploads/{self.upload_id}/'
+
+    def send_chunk(self, data, offset, checksum=None):
+        return self.client.patch(
+            self.url, data, content_type='application/offset+octet-stream',
+            HTTP_UPLOAD_OFFSET=str(offset),
+            HTTP_UPLOAD_CHECKSUM=checksum or checksum_header(data))
+
+    @mock.patch('videos.api.views.start_video_pipeline')
+    def test_chunks_are_assembled_into_video(self, start_pipeline):
+        self.assertEqual(self.send_chunk(b'0123', 0).json()['offset'], 4)
+
+        response = self.client.head(self.url)
+        self.assertEqual(response['Upload-Offset'], '4')
+        self.assertEqual(response['Upload-Length'], '10')
+
+        self.send_chunk(b'4567', 4)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.send_chunk(b'89', 8)
+
+        self.assertEqual(response.json()['status'], 'completed')
+        video = Video.objects.get(pk=response.json()['video'])
+        self.assertEqual(video.title, 'Holiday')
+        # Moved into place as is; hashing waits for the prepare stage
+        self.assertIsNone(video.blob)
+        self.assertEqual(video.file.name, 'videos/holiday.mp4')
+        with video.file.open('rb') as assembled:
+            self.assertEqual(assembled.read(), b'0123456789')
+        self.assertFalse(os.path.exists(partial_upload_path(self.upload_id)))
+        start_pipeline.assert_called_once_with(video.id)
+
+        assembled_path = video.file.path
+        adopt_blob(video)
+        video.refresh_from_db()
+        self.assertEqual(video.file.name, video.blob.file.name)
+        self.assertEqual(video.blob.sha256, hashlib.sha256(b'0123456789').hexdigest())
+        self.assertFalse(os.path.exists(assembled_path))
+        with video.file.open('rb') as stored:
+            self.assertEqual(stored.read(), b'0123456789')
+
+    @mock.patch('videos.api.views.start_video_pipeline')
+    def test_identical_content_is_reused_when_adopted(self, start_pipeline):
+        with self.captureOnCommitCallbacks(execute=True):
+            for offset in range(0, 10, 4):
+                response = self.send_chunk(b'0123456789'[offset:offset + 4], offset)
+        first = Video.objects.get(pk=response.json()['video'])
+        adopt_blob(first)
+
+        upload = self.client.post('/api/uploads/', {
+            'filename': 'copy.mp4', 'title': 'Copy', 'size': 10,
+        }, content_type='application/json').json()
+        self.url = f"/api/uploads/{upload['id']}/"
+        with self.captureOnCommitCallbacks(execute=True):
+            for offset in range(0, 10, 4):
+                response = self.send_chunk(b'0123456789'[offset:offset + 4], offset)
+        second = Video.objects.get(pk=response.json()['video'])
+        copy_path = second.file.path
+        adopt_blob(second)
+
+        self.assertEqual(VideoBlob.objects.count(), 1)
+        self.assertEqual(second.blob_id, first.blob_id)
+        self.assertEqual(second.file.name, first.file.name)
+        self.assertFalse(os.path.exists(copy_path))
+
+    def test_rejected_chunks_leave_offset_unchanged(self):
+        self.send_chunk(b'0123', 0)
+
+        response = self.send_chunk(b'4567', 0)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Upload-Offset'], '4')
+
+        response = self.send_chunk(b'4567', 4, checksum=checksum_header(b'other'))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.send_chunk(b'45678', 4).status_code, 413)
+
+        self.assertEqual(UploadSession.objects.get(pk=self.upload_id).offset, 4)
+        with open(partial_upload_path(self.upload_id), 'rb') as partial:
+            self.assertEqual(partial.read(), b'0123')
+
+    def test_delete_removes_partial_file(self):
+        self.send_chunk(b'0123', 0)
+        self.assertEqual(self.client.delete(self.url).status_code, 204)
+        self.assertFalse(os.path.exists(partial_upload_path(self.upload_id)))
+
+
+@override_settings(EVENTS_REDIS_URL='')
+@mock.patch('videos.api.views.start_video_pipeline')
+class VideoBlobTests(TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+        media_settings = override_settings(MEDIA_ROOT=self.tempdir.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+        self.user = get_user_model().objects.create_user(
+            username='alice', email='alice@example.com', password='secret')
+        self.client.force_login(self.user)
+
+    def upload(self, name, content):
+        response = self.client.post('/api/videos/', {
+            'title': name, 'file': SimpleUploadedFile(name, content, 'video/mp4'),
+        })
+        self.assertEqual(response.status_code, 201)
+        return Video.objects.get(pk=response.json()['id'])
+
+    def test_identical_uploads_share_one_blob(self, start_pipeline):
+        first = self.upload('first.mp4', b'same bytes')
+        second = self.upload('second.MP4', b'same bytes')
+        other = self.upload('other.mp4', b'other bytes')
+
+        self.assertEqual(VideoBlob.objects.count(), 2)
+        self.assertEqual(first.blob_id, second.blob_id)
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertNotEqual(first.blob_id, other.blob_id)
+
+        response = self.client.get(f'/api/videos/{second.id}/')
+        self.assertEqual(response.json()['content_hash'],
+                         hashlib.sha256(b'same bytes').hexdigest())
+
+    def test_uploads_are_hashed_as_they_are_received(self, start_pipeline):
+        content = b'streamed bytes' * 100
+        with mock.patch('videos.blobs.hash_content',
+                        side_effect=AssertionError('upload read again')):
+            small = self.upload('small.mp4', content)
+            # Spooled to a temporary file instead of kept in memory
+            with self.settings(FILE_UPLOAD_MAX_MEMORY_SIZE=64):
+                large = self.upload('large.mp4', content + b'!')
+
+        self.assertEqual(small.blob.sha256, hashlib.sha256(content).hexdigest())
+        self.assertEqual(large.blob.sha256, hashlib.sha256(content + b'!').hexdigest())
+        with large.file.open('rb') as stored:
+            self.assertEqual(stored.read(), content + b'!')
+
+    def test_blob_is_deleted_with_its_last_video(self, start_pipeline):
+        first = self.upload('first.mp4', b'same bytes')
+        second = self.upload('second.mp4', b'same bytes')
+        path = first.file.path
+
+        first.delete()
+        self.assertTrue(os.path.exists(path))
+        self.assertTrue(VideoBlob.objects.filter(pk=second.blob_id).exists())
+
+        second.delete()
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(VideoBlob.objects.exists())
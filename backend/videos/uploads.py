@@ -0,0 +1,128 @@
+import base64
+import hashlib
+import os
+from django.conf import settings
+from django.core.files import File
+from django.core.files.uploadhandler import MemoryFileUploadHandler, TemporaryFileUploadHandler
+
+# Digests accepted in the Upload-Checksum header
+CHECKSUM_ALGORITHMS = ('sha256', 'sha1', 'md5')
+
+
+class ChunkError(Exception):
+    """A received chunk was rejected; the partial file is left at its previous offset."""
+
+
+class PartialFile(File):
+    """
+    A fully received upload.
+    Exposing ``temporary_file_path`` lets FileSystemStorage move the file into
+    place instead of copying it.
+    """
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+class HashingUploadMixin:
+    """
+    Compute the SHA-256 of an uploaded file as its chunks arrive, and set it
+    as the ``sha256`` attribute of the file this handler completes. Only the
+    handler that keeps the data hashes it.
+    """
+
+    def new_file(self, *args, **kwargs):
+        self.digest = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def keeps_data(self):
+        return True
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.keeps_data():
+            self.digest.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.sha256 = self.digest.hexdigest()
+        return file
+
+
+class HashingMemoryFileUploadHandler(HashingUploadMixin, MemoryFileUploadHandler):
+    """Keeps small uploads in memory, hashed as they are received."""
+
+    def keeps_data(self):
+        return self.activated
+
+
+class HashingTemporaryFileUploadHandler(HashingUploadMixin, TemporaryFileUploadHandler):
+    """Streams large uploads to a temporary file, hashed as they are received."""
+
+
+def partial_upload_path(upload_id):
+    """Path of the file receiving the chunks of an upload."""
+    return os.path.join(settings.MEDIA_ROOT, 'uploads', f'{upload_id}.part')
+
+
+def create_partial_upload(upload_id):
+    path = partial_upload_path(upload_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'wb').close()
+    return path
+
+
+def remove_partial_upload(upload_id):
+    try:
+        os.remove(partial_upload_path(upload_id))
+    except FileNotFoundError:
+        pass
+
+
+def parse_checksum(header):
+    """
+    Parse an ``Upload-Checksum`` header of the form ``<algorithm> <base64 digest>``.
+    Returns the algorithm name and the raw digest.
+    """
+    try:
+        algorithm, encoded = header.split(' ', 1)
+        digest = base64.b64decode(encoded.strip(), validate=True)
+    except ValueError:
+        raise ChunkError("Upload-Checksum must be '<algorithm> <base64 digest>'.")
+    algorithm = algorithm.lower()
+    if algorithm not in CHECKSUM_ALGORITHMS:
+        raise ChunkError(
+            f"Unsupported checksum algorithm '{algorithm}'. "
+            f"Use one of: {', '.join(CHECKSUM_ALGORITHMS)}.")
+    return algorithm, digest
+
+
+def write_chunk(upload_id, offset, stream, length, algorithm, digest, block_size=64 * 1024):
+    """
+    Write ``length`` bytes read from ``stream`` at ``offset`` of an upload's partial file.
+
+    The chunk is streamed to disk while it is hashed, so it is never held in
+    memory. If the client disconnects early or the digest does not match, the
+    file is truncated back to ``offset`` and ChunkError is raised.
+    """
+    hasher = hashlib.new(algorithm)
+    received = 0
+    with open(partial_upload_path(upload_id), 'r+b') as partial:
+        partial.seek(offset)
+        try:
+            while received < length:
+                block = stream.read(min(block_size, length - received))
+                if not block:
+                    raise ChunkError(
+                        f"Chunk ended after {received} of {length} bytes.")
+                partial.write(block)
+                hasher.update(block)
+                received += len(block)
+            if hasher.digest() != digest:
+                raise ChunkError("Checksum mismatch.")
+        except Exception:
+            partial.truncate(offset)
+            raise
+        partial.truncate(offset + received)
+    return offset + received
@@ -1,3 +1,91 @@
-from django.shortcuts import render
+import json
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+from rest_framework.authtoken.models import Token
+from subtitle_generator.events import check_stream_token, format_sse, subscribe_user_events
+from videos.models import Video
 
-# Create your views here.
+
+def get_stream_user(request):
+    """
+    Resolve the user for an event stream request.
+    Browsers cannot set headers on an EventSource, so they pass a short-lived
+    signed stream token (from ``/api/events/token/``) as the ``token`` query
+    parameter; other clients may send their API token in the header.
+    """
+    header = request.headers.get('Authorization', '')
+    if header.startswith('Token '):
+        token = Token.objects.select_related('user').filter(
+            key=header.split(' ', 1)[1].strip()).first()
+        user = token.user if token else None
+    else:
+        user_id = check_stream_token(request.GET.get('token'))
+        user = get_user_model().objects.filter(pk=user_id).first() if user_id else None
+
+    if user is None or not user.is_active:
+        return None
+    return user
+
+
+def get_active_video_events(user):
+    """Current state of the user's unfinished videos, sent when a stream opens."""
+    videos = Video.objects.filter(
+        user=user, status__in=['uploading', 'processing']
+    ).values('id', 'status', 'error_message')
+    return [
+        json.dumps({
+            'type': 'video_status',
+            'video_id': video['id'],
+            'status': video['status'],
+            'stage': None,
+            'progress': None,
+            'error_message': video['error_message'],
+        })
+        for video in videos
+    ]
+
+
+async def event_stream(request):
+    """Stream the current user's video and subtitle job updates as Server-Sent Events."""
+    user = await sync_to_async(get_stream_user)(request)
+    if user is None:
+        return HttpResponse(
+            json.dumps({'detail': 'Authentication required.'}),
+            content_type='application/json',
+            status=401
+        )
+
+    # Under WSGI an async stream is buffered to the end, which never comes,
+    # and holds a worker thread; clients fall back to polling instead
+    unavailable = None
+    if not settings.EVENTS_REDIS_URL:
+        unavailable = 'Live events are disabled.'
+    elif not isinstance(request, ASGIRequest):
+        unavailable = 'Live events need the ASGI server (uvicorn subtitle_generator.asgi:application).'
+    if unavailable:
+        return HttpResponse(
+            json.dumps({'detail': unavailable}),
+            content_type='application/json',
+            status=503
+        )
+
+    async def events():
+        subscription = subscribe_user_events(user.id)
+        try:
+            # Subscribe before taking the snapshot so no transition is missed
+            yield await anext(subscription)
+            for data in await sync_to_async(get_active_video_events)(user):
+                yield format_sse('video_status', data)
+            async for message in subscription:
+                yield message
+        finally:
+            await subscription.aclose()
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Disable response buffering in nginx so events are flushed immediately
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -40,6 +40,7 @@ const SecuritySection = () => {
   const [showWarning, setShowWarning] = useState(false);
   const [confirmText, setConfirmText] = useState("");
   const [isDeleting, setIsDeleting] = useState(false);
+  const [isExporting, setIsExporting] = useState(false);
 
   const handleDeleteAccount = async () => {
     try {
@@ -58,19 +59,22 @@ const SecuritySection = () => {
 
   const handleExportData = async () => {
     try {
-      const blob = await exportUserData();
-      const url = window.URL.createObjectURL(blob);
+      setIsExporting(true);
+      toast.info("Preparing your data export, this may take a while");
+      // The signed link downloads the archive directly, without buffering it here
+      const url = await exportUserData();
       const a = document.createElement("a");
       a.href = url;
-      a.download = `${user?.username || "user"}_data_export.json`;
+      a.download = `${user?.username || "user"}_data_export.zip`;
       document.body.appendChild(a);
       a.click();
       document.body.removeChild(a);
-      window.URL.revokeObjectURL(url);
       toast.success("Your data has been successfully exported");
     } catch (error) {
       console.error("Error exporting data:", error);
       toast.error("Failed to export data. Please try again.");
+    } finally {
+      setIsExporting(false);
     }
   };
 
@@ -236,12 +240,13 @@ const SecuritySection = () => {
               endIcon={<ArrowForwardIos fontSize="small" />}
               fullWidth={isMobile}
               onClick={handleExportData}
+              disabled={isExporting}
               sx={{
                 borderRadius: 1.5,
                 fontWeight: 500,
               }}
             >
-              Request Data Export
+              {isExporting ? "Preparing Export..." : "Request Data Export"}
             </Button>
           </Paper>
         </Box>
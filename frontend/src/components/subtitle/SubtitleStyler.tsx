@@ -132,7 +132,21 @@ const SubtitleStyler: React.FC<SubtitleStylerProps> = ({
         videoId,
         language
       );
-      onStyleChange(response.data);
+
+      // Generation runs in the background; wait for the job to finish
+      let job = response.data;
+      while (job.status === "queued" || job.status === "running") {
+        await new Promise((resolve) => setTimeout(resolve, 2000));
+        job = (await subtitleService.getSubtitleJob(job.id)).data;
+      }
+      if (job.status !== "succeeded") {
+        throw new Error(job.error_message || "Subtitle generation failed");
+      }
+
+      const subtitleResponse = await subtitleService.getSubtitle(
+        job.subtitle_id
+      );
+      onStyleChange(subtitleResponse.data);
       toast.success("Subtitles generated successfully!");
     } catch (err: any) {
       console.error("Failed to generate subtitles:", err);
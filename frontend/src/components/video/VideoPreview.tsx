@@ -16,6 +16,47 @@ interface VideoPreviewProps {
   };
 }
 
+// Index of the last item in a sorted array that is <= value, or -1
+const bisectRight = (sorted: number[], value: number) => {
+  let low = 0;
+  let high = sorted.length;
+  while (low < high) {
+    const mid = (low + high) >> 1;
+    if (sorted[mid] <= value) low = mid + 1;
+    else high = mid;
+  }
+  return low - 1;
+};
+
+// Cues are sorted by start time, so the active one is found by binary search
+const findActiveCue = (cues: any[], time: number) => {
+  let low = 0;
+  let high = cues.length;
+  while (low < high) {
+    const mid = (low + high) >> 1;
+    if (cues[mid].start <= time) low = mid + 1;
+    else high = mid;
+  }
+  const cue = cues[low - 1];
+  return cue && time <= cue.end ? cue : null;
+};
+
+// Word start times in seconds. Cues store "words" as flat [start, end, ...]
+// milliseconds relative to the cue start; older cues fall back to an
+// estimate proportional to word length.
+const getWordStarts = (cue: any, words: string[]) => {
+  if (Array.isArray(cue.words) && cue.words.length === words.length * 2) {
+    return words.map((_, i) => cue.start + cue.words[i * 2] / 1000);
+  }
+  const totalChars = words.reduce((total, word) => total + word.length, 0);
+  let position = cue.start;
+  return words.map((word) => {
+    const start = position;
+    position += ((cue.end - cue.start) * word.length) / totalChars;
+    return start;
+  });
+};
+
 const VideoPreview: React.FC<VideoPreviewProps> = ({ videoUrl, subtitles }) => {
   const videoRef = useRef<HTMLVideoElement>(null);
   const [currentTime, setCurrentTime] = useState(0);
@@ -36,22 +77,14 @@ const VideoPreview: React.FC<VideoPreviewProps> = ({ videoUrl, subtitles }) => {
   useEffect(() => {
     if (subtitles && subtitles.subtitles_json) {
       try {
-        const subtitleData = subtitles.subtitles_json;
-        const currentSub = subtitleData.find(
-          (sub: any) => currentTime >= sub.start && currentTime <= sub.end
-        );
-
-        if (currentSub) {
-          const words = currentSub.text.trim().split(/\s+/);
-          const segmentDuration = currentSub.end - currentSub.start;
-          const wordsPerSecond = words.length / segmentDuration;
-          const currentWordIndex = Math.min(
-            Math.floor((currentTime - currentSub.start) * wordsPerSecond),
-            words.length - 1
-          );
+        const cue = findActiveCue(subtitles.subtitles_json, currentTime);
 
+        if (cue) {
+          const words = cue.text.trim().split(/\s+/);
           setCurrentSubtitle(words);
-          setHighlightedWordIndex(currentWordIndex);
+          setHighlightedWordIndex(
+            bisectRight(getWordStarts(cue, words), currentTime)
+          );
         } else {
           setCurrentSubtitle([]);
           setHighlightedWordIndex(-1);
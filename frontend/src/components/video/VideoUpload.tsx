@@ -8,7 +8,7 @@ import {
   CircularProgress,
   LinearProgress,
 } from "@mui/material";
-import { videoService } from "../../services/api/api";
+import { uploadService } from "../../services/api/api";
 import { toast } from "react-toastify";
 
 interface VideoUploadProps {
@@ -59,15 +59,14 @@ const VideoUpload: React.FC<VideoUploadProps> = ({ onUploadSuccess }) => {
     setIsUploading(true);
     setUploadProgress(0);
 
-    const formData = new FormData();
-    formData.append("title", title);
-    formData.append("description", description);
-    formData.append("file", selectedFile);
-
     try {
-      const response = await videoService.uploadVideo(formData);
-      const videoId = response.data.id;
-      onUploadSuccess(videoId);
+      const upload = await uploadService.uploadFile(
+        selectedFile,
+        title,
+        description,
+        setUploadProgress
+      );
+      onUploadSuccess(upload.video);
     } catch (err: any) {
       console.error("Upload failed:", err);
       toast.error(
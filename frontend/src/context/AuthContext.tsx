@@ -51,7 +51,7 @@ interface AuthContextType {
   resendVerificationEmail: (email: string) => Promise<void>;
   verifyEmail: (uid: string, token: string) => Promise<void>;
   deleteAccount: () => Promise<void>;
-  exportUserData: () => Promise<Blob>;
+  exportUserData: (includeMedia?: boolean) => Promise<string>;
 }
 
 const AuthContext = createContext<AuthContextType | undefined>(undefined);
@@ -247,10 +247,18 @@ export const AuthProvider: React.FC<{ children: React.ReactNode }> = ({
     }
   };
 
-  const exportUserData = async (): Promise<Blob> => {
+  const exportUserData = async (includeMedia = false): Promise<string> => {
     try {
-      const response = await authService.exportUserData();
-      return response.data;
+      let dataExport = (await authService.requestDataExport(includeMedia)).data;
+      // The archive is written in the background; poll until it is ready
+      while (dataExport.status === "queued" || dataExport.status === "running") {
+        await new Promise((resolve) => setTimeout(resolve, 2000));
+        dataExport = (await authService.getDataExport(dataExport.id)).data;
+      }
+      if (dataExport.status !== "succeeded") {
+        throw new Error(dataExport.error_message || "Data export failed");
+      }
+      return dataExport.download_url;
     } catch (error) {
       console.error("Data export failed:", error);
       throw error;
@@ -34,7 +34,7 @@ import VideoFileIcon from "@mui/icons-material/VideoFile";
 import AccessTimeIcon from "@mui/icons-material/AccessTime";
 import CalendarTodayIcon from "@mui/icons-material/CalendarToday";
 import VideoUpload from "../components/video/VideoUpload";
-import { videoService } from "../services/api/api";
+import { videoService, eventService } from "../services/api/api";
 import { useAuth } from "../context/AuthContext";
 import { toast } from "react-toastify";
 
@@ -58,6 +58,8 @@ const BACKOFF_FACTOR = 1.5;
 const DashboardPage: React.FC = () => {
   const [tabValue, setTabValue] = useState(0);
   const [videos, setVideos] = useState<Video[]>([]);
+  const [nextPage, setNextPage] = useState<string | null>(null);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
   const [isLoading, setIsLoading] = useState(true);
   const { user, isAuthenticated } = useAuth();
   const navigate = useNavigate();
@@ -72,6 +74,8 @@ const DashboardPage: React.FC = () => {
   const [pollingInterval, setPollingInterval] = useState(
     INITIAL_POLLING_INTERVAL
   );
+  // Polling is only used while the live event stream is unavailable
+  const [liveUpdates, setLiveUpdates] = useState(false);
 
   useEffect(() => {
     // Redirect if not authenticated
@@ -81,6 +85,29 @@ const DashboardPage: React.FC = () => {
     }
 
     fetchVideos();
+
+    const subscription = eventService.subscribe((event) => {
+      if (event.type !== "video_status") return;
+
+      setVideos((current) =>
+        current.map((v) =>
+          v.id === event.video_id
+            ? { ...v, status: event.status, error_message: event.error_message }
+            : v
+        )
+      );
+      if (event.status === "error") {
+        toast.error(
+          `Failed to process video: ${event.error_message || "Unknown error"}`
+        );
+      }
+      if (event.status === "ready" || event.status === "error") {
+        // Pick up the thumbnail and duration written by the pipeline
+        fetchVideos();
+      }
+    }, setLiveUpdates);
+
+    return () => subscription.close();
   }, [isAuthenticated, navigate]);
 
   useEffect(() => {
@@ -88,7 +115,7 @@ const DashboardPage: React.FC = () => {
       (v) => v.status === "uploading" || v.status === "processing"
     );
 
-    if (processingVideos.length > 0 && !isLoading) {
+    if (processingVideos.length > 0 && !isLoading && !liveUpdates) {
       // Calculate next polling interval with exponential backoff
       const nextInterval = Math.min(
         INITIAL_POLLING_INTERVAL * Math.pow(BACKOFF_FACTOR, retryCount),
@@ -125,7 +152,7 @@ const DashboardPage: React.FC = () => {
       setRetryCount(0);
       setPollingInterval(INITIAL_POLLING_INTERVAL);
     }
-  }, [videos, isLoading, retryCount, pollingInterval]);
+  }, [videos, isLoading, retryCount, pollingInterval, liveUpdates]);
 
   useEffect(() => {
     // Only show success messages when you are in the "My Videos" tab (tabValue === 1)
@@ -161,10 +188,11 @@ const DashboardPage: React.FC = () => {
 
     try {
       const response = await videoService.getVideos();
-      setVideos(response.data);
+      setVideos(response.data.results);
+      setNextPage(response.data.next);
 
       // Check if any videos are still processing
-      const stillProcessing = response.data.some(
+      const stillProcessing = response.data.results.some(
         (v: Video) => v.status === "uploading" || v.status === "processing"
       );
 
@@ -181,6 +209,22 @@ const DashboardPage: React.FC = () => {
     }
   };
 
+  const loadMoreVideos = async () => {
+    if (!nextPage) return;
+    setIsLoadingMore(true);
+
+    try {
+      const response = await videoService.getVideos(nextPage);
+      setVideos((current) => [...current, ...response.data.results]);
+      setNextPage(response.data.next);
+    } catch (err: any) {
+      console.error("Failed to fetch more videos:", err);
+      toast.error("Failed to load more videos. Please try again.");
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
+
   const handleTabChange = (_: React.SyntheticEvent, newValue: number) => {
     setTabValue(newValue);
   };
@@ -576,6 +620,17 @@ const DashboardPage: React.FC = () => {
                 })}
               </Box>
             )}
+            {nextPage && (
+              <Box sx={{ display: "flex", justifyContent: "center", mt: 4 }}>
+                <Button
+                  variant="outlined"
+                  onClick={loadMoreVideos}
+                  disabled={isLoadingMore}
+                >
+                  {isLoadingMore ? "Loading..." : "Load more"}
+                </Button>
+              </Box>
+            )}
           </>
         )}
       </Box>
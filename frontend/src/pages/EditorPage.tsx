@@ -15,11 +15,17 @@ import {
   useTheme,
   alpha,
   Tooltip,
+  MenuItem,
+  TextField,
 } from "@mui/material";
 import { Link } from "react-router-dom";
 import VideoPreview from "../components/video/VideoPreview";
 import SubtitleStyler from "../components/subtitle/SubtitleStyler";
-import { videoService, subtitleService } from "../services/api/api";
+import {
+  videoService,
+  subtitleService,
+  eventService,
+} from "../services/api/api";
 // import { subtitleServices } from "../services/subtitleService";
 import { useAuth } from "../context/AuthContext";
 import { toast } from "react-toastify";
@@ -57,6 +63,10 @@ const EditorPage: React.FC = () => {
   const [subtitle, setSubtitle] = useState<Subtitle | null>(null);
   const [isLoading, setIsLoading] = useState(true);
   const [exportLoading, setExportLoading] = useState(false);
+  const [exportFormat, setExportFormat] = useState("srt");
+  const [renderProgress, setRenderProgress] = useState<number | null>(null);
+  // Polling is only used while the live event stream is unavailable
+  const [liveUpdates, setLiveUpdates] = useState(false);
   const theme = useTheme();
 
   const { isAuthenticated } = useAuth();
@@ -74,15 +84,51 @@ const EditorPage: React.FC = () => {
   }, [videoId, isAuthenticated, navigate]);
 
   useEffect(() => {
-    if (video && !subtitle && !isLoading && video.status === "ready") {
+    if (!isAuthenticated || !videoId) return;
+
+    const id = parseInt(videoId);
+    const subscription = eventService.subscribe((event) => {
+      if (event.video_id !== id) return;
+
+      if (
+        event.type === "video_status" &&
+        (event.status === "ready" || event.status === "error")
+      ) {
+        fetchVideoData(id);
+      } else if (
+        event.type === "subtitle_job" &&
+        event.status === "succeeded" &&
+        event.subtitle_id
+      ) {
+        subtitleService
+          .getSubtitle(event.subtitle_id)
+          .then((response) => setSubtitle(response.data))
+          .catch((err) => console.error("Failed to load subtitles:", err));
+      }
+    }, setLiveUpdates);
+
+    return () => subscription.close();
+  }, [videoId, isAuthenticated]);
+
+  useEffect(() => {
+    if (
+      video &&
+      !subtitle &&
+      !isLoading &&
+      !liveUpdates &&
+      video.status === "ready"
+    ) {
       const interval = setInterval(async () => {
         try {
           const subtitlesResponse = await subtitleService.getSubtitles(
             video.id
           );
-          if (subtitlesResponse.data.length > 0) {
-            setSubtitle(subtitlesResponse.data[0]);
+          if (subtitlesResponse.data.results.length > 0) {
             clearInterval(interval);
+            const subtitleResponse = await subtitleService.getSubtitle(
+              subtitlesResponse.data.results[0].id
+            );
+            setSubtitle(subtitleResponse.data);
           }
         } catch (err) {
           console.error("Failed to check for subtitles:", err);
@@ -91,7 +137,7 @@ const EditorPage: React.FC = () => {
 
       return () => clearInterval(interval);
     }
-  }, [video, subtitle, isLoading]);
+  }, [video, subtitle, isLoading, liveUpdates]);
 
   const fetchVideoData = async (id: number) => {
     setIsLoading(true);
@@ -101,8 +147,12 @@ const EditorPage: React.FC = () => {
       setVideo(videoResponse.data);
 
       const subtitlesResponse = await subtitleService.getSubtitles(id);
-      if (subtitlesResponse.data.length > 0) {
-        setSubtitle(subtitlesResponse.data[0]);
+      // List rows are summaries; the cues come with the detail
+      if (subtitlesResponse.data.results.length > 0) {
+        const subtitleResponse = await subtitleService.getSubtitle(
+          subtitlesResponse.data.results[0].id
+        );
+        setSubtitle(subtitleResponse.data);
       }
     } catch (err: any) {
       console.error("Failed to fetch video data:", err);
@@ -130,13 +180,13 @@ const EditorPage: React.FC = () => {
       setExportLoading(true);
       const response = await subtitleService.exportSubtitles(
         subtitle.id,
-        "srt"
+        exportFormat
       );
 
       const url = window.URL.createObjectURL(new Blob([response.data]));
       const link = document.createElement("a");
       link.href = url;
-      link.setAttribute("download", `subtitles_${videoId}.srt`);
+      link.setAttribute("download", `subtitles_${videoId}.${exportFormat}`);
       document.body.appendChild(link);
       link.click();
 
@@ -152,6 +202,31 @@ const EditorPage: React.FC = () => {
     }
   };
 
+  const handleRenderVideo = async () => {
+    if (!subtitle) return;
+
+    try {
+      setRenderProgress(0);
+      let job = (await subtitleService.renderVideo(subtitle.id)).data;
+      // Renders run in the background; poll until the file is ready
+      while (job.status === "queued" || job.status === "running") {
+        setRenderProgress(job.progress);
+        await new Promise((resolve) => setTimeout(resolve, 2000));
+        job = (await subtitleService.getRenderJob(job.id)).data;
+      }
+      if (job.status !== "succeeded") {
+        throw new Error(job.error_message || "Rendering failed");
+      }
+      window.open(job.output, "_blank");
+      toast.success("Video rendered successfully!");
+    } catch (err: any) {
+      console.error("Failed to render video:", err);
+      toast.error("Failed to render video. Please try again later.");
+    } finally {
+      setRenderProgress(null);
+    }
+  };
+
   if (isLoading) {
     return (
       <Container maxWidth="lg" sx={{ py: 4 }}>
@@ -513,6 +588,45 @@ const EditorPage: React.FC = () => {
               </Button>
             </Tooltip>
 
+            {subtitle && (
+              <TextField
+                select
+                size="small"
+                label="Format"
+                value={exportFormat}
+                onChange={(e) => setExportFormat(e.target.value)}
+                sx={{ minWidth: 110 }}
+              >
+                {["srt", "vtt", "ass", "ttml", "json"].map((format) => (
+                  <MenuItem key={format} value={format}>
+                    .{format}
+                  </MenuItem>
+                ))}
+              </TextField>
+            )}
+
+            {subtitle && (
+              <Tooltip title="Download the video with subtitles burned in">
+                <Button
+                  variant="outlined"
+                  onClick={handleRenderVideo}
+                  disabled={renderProgress !== null}
+                  startIcon={
+                    renderProgress !== null ? (
+                      <CircularProgress size={20} />
+                    ) : (
+                      <DownloadIcon />
+                    )
+                  }
+                  sx={{ borderRadius: 2, px: 3 }}
+                >
+                  {renderProgress !== null
+                    ? `Rendering... ${renderProgress}%`
+                    : "Download Video"}
+                </Button>
+              </Tooltip>
+            )}
+
             {subtitle && (
               <Tooltip title="Export Subtitles">
                 <Button
@@ -539,7 +653,7 @@ const EditorPage: React.FC = () => {
                     },
                   }}
                 >
-                  Export Subtitles (.srt)
+                  Export Subtitles (.{exportFormat})
                 </Button>
               </Tooltip>
             )}
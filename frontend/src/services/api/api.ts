@@ -36,10 +36,10 @@ export const authService = {
 
   deleteAccount: () => API.delete("/auth/delete-account/"),
 
-  exportUserData: () =>
-    API.get("/auth/export-data/", {
-      responseType: "blob",
-    }),
+  requestDataExport: (includeMedia = false) =>
+    API.post("/auth/export-data/", { include_media: includeMedia }),
+
+  getDataExport: (exportId: string) => API.get(`/auth/export-data/${exportId}/`),
 
   getCurrentUser: () => API.get("/auth/me/"),
 
@@ -87,22 +87,97 @@ export const videoService = {
       },
     }),
 
-  getVideos: () => API.get("/videos/"),
+  // Cursor pages: pass the previous page's "next" link to continue
+  getVideos: (page?: string | null) => API.get(page || "/videos/"),
 
   getVideo: (id: number) => API.get(`/videos/${id}/`),
 
   deleteVideo: (id: number) => API.delete(`/videos/${id}/`),
 };
 
+const sha256Base64 = async (data: ArrayBuffer) => {
+  const digest = new Uint8Array(await crypto.subtle.digest("SHA-256", data));
+  return btoa(String.fromCharCode(...Array.from(digest)));
+};
+
+// Chunked, resumable uploads
+export const uploadService = {
+  createUpload: (file: File, title: string, description: string) =>
+    API.post("/uploads/", {
+      filename: file.name,
+      size: file.size,
+      title,
+      description,
+    }),
+
+  getUpload: (uploadId: string) => API.get(`/uploads/${uploadId}/`),
+
+  uploadChunk: async (uploadId: string, offset: number, chunk: Blob) => {
+    const data = await chunk.arrayBuffer();
+    return API.patch(`/uploads/${uploadId}/`, data, {
+      headers: {
+        "Content-Type": "application/offset+octet-stream",
+        "Upload-Offset": String(offset),
+        "Upload-Checksum": `sha256 ${await sha256Base64(data)}`,
+      },
+    });
+  },
+
+  // Upload a file chunk by chunk, resuming from the server's offset after a
+  // failed chunk. Resolves with the completed upload session.
+  uploadFile: async (
+    file: File,
+    title: string,
+    description: string,
+    onProgress?: (percent: number) => void,
+    maxRetries = 5
+  ) => {
+    let upload = (await uploadService.createUpload(file, title, description))
+      .data;
+    let retries = 0;
+    while (upload.status !== "completed") {
+      const chunk = file.slice(upload.offset, upload.offset + upload.chunk_size);
+      try {
+        upload = (await uploadService.uploadChunk(upload.id, upload.offset, chunk))
+          .data;
+        retries = 0;
+      } catch (err) {
+        if (++retries > maxRetries) throw err;
+        await new Promise((resolve) => setTimeout(resolve, 1000 * retries));
+        upload = (await uploadService.getUpload(upload.id)).data;
+      }
+      onProgress?.(Math.round((upload.offset / upload.size) * 100));
+    }
+    return upload;
+  },
+};
+
 // Subtitle services
 export const subtitleService = {
   generateSubtitles: (videoId: number, language: string) =>
     API.post(`/subtitles/generate/`, { video_id: videoId, language }),
 
+  generateSubtitlesBatch: (items: { video_id: number; language: string }[]) =>
+    API.post(`/subtitles/generate_batch/`, { items }),
+
   getSubtitles: (videoId: number) => API.get(`/subtitles/?video=${videoId}`),
 
   getSubtitle: (id: number) => API.get(`/subtitles/${id}/`),
 
+  // Cues overlapping [from, to) seconds, a page at a time
+  getCues: (id: number, from: number, to: number, offset = 0) =>
+    API.get(`/subtitles/${id}/cues/`, { params: { from, to, offset } }),
+
+  // Cue-level edits; version must match the subtitle's cue_version
+  editCues: (id: number, version: number, operations: any[]) =>
+    API.patch(`/subtitles/${id}/cues/`, { version, operations }),
+
+  getSubtitleJob: (jobId: string) => API.get(`/subtitle-jobs/${jobId}/`),
+
+  renderVideo: (id: number) => API.post(`/subtitles/${id}/render_video/`),
+
+  getRenderJob: (jobId: string) => API.get(`/render-jobs/${jobId}/`),
+
   updateSubtitleStyle: (id: number, styleData: any) =>
     API.patch(`/subtitles/${id}/`, styleData),
 
@@ -113,4 +188,66 @@ export const subtitleService = {
     }),
 };
 
+// Live video and subtitle job updates (Server-Sent Events)
+// Seconds to wait before reopening a stream the server refused or closed
+const EVENT_STREAM_RETRY_SECONDS = 30;
+
+export const eventService = {
+  // Each connection is opened with a short-lived stream token, so the API
+  // token never appears in URLs (and access logs)
+  subscribe: (
+    onEvent: (event: any) => void,
+    onLiveChange?: (live: boolean) => void
+  ) => {
+    let source: EventSource | null = null;
+    let closed = false;
+    let retryTimer: ReturnType<typeof setTimeout> | undefined;
+
+    const retry = () => {
+      onLiveChange?.(false);
+      if (!closed) {
+        retryTimer = setTimeout(connect, EVENT_STREAM_RETRY_SECONDS * 1000);
+      }
+    };
+
+    const connect = async () => {
+      let token: string;
+      try {
+        token = (await API.post("/events/token/")).data.token;
+      } catch (error) {
+        retry();
+        return;
+      }
+      if (closed) return;
+
+      source = new EventSource(
+        `${API.defaults.baseURL}/events/?token=${encodeURIComponent(token)}`
+      );
+      ["video_status", "subtitle_job"].forEach((type) =>
+        source?.addEventListener(type, (message) =>
+          onEvent(JSON.parse((message as MessageEvent).data))
+        )
+      );
+      source.onopen = () => onLiveChange?.(true);
+      source.onerror = () => {
+        onLiveChange?.(false);
+        // The browser reconnects by itself, but not once the stream was
+        // refused (an expired token or no live events), so open a new one
+        if (source?.readyState === EventSource.CLOSED) {
+          retry();
+        }
+      };
+    };
+
+    connect();
+    return {
+      close: () => {
+        closed = true;
+        clearTimeout(retryTimer);
+        source?.close();
+      },
+    };
+  },
+};
+
 export default API;
@@ -23,6 +23,18 @@ interface Subtitle {
   updated_at: string;
 }
 
+interface SubtitleSummary {
+  id: number;
+  video_id: number;
+  language: string;
+  style: string;
+  cue_count: number;
+  duration: number;
+  cue_version: number;
+  created_at: string;
+  updated_at: string;
+}
+
 const generateSubtitles = async (
   params: GenerateSubtitlesParams
 ): Promise<Subtitle> => {
@@ -33,9 +45,11 @@ const generateSubtitles = async (
   return response.data;
 };
 
-const getSubtitles = async (videoId: number): Promise<Subtitle[]> => {
+const getSubtitles = async (
+  videoId: number
+): Promise<SubtitleSummary[]> => {
   const response = await API.get(`/subtitles/?video=${videoId}`);
-  return response.data;
+  return response.data.results;
 };
 
 const updateSubtitleStyle = async (
@@ -55,10 +69,10 @@ const deleteSubtitle = async (subtitleId: number): Promise<void> => {
 
 const downloadSubtitle = async (
   subtitleId: number,
-  format: "srt" | "vtt"
+  format: "srt" | "vtt" | "ass" | "ttml" | "json"
 ): Promise<Blob> => {
   const response = await API.get(
-    `/subtitles/${subtitleId}/download/?format=${format}`,
+    `/subtitles/${subtitleId}/export_subtitle/?format=${format}`,
     {
       responseType: "blob",
     }
@@ -20,7 +20,7 @@ if (-not (Test-CommandExists "python")) {
 
 # Start the backend server
 Write-Host "Starting Django backend server..." -ForegroundColor Green
-Start-Process powershell -ArgumentList "-NoExit", "-Command", "cd backend; .\venv\Scripts\Activate.ps1; python manage.py runserver"
+Start-Process powershell -ArgumentList "-NoExit", "-Command", "cd backend; .\venv\Scripts\Activate.ps1; uvicorn subtitle_generator.asgi:application --reload --port 8000"
 
 # Start the frontend server
 Write-Host "Starting React frontend server..." -ForegroundColor Green